@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from typing import List, Dict, Any, Optional, Union
 import os
+import asyncio
 import shutil
 from pydantic import BaseModel
 import tempfile
@@ -11,6 +12,13 @@ import uvicorn
 from pathlib import Path
 from dotenv import load_dotenv
 from utils.supabase_storage import supabase_storage
+from utils.image_generation import close_clients as close_image_clients
+from utils.search_helpers import close_session as close_search_session
+from utils.db_pool import close_pool
+from utils.cache import close_cache
+from utils.job_events import start_listener, stop_listener
+from utils.text_generation import close_client as close_text_client
+from utils.video_processing import detect_video_encoder, close_client as close_download_client
 
 # Load environment variables
 load_dotenv()
@@ -40,6 +48,21 @@ def ensure_dirs():
 @app.on_event("startup")
 async def startup_event():
     ensure_dirs()
+    await start_listener()
+    # Probe for a hardware encoder before the first job needs it
+    await asyncio.to_thread(detect_video_encoder)
+
+# Close shared HTTP clients, the database pool and the cache on shutdown
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_image_clients()
+    await close_search_session()
+    await close_text_client()
+    await close_download_client()
+    await stop_listener()
+    await close_pool()
+    await close_cache()
+    await supabase_storage.close()
 
 # Import routers
 from routes.videos import router as videos_router
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional, Union, Literal
 from enum import Enum
+import msgspec
 import uuid
 import datetime
 
@@ -161,4 +162,33 @@ class RegenerateContentResponse(BaseModel):
     query: str
     videos: List[VideoResult] = []
     images: List[ImageResult] = []
-    aiImage: Optional[Dict[str, Any]] = None 
\ No newline at end of file
+    aiImage: Optional[Dict[str, Any]] = None
+
+# Internal msgspec DTOs used on the regenerate hot path.
+# These mirror VideoResult/ImageResult/RegenerateContentResponse but construct
+# and serialize without per-field Python validators. Unknown keys from the
+# provider payloads are ignored, as with the Pydantic models.
+class VideoResultMS(msgspec.Struct):
+    downloadUrl: str
+    id: Optional[Union[int, str]] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    duration: Optional[float] = None
+    image: Optional[str] = None
+    user: Optional[str] = None
+
+class ImageResultMS(msgspec.Struct):
+    url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    thumbnail: Optional[str] = None
+    isAiGenerated: Optional[bool] = False
+    source: Optional[str] = None
+
+class RegenerateContentResponseMS(msgspec.Struct):
+    sectionIndex: int
+    query: str
+    success: bool = True
+    videos: List[VideoResultMS] = []
+    images: List[ImageResultMS] = []
+    aiImage: Optional[Dict[str, Any]] = None
@@ -8,6 +8,7 @@ import tempfile
 import uuid
 import asyncio
 import shutil
+from contextlib import suppress
 from pydantic import ValidationError, BaseModel
 
 from models import (
@@ -22,10 +23,8 @@ from models import (
 )
 from utils.video_processing import (
     download_content,
-    image_to_video,
-    standardize_video,
-    concatenate_videos,
-    get_video_duration
+    concatenate_clips,
+    ClipSource
 )
 
 from utils.supabase_storage import supabase_storage
@@ -34,6 +33,9 @@ from utils.supabaseDB import supabase_db
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Content items downloaded in parallel per concatenation job
+DOWNLOAD_CONCURRENCY = 8
+
 class ConcatenateJobRequest(BaseModel):
     job_id: str
 
@@ -134,86 +136,58 @@ async def process_job_concatenation_task(
             logger.info("Content items sorted by created_at timestamp")
         
         
-        # Download and process all content
-        processed_files = []
-        for i, item in enumerate(content_items):
+        # Download all content; normalization happens in the single concat encode.
+        # Items download and verify concurrently so probes overlap with transfers.
+        download_semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+        
+        async def fetch_item(i: int, item: Dict[str, Any]) -> Optional[ClipSource]:
             content_type = item.get("content_type")
             supabase_url = item.get("supabase_url")
-            thumbnail_url = item.get("thumbnail")
-            
-            # Get the duration for this item (default to 5 seconds if not specified)
-            item_duration = float(item.get("duration", 5.0))
-            
-            logger.info(f"Processing item {i+1}/{len(content_items)}: {content_type} (duration: {item_duration}s)")
             
+            if content_type == "video":
+                input_path = os.path.join(temp_dir, f"input_{i}.mp4")
+                is_video = True
+            elif content_type in ["image", "ai_image"]:
+                input_path = os.path.join(temp_dir, f"input_{i}.jpg")
+                is_video = False
+            else:
+                return None
+                
             try:
-                if content_type == "video":
-                    # Download the video from Supabase URL
-                    input_path = os.path.join(temp_dir, f"input_{i}.mp4")
-                    if supabase_url.startswith("http"):
-                        await download_content(supabase_url, input_path, is_video=True)
-                    else:
-                        # If it's a relative path, get the full URL
-                        full_url = await supabase_storage.get_public_url(supabase_url)
-                        await download_content(full_url, input_path, is_video=True)
-                    
-                    # Check actual duration of the video
-                    actual_duration = await get_video_duration(input_path)
-                    
-                    # Standardize the video (cut if too long, loop if too short)
-                    output_path = os.path.join(temp_dir, f"processed_{i}.mp4")
-                    if actual_duration > item_duration:
-                        # Video is too long, cut it
-                        await standardize_video(input_path, output_path, item_duration, mode="cut")
-                    elif actual_duration < item_duration:
-                        # Video is too short, loop it
-                        await standardize_video(input_path, output_path, item_duration, mode="loop")
-                    else:
-                        # Duration is already correct, just copy
-                        await standardize_video(input_path, output_path, item_duration)
-                    
-                    # Add to processed files
-                    processed_files.append(output_path)
-                    
-                elif content_type in ["image", "ai_image"]:
-                    # Download the image
-                    input_path = os.path.join(temp_dir, f"input_{i}.jpg")
+                # Get the duration for this item (default to 5 seconds if not specified)
+                item_duration = float(item.get("duration", 5.0))
+                
+                logger.info(f"Processing item {i+1}/{len(content_items)}: {content_type} (duration: {item_duration}s)")
+                
+                async with download_semaphore:
+                    # Download from the Supabase URL
                     if supabase_url.startswith("http"):
-                        await download_content(supabase_url, input_path, is_video=False)
+                        await download_content(supabase_url, input_path, is_video=is_video)
                     else:
                         # If it's a relative path, get the full URL
                         full_url = await supabase_storage.get_public_url(supabase_url)
-                        await download_content(full_url, input_path, is_video=False)
-                    
-                    logger.info(f"Converting image to video with duration {item_duration}s: {input_path}")
-                    # Convert image to video with the specified duration
-                    output_path = os.path.join(temp_dir, f"processed_{i}.mp4")
-                    await image_to_video(input_path, output_path, item_duration)
-                    
-                    # Verify the created video has the correct duration
-                    actual_duration = await get_video_duration(output_path)
-                    logger.info(f"Created video from image: duration={actual_duration}s, target={item_duration}s")
-                    
-                    # Add to processed files
-                    processed_files.append(output_path)
-                
+                        await download_content(full_url, input_path, is_video=is_video)
             except Exception as e:
                 logger.error(f"Error processing item {i}: {str(e)}")
-                # Continue with next item
-                continue
+                # Skip this item
+                return None
+                
+            # Videos are cut if too long and looped if too short; images are held
+            return ClipSource(path=input_path, target_duration=item_duration, is_image=not is_video)
+            
+        fetched = await asyncio.gather(*(fetch_item(i, item) for i, item in enumerate(content_items)))
+        clips = [clip for clip in fetched if clip is not None]
+        processed_files = [clip.path for clip in clips]
                 
-        if not processed_files:
+        if not clips:
             raise ValueError("No valid content to concatenate")
             
         # Create the final output path
         output_filename = f"job_{job_id}_{int(time.time())}.mp4"
         output_path = os.path.join(temp_dir, output_filename)
         
-        # Concatenate all processed files
-        await concatenate_videos(processed_files, output_path)
-        
-        # Get the duration of the final video
-        video_duration = await get_video_duration(output_path)
+        # Standardize and concatenate all clips in one ffmpeg run
+        await concatenate_clips(clips, output_path)
         
         # Create permanent storage path in /temp directory
         permanent_dir = os.path.join("temp", "concatenated")
@@ -267,8 +241,9 @@ async def cleanup_temp_files(temp_dir: str, processed_files: List[str], output_p
         
         # Delete processed files but keep the final output
         for file_path in processed_files:
-            if os.path.exists(file_path) and file_path != output_path:
-                os.unlink(file_path)
+            if file_path != output_path:
+                with suppress(FileNotFoundError):
+                    os.unlink(file_path)
                 
         logger.info(f"Cleaned up temporary files in {temp_dir}")
         
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, BackgroundTasks, Query
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, BackgroundTasks, Query, WebSocket, WebSocketDisconnect
 from typing import Optional, List, Dict, Any
 import logging
 import os
@@ -24,10 +24,11 @@ from models import (
     TaskStatus
 )
 from utils.search_helpers import search_pexels_videos, search_pixabay_videos, search_images, download_image
-from utils.text_generation import generate_text
+from utils.text_generation import generate_text, generate_texts
 from utils.image_generation import generate_ai_image, generate_ai_images_batch
 from utils.supabase_storage import supabase_storage
 from utils.supabaseDB import supabase_db
+from utils.job_events import subscribe, unsubscribe
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -40,6 +41,10 @@ MIN_SEGMENT_DURATION = 2.0
 MIN_VIDEO_DURATION = 3.0
 MIN_IMAGE_DURATION = 2.0
 
+# Progress streams re-read the job if no notification arrives for this many
+# seconds, so they keep up even when the LISTEN connection is down
+PROGRESS_POLL_INTERVAL = 5.0
+
 class ScriptProcessRequest(BaseModel):
     file_content: str
     mode: ContentMode
@@ -298,6 +303,81 @@ async def get_task_status(task_id: str):
         error=job.get("error")
     )
 
+@router.websocket("/task/{task_id}/progress")
+async def stream_task_progress(websocket: WebSocket, task_id: str):
+    """
+    Push progress updates for a task instead of having clients poll /task/{task_id}.
+    
+    Sends the current counters on connect, then one message per progress
+    notification until the job completes or fails.
+    
+    Args:
+        websocket: The client connection
+        task_id: The task ID
+    """
+    await websocket.accept()
+    queue = subscribe(task_id)
+    
+    def job_event(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "job_id": job["id"],
+            "total": job.get("segment_count"),
+            "processed": job.get("processed_segment_count"),
+            "video_segments_completed": job.get("video_segments_completed"),
+            "status": job.get("status")
+        }
+        
+    # Watch for the client going away; nothing else reads from the socket
+    receive_task = asyncio.create_task(websocket.receive())
+    
+    try:
+        job = await supabase_db.get_job(task_id)
+        if not job:
+            await websocket.close(code=4404)
+            return
+            
+        event = job_event(job)
+        last_sent = None
+        
+        # Stream until the job reaches a terminal status (3=completed, 4=failed)
+        while True:
+            if event != last_sent:
+                await websocket.send_json(event)
+                last_sent = event
+            if event.get("status") in (3, 4):
+                break
+                
+            get_task = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait(
+                {get_task, receive_task},
+                timeout=PROGRESS_POLL_INTERVAL,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            
+            if get_task in done:
+                event = get_task.result()
+            else:
+                get_task.cancel()
+                
+            if receive_task in done:
+                if receive_task.result().get("type") == "websocket.disconnect":
+                    logger.info(f"Progress stream closed by client for task {task_id}")
+                    return
+                # Ignore anything else the client sends
+                receive_task = asyncio.create_task(websocket.receive())
+            elif not done:
+                # No notification in time; fall back to the current row
+                job = await supabase_db.get_job(task_id) or job
+                event = job_event(job)
+                
+        await websocket.close()
+        
+    except WebSocketDisconnect:
+        logger.info(f"Progress stream closed by client for task {task_id}")
+    finally:
+        receive_task.cancel()
+        unsubscribe(task_id, queue)
+
 async def process_video_content(
     job_id: str,
     file_content: str,
@@ -335,11 +415,11 @@ async def process_video_content(
             speaking_rate=speaking_rate
         )
         
-        # Update job status to completed
-        await supabase_db.update_job_status(job_id, 3)  # Completed
-        
-        # Initialize concatenated video status as pending
-        await supabase_db.update_concatenated_video_status(job_id, 1)  # Pending
+        # Update job status to completed and initialize concatenated video status as pending
+        await asyncio.gather(
+            supabase_db.update_job_status(job_id, 3),  # Completed
+            supabase_db.update_concatenated_video_status(job_id, 1)  # Pending
+        )
         
         return content_results
         
@@ -454,11 +534,11 @@ async def process_ai_image_content(
             speaking_rate=speaking_rate
         )
         
-        # Update job status to completed
-        await supabase_db.update_job_status(job_id, 3)  # Completed
-        
-        # Initialize concatenated video status as pending
-        await supabase_db.update_concatenated_video_status(job_id, 1)  # Pending
+        # Update job status to completed and initialize concatenated video status as pending
+        await asyncio.gather(
+            supabase_db.update_job_status(job_id, 3),  # Completed
+            supabase_db.update_concatenated_video_status(job_id, 1)  # Pending
+        )
         
     except Exception as e:
         logger.error(f"Error processing AI image content job {job_id}: {str(e)}")
@@ -505,10 +585,11 @@ async def process_text_content_for_ai_images_generation(
     # Calculate how many segments we can fit
     total_segments = max(1, int(total_duration_in_seconds / segment_duration_in_seconds))
  
-    # Initialize segment count in the database
-    await supabase_db.update_segment_count(job_id, total_segments)
-    # Initialize processed segment count to 0
-    await supabase_db.update_processed_segment_count(job_id, 0)
+    # Initialize segment count in the database and processed segment count to 0
+    await asyncio.gather(
+        supabase_db.update_segment_count(job_id, total_segments),
+        supabase_db.update_processed_segment_count(job_id, 0)
+    )
     
     # Split script into words for segmentation
     words = [w for w in file_content.split() if w.strip()]
@@ -535,11 +616,8 @@ async def process_text_content_for_ai_images_generation(
             segment_durations.append(segment_duration)
     
     # Generate content queries for each segment
-    content_queries = []
-    
-    # Generate prompts concurrently
-    async def generate_prompt_for_segment(segment, idx):
-        # Generate a search query for this segment
+    prompts = []
+    for segment in segments:
         image_generation_prompt = f"""
             You are an expert in image generation.
             You will be given a segment of text.
@@ -555,19 +633,19 @@ async def process_text_content_for_ai_images_generation(
             Segment:
             "{segment}"
         """
-        
-        query = await generate_text(image_generation_prompt)
-        
-        return {
+        prompts.append(image_generation_prompt)
+    
+    # Generate all prompts in batched requests
+    queries = await generate_texts(prompts)
+    content_queries = [
+        {
             "segment": segment,
             "query": query.strip(),
             "duration": segment_durations[idx],
             "index": idx
         }
-    
-    # Generate all prompts concurrently
-    prompt_tasks = [generate_prompt_for_segment(segment, i) for i, segment in enumerate(segments)]
-    content_queries = await asyncio.gather(*prompt_tasks)
+        for idx, (segment, query) in enumerate(zip(segments, queries))
+    ]
     
     # Sort queries by index to ensure order
     content_queries.sort(key=lambda x: x["index"])
@@ -589,6 +667,7 @@ async def process_text_content_for_ai_images_generation(
     # Process the results and create content sections
     content_sections = []
     processed_count = 0
+    content_batch = supabase_db.content_batcher()
     
     # Process each result
     for idx, (query_data, image_path) in enumerate(zip(content_queries, image_paths)):
@@ -639,7 +718,7 @@ async def process_text_content_for_ai_images_generation(
                 continue
             
             # Create content record in the created_content table
-            await supabase_db.add_content(
+            await content_batch.add(
                 supabase_url=supabase_url,
                 job_id=job_id,
                 content_type="ai_image",
@@ -693,6 +772,9 @@ async def process_text_content_for_ai_images_generation(
             )
             content_sections.append(content_section)
     
+    # Write any buffered content records
+    await content_batch.close()
+    
     # Update processed segment count in the database
     await supabase_db.update_processed_segment_count(job_id, processed_count)
     
@@ -741,13 +823,12 @@ async def process_text_content_for_images_fetching(
         # Calculate how many segments we can fit
         total_segments = max(1, int(total_duration_in_seconds / segment_duration_in_seconds))
     
-        # Initialize segment count in the database
-        await supabase_db.update_segment_count(job_id, total_segments)
-        # Initialize processed segment count to 0
-        await supabase_db.update_processed_segment_count(job_id, 0)
-        
-        # Start processing status
-        await supabase_db.update_job_status(job_id, 2)  # Processing
+        # Initialize segment count in the database, processed segment count to 0 and start processing status
+        await asyncio.gather(
+            supabase_db.update_segment_count(job_id, total_segments),
+            supabase_db.update_processed_segment_count(job_id, 0),
+            supabase_db.update_job_status(job_id, 2)  # Processing
+        )
         
         # Split script into words for segmentation
         words = [w for w in file_content.split() if w.strip()]
@@ -775,6 +856,7 @@ async def process_text_content_for_images_fetching(
         
         # Generate content queries for each segment
         content_queries = []
+        prompts = []
         for i, segment in enumerate(segments):
             # Generate a search query for this segment
             image_generation_prompt = f"""
@@ -793,8 +875,11 @@ async def process_text_content_for_images_fetching(
                 "{segment}"
             """
             
-            query = await generate_text(image_generation_prompt)
-            
+            prompts.append(image_generation_prompt)
+        
+        # Generate all search queries in batched requests
+        queries = await generate_texts(prompts)
+        for i, (segment, query) in enumerate(zip(segments, queries)):
             content_queries.append({
                 "segment": segment,
                 "query": query.strip(),
@@ -805,6 +890,7 @@ async def process_text_content_for_images_fetching(
         # Process content queries to get images
         content_results = []
         processed_count = 0
+        content_batch = supabase_db.content_batcher()
         
         for query_data in content_queries:
             segment = query_data["segment"]
@@ -844,20 +930,19 @@ async def process_text_content_for_images_fetching(
                                 # Upload to Supabase
                                 supabase_url = None
                                 if supabase_storage:
-                                    with open(image_path, "rb") as f:
-                                        supabase_url = await supabase_storage.upload_file(
-                                            file_content=f.read(),
-                                            file_name=image_filename,
-                                            folder="images",
-                                            content_type="image/jpeg"
-                                        )
+                                    supabase_url = await supabase_storage.upload_file(
+                                        file_path=image_path,
+                                        file_name=image_filename,
+                                        folder="images",
+                                        content_type="image/jpeg"
+                                    )
                                 
                                 if not supabase_url:
                                     logger.warning(f"Failed to upload image to Supabase, skipping image")
                                     continue
                                 
                                 # Create content record in the created_content table
-                                await supabase_db.add_content(
+                                await content_batch.add(
                                     supabase_url=supabase_url,
                                     job_id=job_id,
                                     content_type="image",
@@ -877,12 +962,9 @@ async def process_text_content_for_images_fetching(
                                 images = [ImageResult(**image_result_data)]
                                 image_durations = [duration]
                                 
-                                # Increment processed count and update in database
+                                # Increment processed and video segment counts in one database update
                                 processed_count += 1
-                                await supabase_db.update_processed_segment_count(job_id, processed_count)
-                                
-                                # Increment video segments completed count
-                                await supabase_db.increment_video_segments_completed(job_id)
+                                await supabase_db.update_job_progress(job_id, processed_delta=1, video_delta=1)
                                 
                                 logger.info(f"Successfully processed image for segment {index+1}. Processed {processed_count}/{total_segments}")
                                 
@@ -910,6 +992,9 @@ async def process_text_content_for_images_fetching(
             
             content_results.append(content_section)
 
+        # Write any buffered content records
+        await content_batch.close()
+
         # Update job status to completed
         await supabase_db.update_job_status(job_id, 3)  # Completed
         
@@ -960,13 +1045,12 @@ async def process_text_content_for_videos_fetching(
         # Calculate how many segments we can fit
         total_segments = max(1, int(total_duration_in_seconds / segment_duration_in_seconds))
     
-        # Initialize segment count in the database
-        await supabase_db.update_segment_count(job_id, total_segments)
-        # Initialize processed segment count to 0
-        await supabase_db.update_processed_segment_count(job_id, 0)
-        
-        # Start processing status
-        await supabase_db.update_job_status(job_id, 2)  # Processing
+        # Initialize segment count in the database, processed segment count to 0 and start processing status
+        await asyncio.gather(
+            supabase_db.update_segment_count(job_id, total_segments),
+            supabase_db.update_processed_segment_count(job_id, 0),
+            supabase_db.update_job_status(job_id, 2)  # Processing
+        )
         
         # Split script into words for segmentation
         words = [w for w in file_content.split() if w.strip()]
@@ -994,6 +1078,7 @@ async def process_text_content_for_videos_fetching(
         
         # Generate content queries for each segment
         content_queries = []
+        prompts = []
         for i, segment in enumerate(segments):
             # Generate a search query for this segment
             video_generation_prompt = f"""
@@ -1013,8 +1098,11 @@ async def process_text_content_for_videos_fetching(
                 "{segment}"
             """
             
-            query = await generate_text(video_generation_prompt)
-            
+            prompts.append(video_generation_prompt)
+        
+        # Generate all search queries in batched requests
+        queries = await generate_texts(prompts)
+        for i, (segment, query) in enumerate(zip(segments, queries)):
             content_queries.append({
                 "segment": segment,
                 "query": query.strip(),
@@ -1025,6 +1113,7 @@ async def process_text_content_for_videos_fetching(
         # Process content queries to get videos
         content_results = []
         processed_count = 0
+        content_batch = supabase_db.content_batcher()
         
         for query_data in content_queries:
             segment = query_data["segment"]
@@ -1094,13 +1183,12 @@ async def process_text_content_for_videos_fetching(
                                 # Upload to Supabase
                                 supabase_url = None
                                 if supabase_storage and os.path.exists(video_path):
-                                    with open(video_path, "rb") as f:
-                                        supabase_url = await supabase_storage.upload_file(
-                                            file_content=f.read(),
-                                            file_name=video_filename,
-                                            folder="videos",
-                                            content_type="video/mp4"
-                                        )
+                                    supabase_url = await supabase_storage.upload_file(
+                                        file_path=video_path,
+                                        file_name=video_filename,
+                                        folder="videos",
+                                        content_type="video/mp4"
+                                    )
                                 
                                 if not supabase_url:
                                     logger.warning(f"Failed to upload video to Supabase, skipping video")
@@ -1128,7 +1216,7 @@ async def process_text_content_for_videos_fetching(
                                 logger.info(f"Thumbnail URL: {thumbnail_url}")
                                 
                                 # Create content record in the created_content table with thumbnail
-                                await supabase_db.add_content(
+                                await content_batch.add(
                                     supabase_url=supabase_url,
                                     job_id=job_id,
                                     content_type="video",
@@ -1150,12 +1238,9 @@ async def process_text_content_for_videos_fetching(
                                 
                                 videos = [VideoResult(**video_data)]
                                 
-                                # Increment processed count and update in database
+                                # Increment processed and video segment counts in one database update
                                 processed_count += 1
-                                await supabase_db.update_processed_segment_count(job_id, processed_count)
-                                
-                                # Increment video segments completed count
-                                await supabase_db.increment_video_segments_completed(job_id)
+                                await supabase_db.update_job_progress(job_id, processed_delta=1, video_delta=1)
                                 
                                 logger.info(f"Successfully processed video for segment {index+1}. Processed {processed_count}/{total_segments}")
                                 
@@ -1183,11 +1268,14 @@ async def process_text_content_for_videos_fetching(
             
             content_results.append(content_section)
             
-        # Update job status to completed
-        await supabase_db.update_job_status(job_id, 3)  # Completed
-        
-        # Initialize concatenated video status as pending
-        await supabase_db.update_concatenated_video_status(job_id, 1)  # Pending
+        # Write any buffered content records
+        await content_batch.close()
+            
+        # Update job status to completed and initialize concatenated video status as pending
+        await asyncio.gather(
+            supabase_db.update_job_status(job_id, 3),  # Completed
+            supabase_db.update_concatenated_video_status(job_id, 1)  # Pending
+        )
         
         return content_results
         
@@ -1395,13 +1483,12 @@ async def regenerate_video_content(query: str, job_id: str, job_mode: str) -> tu
                 # Upload to Supabase
                 supabase_url = None
                 if supabase_storage and os.path.exists(video_path):
-                    with open(video_path, "rb") as f:
-                        supabase_url = await supabase_storage.upload_file(
-                            file_content=f.read(),
-                            file_name=video_filename,
-                            folder="videos",
-                            content_type="video/mp4"
-                        )
+                    supabase_url = await supabase_storage.upload_file(
+                        file_path=video_path,
+                        file_name=video_filename,
+                        folder="videos",
+                        content_type="video/mp4"
+                    )
                 
                 if not supabase_url:
                     logger.warning(f"Failed to upload regenerated video to Supabase")
@@ -1475,13 +1562,12 @@ async def regenerate_image_content(query: str, job_id: str, job_mode: str) -> tu
             # Upload to Supabase
             supabase_url = None
             if supabase_storage and os.path.exists(image_path):
-                with open(image_path, "rb") as f:
-                    supabase_url = await supabase_storage.upload_file(
-                        file_content=f.read(),
-                        file_name=image_filename,
-                        folder="images",
-                        content_type="image/jpeg"
-                    )
+                supabase_url = await supabase_storage.upload_file(
+                    file_path=image_path,
+                    file_name=image_filename,
+                    folder="images",
+                    content_type="image/jpeg"
+                )
             
             if not supabase_url:
                 logger.warning(f"Failed to upload regenerated image to Supabase")
@@ -1521,18 +1607,18 @@ async def regenerate_ai_image_content(query: str, job_id: str, job_mode: str) ->
             provider=ai_provider,
             width=1536,
             height=1024,
+            use_cache=False
         )
         
         # Upload to Supabase
         supabase_url = None
         if supabase_storage and os.path.exists(ai_image_path):
-            with open(ai_image_path, "rb") as f:
-                supabase_url = await supabase_storage.upload_file(
-                    file_content=f.read(),
-                    file_name=ai_image_filename,
-                    folder="images",
-                    content_type="image/png"
-                )
+            supabase_url = await supabase_storage.upload_file(
+                file_path=ai_image_path,
+                file_name=ai_image_filename,
+                folder="images",
+                content_type="image/png"
+            )
         
         if not supabase_url:
             logger.warning(f"Failed to upload regenerated AI image to Supabase")
@@ -1575,18 +1661,14 @@ async def restart_job(
         if not file_content:
             raise ValueError(f"No script text found in job {job_id}")
         
-        # Update job status to pending
-        await supabase_db.update_job_status(job_id, 1)  # Pending
-        
-        # Reset segment counts
-        await supabase_db.update_segment_count(job_id, 0)
-        await supabase_db.update_processed_segment_count(job_id, 0)
-        
-        # Reset video segments completed
-        await supabase_db.update_video_segments_completed(job_id, 0)
-        
-        # Reset concatenated video status
-        await supabase_db.update_concatenated_video_status(job_id, 0)  # Not started
+        # Update job status to pending and reset segment counts and concatenated video status
+        await asyncio.gather(
+            supabase_db.update_job_status(job_id, 1),  # Pending
+            supabase_db.update_segment_count(job_id, 0),
+            supabase_db.update_processed_segment_count(job_id, 0),
+            supabase_db.update_video_segments_completed(job_id, 0),
+            supabase_db.update_concatenated_video_status(job_id, 0)  # Not started
+        )
         
         # Determine which process to restart based on mode
         if mode == "videos":
@@ -1689,10 +1771,11 @@ async def mark_segments_completed(request: MarkSegmentsCompletedRequest):
         total_segments = len(content_items)
         
         # Mark all video segments as completed by setting count to total segments
-        await supabase_db.update_video_segments_completed(job_id, total_segments)
-        
-        # Initialize concatenated video status as pending
-        await supabase_db.update_concatenated_video_status(job_id, 1)  # Pending
+        # and initialize concatenated video status as pending
+        await asyncio.gather(
+            supabase_db.update_video_segments_completed(job_id, total_segments),
+            supabase_db.update_concatenated_video_status(job_id, 1)  # Pending
+        )
         
         return {
             "success": True,
@@ -1748,10 +1831,11 @@ async def process_mixed_content(
         total_segments = max(1, int(total_duration_in_seconds / segment_duration_in_seconds))
         print(f"Total segments: {total_segments}")
         
-        # Initialize segment count in the database
-        await supabase_db.update_segment_count(job_id, total_segments)
-        # Initialize processed segment count to 0
-        await supabase_db.update_processed_segment_count(job_id, 0)
+        # Initialize segment count in the database and processed segment count to 0
+        await asyncio.gather(
+            supabase_db.update_segment_count(job_id, total_segments),
+            supabase_db.update_processed_segment_count(job_id, 0)
+        )
         
         # Split script into words for segmentation
         words = [w for w in file_content.split() if w.strip()]
@@ -2004,14 +2088,13 @@ async def process_mixed_content(
             "contentSections": [section.dict() for section in content_sections]
         })
         
-        # Mark video segments as completed
-        await supabase_db.update_video_segments_completed(job_id, True)
-        
-        # Update job status to completed
-        await supabase_db.update_job_status(job_id, 3)  # Completed
-        
-        # Initialize concatenated video status as pending
-        await supabase_db.update_concatenated_video_status(job_id, 1)  # Pending
+        # Mark video segments as completed, update job status to completed
+        # and initialize concatenated video status as pending
+        await asyncio.gather(
+            supabase_db.update_video_segments_completed(job_id, True),
+            supabase_db.update_job_status(job_id, 3),  # Completed
+            supabase_db.update_concatenated_video_status(job_id, 1)  # Pending
+        )
         
         return content_sections
         
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
 from typing import List, Dict, Any, Optional
 import logging
+import asyncio
+import msgspec
 from pydantic import ValidationError
 
 from models import (
     RegenerateContentRequest,
     RegenerateContentResponse,
-    VideoResult,
-    ImageResult,
+    RegenerateContentResponseMS,
+    VideoResultMS,
+    ImageResultMS,
     VideoProvider,
     ContentMode
 )
@@ -18,6 +22,9 @@ from utils.image_generation import generate_ai_image
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Maximum number of sections regenerated at once by the batch route
+BATCH_CONCURRENCY = 8
+
 # Function to search videos based on provider
 async def search_videos(query: str, provider: VideoProvider) -> Dict[str, Any]:
     """Search for videos based on provider."""
@@ -34,177 +41,181 @@ async def search_videos(query: str, provider: VideoProvider) -> Dict[str, Any]:
         # Default to pexels
         return await search_pexels_videos(query)
 
-@router.post("/")
-async def regenerate_content(request: Request):
+async def _regenerate_impl(body: RegenerateContentRequest) -> RegenerateContentResponseMS:
     """
-    Regenerate content for a specific section.
+    Regenerate content for a single section.
+    
+    Shared by the single and batch regenerate routes.
     
     Args:
-        request: The HTTP request
+        body: The regenerate content request
         
     Returns:
-        RegenerateContentResponse with regenerated content
+        RegenerateContentResponseMS with regenerated content
     """
-    try:
-        # Parse request body
-        body = await request.json()
+    # Extract parameters
+    section_index = body.sectionIndex
+    custom_query = body.customQuery
+    mode = body.mode
+    provider = body.provider
+    theme = body.theme or ""
+    generate_new_query = body.generateNewQuery
+    generate_ai_images = body.generateAiImages
         
-        # Extract parameters
-        section_index = body.get("sectionIndex")
-        custom_query = body.get("customQuery")
-        mode = body.get("mode")
-        provider = body.get("provider", "pexels")
-        theme = body.get("theme", "")
-        generate_new_query = body.get("generateNewQuery", False)
-        generate_ai_images = body.get("generateAiImages", False)
+    # Initialize search query
+    search_query = custom_query
+    
+    # Generate new query based on custom input if requested
+    if generate_new_query and custom_query:
+        segment = custom_query.strip()
         
-        # Validate required fields
-        if section_index is None or not isinstance(section_index, int):
-            raise HTTPException(status_code=400, detail="Invalid section index")
-            
-        if not mode or mode not in ["images", "videos", "mixed"]:
-            raise HTTPException(status_code=400, detail="Invalid mode")
-            
-        if not provider or provider not in ["pexels", "pixabay", "minimax", "google", "openai-gpt-image"]:
-            raise HTTPException(status_code=400, detail="Invalid provider")
-            
-        # Initialize search query
-        search_query = custom_query
+        # Prepare the theme context
+        theme_context = f'This script is about: "{theme}". ' if theme else ""
         
-        # Generate new query based on custom input if requested
-        if generate_new_query and custom_query and isinstance(custom_query, str):
-            segment = custom_query.strip()
-            
-            # Prepare the theme context
-            theme_context = f'This script is about: "{theme}". ' if theme else ""
-            
-            # Generate a new search query
-            query_prompt = f"""
-                {theme_context}Create a short, specific search query for finding {'an image' if mode == 'images' else 'a video'} that matches this text (4 words max).
-                The text might be a question, a reference to a scene name, a meme or similar, you have to provide a query
-                that refers to general known objects.
+        # Generate a new search query
+        query_prompt = f"""
+            {theme_context}Create a short, specific search query for finding {'an image' if mode == 'images' else 'a video'} that matches this text (4 words max).
+            The text might be a question, a reference to a scene name, a meme or similar, you have to provide a query
+            that refers to general known objects.
 
-                Text:
-                "{segment}"
-                
-                {f'Remember, the overall theme is: "{theme}".' if theme else ""}
-                
-                The query will be used to search for {'images on a stock photo site' if mode == 'images' else 'stock videos'}.
-                Return ONLY the search query, no explanations or quotes.
-                Make it descriptive of the visual scene, not just repeating the words.
-            """
+            Text:
+            "{segment}"
             
-            search_query = await generate_text(query_prompt)
-            search_query = search_query.strip()
+            {f'Remember, the overall theme is: "{theme}".' if theme else ""}
             
-        elif isinstance(custom_query, str):
-            # Sanitize the custom query
-            search_query = custom_query.strip()[:100]
-        else:
-            raise HTTPException(status_code=400, detail="Invalid custom query")
-            
-        logger.info(f"Regenerating content for section {section_index} with query: '{search_query}'")
+            The query will be used to search for {'images on a stock photo site' if mode == 'images' else 'stock videos'}.
+            Return ONLY the search query, no explanations or quotes.
+            Make it descriptive of the visual scene, not just repeating the words.
+        """
+        
+        search_query = await generate_text(query_prompt)
+        search_query = search_query.strip()
         
-        # Generate content based on the selected mode
-        videos = []
-        images = []
-        ai_image = None
+    else:
+        # Sanitize the custom query
+        search_query = custom_query.strip()[:100]
         
-        # Get videos if needed
-        if mode in ["videos", "mixed"]:
-            video_response = await search_videos(search_query, provider)
-            videos = [VideoResult(**v) for v in video_response["videos"]]
+    logger.info(f"Regenerating content for section {section_index} with query: '{search_query}'")
+    
+    # Generate content based on the selected mode
+    videos = []
+    images = []
+    ai_image = None
+    
+    # Get videos if needed
+    if mode in ["videos", "mixed"]:
+        video_response = await search_videos(search_query, provider)
+        videos = [msgspec.convert(v, VideoResultMS) for v in video_response["videos"]]
+        
+    # Get images if needed and not using AI images
+    if mode in ["images", "mixed"] and not generate_ai_images:
+        # For image search, we might use a different provider
+        # Google provider for images is specifically for AI-generated images
+        actual_provider = provider
+        if provider == "google":
+            generate_ai_images = True
+        elif provider == "minimax":
+            generate_ai_images = True
+        else:
+            image_response = await search_images(search_query, provider=provider)
+            images = [msgspec.convert(img, ImageResultMS) for img in image_response]
+        
+    # Generate an AI image if requested or if provider is google or minimax
+    if generate_ai_images and mode in ["images", "mixed"]:
+        try:
+            # Create AI image prompt
+            ai_prompt = ""
+            if theme:
+                ai_prompt += f"Theme: {theme}. "
+            ai_prompt += f'Create a visual representation of: "{custom_query}". '
+            ai_prompt += f"Focus on: {search_query}."
+            
+            logger.info(f"Generating AI image for custom query: {custom_query[:50]}...")
+            
+            # Use appropriate provider for AI generation
+            ai_provider = "openai"
+            ai_model = "dall-e-3"  # Default model
             
-        # Get images if needed and not using AI images
-        if mode in ["images", "mixed"] and not generate_ai_images:
-            # For image search, we might use a different provider
-            # Google provider for images is specifically for AI-generated images
-            actual_provider = provider
             if provider == "google":
-                generate_ai_images = True
+                ai_provider = "google"
             elif provider == "minimax":
-                generate_ai_images = True
-            else:
-                image_response = await search_images(search_query, provider=provider)
-                images = [ImageResult(**img) for img in image_response]
-            
-        # Generate an AI image if requested or if provider is google or minimax
-        if generate_ai_images and mode in ["images", "mixed"]:
-            try:
-                # Create AI image prompt
-                ai_prompt = ""
-                if theme:
-                    ai_prompt += f"Theme: {theme}. "
-                ai_prompt += f'Create a visual representation of: "{custom_query}". '
-                ai_prompt += f"Focus on: {search_query}."
-                
-                logger.info(f"Generating AI image for custom query: {custom_query[:50]}...")
-                
-                # Use appropriate provider for AI generation
+                ai_provider = "minimax"
+            elif provider == "openai-gpt-image":
                 ai_provider = "openai"
-                ai_model = "dall-e-3"  # Default model
-                
-                if provider == "google":
-                    ai_provider = "google"
-                elif provider == "minimax":
-                    ai_provider = "minimax"
-                elif provider == "openai-gpt-image":
-                    ai_provider = "openai"
-                    ai_model = "gpt-image-1"
-                
-                # Generate AI image
-                ai_image_path = await generate_ai_image(
-                    prompt=ai_prompt,
-                    provider=ai_provider,
-                    width=1536,
-                    height=1024,
-                    model=ai_model
-                )
-                
-                # Extract the filename from the path
-                import os
-                ai_image_filename = os.path.basename(ai_image_path)
-                
-                # Create AI image result
-                ai_image_result = {
-                    "url": f"/images/{ai_image_filename}",
-                    "width": 1024,
-                    "height": 1024,
-                    "thumbnail": f"/images/{ai_image_filename}",
-                    "isAiGenerated": True
-                }
-                
-                ai_image = ai_image_result
-                images = [ImageResult(**ai_image_result)]
-                
-                logger.info("Successfully generated AI image for custom query")
-                
-            except Exception as e:
-                logger.error(f"Failed to generate AI image: {str(e)}")
-                
-                # Fall back to regular image search
-                if mode in ["images", "mixed"]:
-                    try:
-                        logger.info(f"Falling back to regular image search for query: {search_query}")
-                        image_response = await search_images(search_query)
-                        images = [ImageResult(**img) for img in image_response]
-                    except Exception as img_error:
-                        logger.error(f"Failed to fall back to image search: {str(img_error)}")
-                        images = []
-                        
-        # Create response
-        response = RegenerateContentResponse(
-            success=True,
-            sectionIndex=section_index,
-            query=search_query,
-            videos=videos,
-            images=images,
-            aiImage=ai_image
-        )
+                ai_model = "gpt-image-1"
+            
+            # Generate AI image
+            ai_image_path = await generate_ai_image(
+                prompt=ai_prompt,
+                provider=ai_provider,
+                width=1536,
+                height=1024,
+                model=ai_model,
+                use_cache=False
+            )
+            
+            # Extract the filename from the path
+            import os
+            ai_image_filename = os.path.basename(ai_image_path)
+            
+            # Create AI image result
+            ai_image_result = {
+                "url": f"/images/{ai_image_filename}",
+                "width": 1024,
+                "height": 1024,
+                "thumbnail": f"/images/{ai_image_filename}",
+                "isAiGenerated": True
+            }
+            
+            ai_image = ai_image_result
+            images = [msgspec.convert(ai_image_result, ImageResultMS)]
+            
+            logger.info("Successfully generated AI image for custom query")
+            
+        except Exception as e:
+            logger.error(f"Failed to generate AI image: {str(e)}")
+            
+            # Fall back to regular image search
+            if mode in ["images", "mixed"]:
+                try:
+                    logger.info(f"Falling back to regular image search for query: {search_query}")
+                    image_response = await search_images(search_query)
+                    images = [msgspec.convert(img, ImageResultMS) for img in image_response]
+                except Exception as img_error:
+                    logger.error(f"Failed to fall back to image search: {str(img_error)}")
+                    images = []
+                    
+    # Create response
+    response = RegenerateContentResponseMS(
+        success=True,
+        sectionIndex=section_index,
+        query=search_query,
+        videos=videos,
+        images=images,
+        aiImage=ai_image
+    )
+    
+    return response
+
+@router.post("/", response_model=RegenerateContentResponse)
+async def regenerate_content(body: RegenerateContentRequest):
+    """
+    Regenerate content for a specific section.
+    
+    The request body is validated by the RegenerateContentRequest model, so
+    invalid modes or providers are rejected with a 422 before reaching here.
+    
+    Args:
+        body: The regenerate content request
         
-        return response
+    Returns:
+        RegenerateContentResponse with regenerated content
+    """
+    try:
+        response = await _regenerate_impl(body)
+        return Response(content=msgspec.json.encode(response), media_type="application/json")
         
-    except ValidationError as ve:
+    except (ValidationError, msgspec.ValidationError) as ve:
         logger.error(f"Validation error regenerating content: {str(ve)}")
         raise HTTPException(status_code=422, detail=str(ve))
     except HTTPException:
@@ -217,4 +228,43 @@ async def regenerate_content(request: Request):
                 "error": "Failed to regenerate content",
                 "details": str(e)
             }
-        ) 
\ No newline at end of file
+        )
+
+@router.post("/batch")
+async def regenerate_content_batch(bodies: List[RegenerateContentRequest]):
+    """
+    Regenerate content for multiple sections concurrently.
+    
+    Sections are dispatched through asyncio.gather, bounded by
+    BATCH_CONCURRENCY so provider concurrency limits are respected.
+    A failing section does not fail the whole batch.
+    
+    Args:
+        bodies: List of regenerate content requests
+        
+    Returns:
+        List with a RegenerateContentResponse or an error entry per section
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def _one(body: RegenerateContentRequest) -> RegenerateContentResponseMS:
+        async with semaphore:
+            return await _regenerate_impl(body)
+    
+    logger.info(f"Regenerating content for {len(bodies)} sections in batch")
+    results = await asyncio.gather(*(_one(body) for body in bodies), return_exceptions=True)
+    
+    responses = []
+    for body, result in zip(bodies, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error regenerating content for section {body.sectionIndex}: {str(result)}")
+            responses.append({
+                "success": False,
+                "sectionIndex": body.sectionIndex,
+                "error": "Failed to regenerate content",
+                "details": str(result)
+            })
+        else:
+            responses.append(result)
+    
+    return Response(content=msgspec.json.encode(responses), media_type="application/json")
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException, Path, Depends
-from fastapi.responses import StreamingResponse, RedirectResponse
+from fastapi import APIRouter, HTTPException, Path, Depends, Request
+from fastapi.responses import StreamingResponse, RedirectResponse, Response
 import os
 from typing import BinaryIO
 import logging
 import stat
 import requests
+import asyncio
+import aiofiles
+import aiofiles.os
+from email.utils import formatdate, parsedate_to_datetime
 from urllib.parse import urlparse
 from utils.supabase_storage import supabase_storage
 
@@ -13,12 +17,86 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+class SendfileResponse(StreamingResponse):
+    """
+    Stream a local file, using zero-copy sendfile when the server supports it.
+    
+    If the ASGI server advertises the "http.response.zerocopysend" extension,
+    the open file is handed to the server so the body is sent with sendfile(2)
+    without passing through Python. Otherwise the file is streamed in chunks
+    with aiofiles.
+    """
+    
+    def __init__(self, path: str, chunk_size: int = 1024 * 1024, **kwargs):
+        self.path = path
+        self.chunk_size = chunk_size
+        super().__init__(self._iterfile(), **kwargs)
+    
+    async def _iterfile(self):
+        async with aiofiles.open(self.path, 'rb') as f:
+            while chunk := await f.read(self.chunk_size):
+                yield chunk
+    
+    async def __call__(self, scope, receive, send):
+        if "http.response.zerocopysend" not in scope.get("extensions", {}):
+            await super().__call__(scope, receive, send)
+            return
+        
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        
+        f = await asyncio.to_thread(open, self.path, 'rb')
+        try:
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": f,
+                "more_body": False,
+            })
+        finally:
+            f.close()
+
+
+def _is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """
+    Check the request's conditional headers against the file validators.
+    
+    If-None-Match takes precedence over If-Modified-Since (RFC 7232).
+    
+    Args:
+        request: The HTTP request
+        etag: The current ETag of the file
+        mtime: The file modification time
+        
+    Returns:
+        True if the client's cached copy is still valid
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= int(parsedate_to_datetime(if_modified_since).timestamp())
+        except (TypeError, ValueError):
+            return False
+    
+    return False
+
+
 @router.get("/{session_id}/{filename}")
-async def get_video(session_id: str = Path(...), filename: str = Path(...)):
+async def get_video(request: Request, session_id: str = Path(...), filename: str = Path(...)):
     """
     Stream a video file from Supabase storage or local temp directory.
     
+    Local files are served with ETag/Last-Modified validators so repeat
+    requests from video players can be answered with 304 Not Modified.
+    
     Args:
+        request: The HTTP request (used for conditional headers)
         session_id: The session ID
         filename: The filename
         storage: Supabase storage instance
@@ -41,30 +119,40 @@ async def get_video(session_id: str = Path(...), filename: str = Path(...)):
         # Fallback to local file if Supabase fails
         local_file_path = os.path.join("temp", session_id, filename)
         
-        if not os.path.exists(local_file_path):
+        # A single non-blocking stat gives us existence, permissions and size
+        try:
+            file_stats = await aiofiles.os.stat(local_file_path)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="File not found in Supabase or local storage")
 
-        # Check file permissions
-        if not os.access(local_file_path, os.R_OK):
+        # Check file permissions (approximate: any read bit set)
+        if not file_stats.st_mode & (stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH):
             raise HTTPException(status_code=403, detail="Permission denied")
             
         # Get file size
-        file_stats = os.stat(local_file_path)
         file_size = file_stats.st_size
         
-        # Define a generator function to stream the file
-        def iterfile(file_path: str, chunk_size: int = 1024 * 1024):
-            with open(file_path, 'rb') as f:
-                while chunk := f.read(chunk_size):
-                    yield chunk
+        # Build cache validators from inode, size and mtime
+        etag = f'W/"{file_stats.st_ino:x}-{file_stats.st_size:x}-{int(file_stats.st_mtime):x}"'
+        last_modified = formatdate(file_stats.st_mtime, usegmt=True)
+        cache_headers = {
+            "ETag": etag,
+            "Last-Modified": last_modified,
+            "Cache-Control": "public, max-age=3600"
+        }
+        
+        # Answer conditional requests without touching the file body
+        if _is_not_modified(request, etag, file_stats.st_mtime):
+            return Response(status_code=304, headers=cache_headers)
         
-        # Create a streaming response
-        return StreamingResponse(
-            iterfile(local_file_path),
+        # Create a streaming response (zero-copy when the server supports it)
+        return SendfileResponse(
+            local_file_path,
             media_type="video/mp4",
             headers={
                 "Content-Length": str(file_size),
-                "Accept-Ranges": "bytes"
+                "Accept-Ranges": "bytes",
+                **cache_headers
             }
         )
         
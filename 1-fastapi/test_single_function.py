@@ -38,6 +38,11 @@ async def mock_generate_text(prompt):
     logger.info(f"Mock: Generating text for prompt: {prompt[:50]}...")
     return "sample descriptive prompt"
 
+# Mock generate_texts function
+async def mock_generate_texts(prompts):
+    """Mock function for batched text generation API calls."""
+    return [await mock_generate_text(prompt) for prompt in prompts]
+
 # Mock generate_ai_image function
 async def mock_generate_ai_image(prompt, provider, width, height):
     """Mock function for AI image generation."""
@@ -68,6 +73,7 @@ async def test_process_text_content_for_ai_images_generation():
         
         # Patch the dependencies
         with patch('routes.process_script.generate_text', mock_generate_text), \
+             patch('routes.process_script.generate_texts', mock_generate_texts), \
              patch('routes.process_script.generate_ai_image', mock_generate_ai_image), \
              patch('routes.process_script.supabase_storage', MockSupabaseStorage()):
             
@@ -0,0 +1,98 @@
+import os
+import json
+import logging
+from typing import Optional, Any, List
+
+import redis.asyncio as redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Redis connection string; caching is disabled when not set
+REDIS_URL = os.getenv("REDIS_URL")
+
+# TTLs in seconds
+JOB_CACHE_TTL = 30
+COUNTER_CACHE_TTL = 5
+
+# Shared Redis client, created lazily on first use
+_client: Optional[redis.Redis] = None
+
+def _get_client() -> Optional[redis.Redis]:
+    global _client
+    if _client is None and REDIS_URL:
+        _client = redis.from_url(REDIS_URL)
+    return _client
+
+def job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+def processed_count_key(job_id: str) -> str:
+    return f"job:{job_id}:processed_count"
+
+def video_segments_completed_key(job_id: str) -> str:
+    return f"job:{job_id}:video_segments_completed"
+
+def job_cache_keys(job_id: str) -> List[str]:
+    """
+    All cache keys derived from a job row.
+    """
+    return [job_key(job_id), processed_count_key(job_id), video_segments_completed_key(job_id)]
+
+async def cache_get(key: str) -> Optional[Any]:
+    """
+    Get a cached value.
+
+    Args:
+        key: The cache key
+
+    Returns:
+        The decoded value, or None on a miss or Redis error
+    """
+    client = _get_client()
+    if client is None:
+        return None
+
+    try:
+        value = await client.get(key)
+        return json.loads(value) if value is not None else None
+    except Exception as e:
+        logger.warning(f"Cache read failed for {key}: {str(e)}")
+        return None
+
+async def cache_set(key: str, value: Any, ttl: int) -> None:
+    """
+    Cache a JSON-serializable value for ttl seconds. Errors are logged and ignored.
+    """
+    client = _get_client()
+    if client is None:
+        return
+
+    try:
+        await client.setex(key, ttl, json.dumps(value, default=str))
+    except Exception as e:
+        logger.warning(f"Cache write failed for {key}: {str(e)}")
+
+async def cache_delete(*keys: str) -> None:
+    """
+    Invalidate cache keys. Errors are logged and ignored.
+    """
+    client = _get_client()
+    if client is None or not keys:
+        return
+
+    try:
+        await client.delete(*keys)
+    except Exception as e:
+        logger.warning(f"Cache invalidation failed for {keys}: {str(e)}")
+
+async def close_cache() -> None:
+    """
+    Close the shared Redis client. Called on application shutdown.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,136 @@
+import os
+import json
+import uuid
+import asyncio
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional, Dict, Any, List, Iterable
+from urllib.parse import urlparse
+
+import asyncpg
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Direct Postgres connection string (Supavisor session pooler)
+SUPABASE_DB_URL = os.getenv("SUPABASE_DB_URL")
+
+# Pool sizing
+DB_POOL_MIN_SIZE = 10
+DB_POOL_MAX_SIZE = 50
+
+# Supavisor's transaction-mode port; prepared statements only survive on session-mode connections
+TRANSACTION_POOLER_PORT = 6543
+STATEMENT_CACHE_SIZE = 100
+
+# Shared connection pool, created lazily on first use
+_pool: Optional[asyncpg.Pool] = None
+_pool_lock = asyncio.Lock()
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """
+    Decode json/jsonb columns into Python objects like PostgREST does.
+    """
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema="pg_catalog"
+        )
+
+def is_transaction_pooler(dsn: Optional[str]) -> bool:
+    """
+    Whether a DSN points at Supavisor's transaction-mode pooler, which drops
+    session state such as prepared statements and LISTEN registrations.
+    """
+    if not dsn:
+        return False
+    try:
+        return urlparse(dsn).port == TRANSACTION_POOLER_PORT
+    except ValueError:
+        return False
+
+def _statement_cache_size(dsn: str) -> int:
+    """
+    Size of asyncpg's per-connection prepared statement cache for this DSN.
+
+    Session-mode connections keep the cache so repeated queries skip
+    parse/plan; the transaction pooler can't hold prepared statements.
+    """
+    return 0 if is_transaction_pooler(dsn) else STATEMENT_CACHE_SIZE
+
+async def get_pool() -> asyncpg.Pool:
+    """
+    Get the shared asyncpg pool, creating it on first use.
+
+    Returns:
+        The shared connection pool
+    """
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                if not SUPABASE_DB_URL:
+                    raise ValueError("SUPABASE_DB_URL not found in environment variables")
+
+                statement_cache_size = _statement_cache_size(SUPABASE_DB_URL)
+                logger.info(f"Creating database pool (min={DB_POOL_MIN_SIZE}, max={DB_POOL_MAX_SIZE}, statement cache={statement_cache_size})")
+                _pool = await asyncpg.create_pool(
+                    dsn=SUPABASE_DB_URL,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    max_inactive_connection_lifetime=300,
+                    command_timeout=60,
+                    statement_cache_size=statement_cache_size,
+                    init=_init_connection
+                )
+    return _pool
+
+async def close_pool() -> None:
+    """
+    Close the shared pool. Called on application shutdown.
+    """
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+def _to_json_value(value: Any) -> Any:
+    # Match the JSON types PostgREST returns
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def record_to_dict(record: Optional[asyncpg.Record]) -> Optional[Dict[str, Any]]:
+    """
+    Convert an asyncpg record into a plain dict.
+
+    Args:
+        record: The record, or None
+
+    Returns:
+        Dict of column values, or None if no record was given
+    """
+    if record is None:
+        return None
+    return {key: _to_json_value(value) for key, value in record.items()}
+
+def records_to_list(records: Iterable[asyncpg.Record]) -> List[Dict[str, Any]]:
+    """
+    Convert a list of asyncpg records into plain dicts.
+
+    Args:
+        records: The records
+
+    Returns:
+        List of dicts
+    """
+    return [record_to_dict(record) for record in records]
@@ -1,17 +1,17 @@
 import os
-import requests
-from typing import Optional, Literal, Dict, Any, List, Tuple
+import hashlib
+import shutil
+from typing import Optional, Literal, Dict, Any, List, Tuple, Callable, Awaitable
 import time
+import random
 import logging
 import asyncio
-from io import BytesIO
-from openai import OpenAI, AsyncOpenAI
-import os
-import base64
-from PIL import Image as PILImage
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError
+import binascii
 from dotenv import load_dotenv
-import json
+import orjson
 import aiohttp
+import aiofiles
 
 load_dotenv()
 
@@ -27,60 +27,546 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 MINIMAX_API_KEY = os.getenv("MINIMAX_API_KEY")
 
+# Shared HTTP clients, created lazily on first use and reused across requests
+_session: Optional[aiohttp.ClientSession] = None
+_session_lock = asyncio.Lock()
+_openai_client: Optional[AsyncOpenAI] = None
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Get the shared aiohttp session, creating it on first use.
+    
+    Returns:
+        The module-wide aiohttp.ClientSession
+    """
+    global _session
+    if _session is None or _session.closed:
+        async with _session_lock:
+            if _session is None or _session.closed:
+                connector = aiohttp.TCPConnector(limit=64, limit_per_host=16, ttl_dns_cache=300)
+                _session = aiohttp.ClientSession(connector=connector)
+    return _session
+
+def _get_openai() -> AsyncOpenAI:
+    """
+    Get the shared AsyncOpenAI client, creating it on first use.
+    
+    Returns:
+        The module-wide AsyncOpenAI client
+    """
+    global _openai_client
+    if _openai_client is None:
+        # Retries are handled by _with_retries, so disable the SDK's own retry loop
+        _openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=0, timeout=60.0)
+    return _openai_client
+
+# Bound on concurrent image downloads for URL-returning providers (DALL-E 3, Minimax)
+DOWNLOAD_CONCURRENCY = 16
+_download_semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+async def _download_image(image_url: str, output_path: str, label: str = "image") -> None:
+    """
+    Download a generated image to disk through the shared session.
+    
+    Runs as a separate stage after generation so the provider connection is
+    released before the download starts, letting other generations proceed.
+    
+    Args:
+        image_url: URL returned by the provider
+        output_path: Destination path for the image
+        label: Provider name used in error messages
+    """
+    async with _download_semaphore:
+        session = await get_session()
+        async with session.get(image_url) as response:
+            if response.status != 200:
+                raise Exception(f"Failed to download {label}: {response.status}")
+            # Stream to disk in chunks rather than buffering the whole image
+            async with aiofiles.open(output_path, 'wb') as f:
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+
+# On-disk cache of generated images, stored under <output_dir>/.cache
+IMAGE_CACHE_DIRNAME = ".cache"
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+def _cache_key(provider: str, model: str, prompt: str, width: int, height: int) -> str:
+    """
+    Build the cache key for a generation request.
+    """
+    return hashlib.sha256(f"{provider}|{model}|{prompt}|{width}x{height}".encode()).hexdigest()
+
+def _cache_path(output_dir: str, key: str) -> str:
+    """
+    Get the cache file path for a key.
+    """
+    return os.path.join(output_dir, IMAGE_CACHE_DIRNAME, f"{key}.png")
+
+def _materialize(source_path: str, output_path: str) -> None:
+    """
+    Make output_path hold the same image as source_path.
+    
+    Uses a hardlink so duplicates share one inode and page cache, falling
+    back to a copy when the paths are on different filesystems.
+    """
+    if os.path.lexists(output_path):
+        os.remove(output_path)
+    try:
+        os.link(source_path, output_path)
+    except OSError:
+        shutil.copy(source_path, output_path)
+
+def _store_in_cache(output_path: str, cache_path: str) -> None:
+    """
+    Link a generated image into the cache and evict old entries.
+    """
+    cache_dir = os.path.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    
+    # Copy to a temp file first so readers never see a partial image
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    _materialize(output_path, tmp_path)
+    os.replace(tmp_path, cache_path)
+    
+    _evict_cache(cache_dir)
+
+def _evict_cache(cache_dir: str) -> None:
+    """
+    Remove least recently used cache entries until the cache fits IMAGE_CACHE_MAX_BYTES.
+    """
+    entries = []
+    total_size = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(".png"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+    
+    if total_size <= IMAGE_CACHE_MAX_BYTES:
+        return
+    
+    # Oldest first; cache hits refresh mtime
+    entries.sort()
+    for _, size, path in entries:
+        if total_size <= IMAGE_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            total_size -= size
+        except OSError:
+            pass
+
+def _load_from_cache(cache_path: str, output_path: str) -> bool:
+    """
+    Link or copy a cached image to output_path if present.
+    
+    Returns:
+        True on a cache hit
+    """
+    if not os.path.exists(cache_path):
+        return False
+    try:
+        _materialize(cache_path, output_path)
+        # Refresh mtime so LRU eviction keeps recently used entries
+        os.utime(cache_path)
+    except FileNotFoundError:
+        # Evicted between the existence check and the copy
+        return False
+    return True
+
+# Generations currently in progress, keyed by cache path, so duplicates can await the first one
+_inflight: Dict[str, asyncio.Future] = {}
+
+async def close_clients() -> None:
+    """
+    Close the shared HTTP clients. Called on application shutdown.
+    """
+    global _session, _openai_client
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    if _openai_client is not None:
+        await _openai_client.close()
+    _openai_client = None
+
 # Rate limiting settings (to avoid overwhelming the API)
 RATE_LIMIT_CALLS = 5       # Number of calls allowed
 RATE_LIMIT_PERIOD = 60     # In seconds (1 minute)
 
 # Provider-specific rate limiting settings
+# Each provider uses a weighted sliding-window counter: "calls" requests per "period" seconds,
+# tracked as the counts for the current and previous windows
 provider_rate_limits: Dict[str, Dict[str, Any]] = {
     "openai": {
         "calls": 5,
         "period": 60,
-        "timestamps": [],
+        "prev": 0,
+        "curr": 0,
+        "window_start": time.monotonic(),
         "lock": asyncio.Lock()
     },
     "google": {
         "calls": 5,
         "period": 60,
-        "timestamps": [],
+        "prev": 0,
+        "curr": 0,
+        "window_start": time.monotonic(),
         "lock": asyncio.Lock()
     },
     "minimax": {
         "calls": float('inf'),  # Unlimited
         "period": 60,
-        "timestamps": [],
+        "prev": 0,
+        "curr": 0,
+        "window_start": time.monotonic(),
         "lock": asyncio.Lock()
     }
 }
 
+# Caps on concurrent in-flight generations per provider
+_provider_semaphores: Dict[str, asyncio.Semaphore] = {
+    "minimax": asyncio.Semaphore(32),
+    "openai": asyncio.Semaphore(8),
+    "google": asyncio.Semaphore(8),
+}
+
 async def check_rate_limit(provider: AIImageProvider) -> None:
-    """Check rate limit for the specified provider and wait if necessary."""
+    """
+    Acquire a rate limit slot for the specified provider, waiting if necessary.
+    
+    A request is admitted when prev * (1 - elapsed / period) + curr < calls,
+    which smooths admissions across window boundaries instead of releasing
+    a full burst every period. The provider lock is only held while updating
+    the counters; waiting happens outside the lock.
+    """
+    limits = provider_rate_limits[provider]
+    
     # Skip rate limiting for providers with unlimited calls
-    if provider_rate_limits[provider]["calls"] == float('inf'):
+    if limits["calls"] == float('inf'):
         return
     
-    async with provider_rate_limits[provider]["lock"]:
-        current_time = time.time()
-        timestamps = provider_rate_limits[provider]["timestamps"]
-        
-        # Remove timestamps older than the rate limit period
-        provider_rate_limits[provider]["timestamps"] = [
-            ts for ts in timestamps if current_time - ts < provider_rate_limits[provider]["period"]
-        ]
+    capacity = limits["calls"]
+    period = limits["period"]
+    
+    while True:
+        async with limits["lock"]:
+            now = time.monotonic()
+            
+            # Roll the windows forward if one or more periods have passed
+            windows_passed = int((now - limits["window_start"]) // period)
+            if windows_passed > 0:
+                limits["prev"] = limits["curr"] if windows_passed == 1 else 0
+                limits["curr"] = 0
+                limits["window_start"] += windows_passed * period
+            
+            elapsed = now - limits["window_start"]
+            weight = 1 - elapsed / period
+            
+            if limits["prev"] * weight + limits["curr"] < capacity:
+                limits["curr"] += 1
+                return
+            
+            # Minimum time until the weighted count drops below capacity
+            if limits["curr"] >= capacity or limits["prev"] == 0:
+                wait_time = period - elapsed
+            else:
+                wait_time = period * (1 - (capacity - limits["curr"]) / limits["prev"]) - elapsed
+            wait_time = max(wait_time, 0.01)
         
-        # Check if we've hit the rate limit
-        if len(provider_rate_limits[provider]["timestamps"]) >= provider_rate_limits[provider]["calls"]:
-            wait_time = provider_rate_limits[provider]["period"] - (current_time - provider_rate_limits[provider]["timestamps"][0])
-            logger.info(f"Rate limit reached for {provider}. Waiting {wait_time:.2f} seconds...")
-            await asyncio.sleep(wait_time)
-            # Refresh the timestamp list after waiting
-            current_time = time.time()
-            provider_rate_limits[provider]["timestamps"] = [
-                ts for ts in timestamps if current_time - ts < provider_rate_limits[provider]["period"]
+        logger.info(f"Rate limit reached for {provider}. Waiting {wait_time:.2f} seconds...")
+        await asyncio.sleep(wait_time)
+
+# Retry settings for transient provider errors (429 and 5xx)
+MAX_RETRIES = 5
+MAX_RETRY_DELAY = 60
+
+class ProviderHTTPError(Exception):
+    """
+    Non-200 response from an image provider's generate endpoint.
+    """
+    def __init__(self, message: str, status: int, retry_after: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+def _is_retryable_status(status: int) -> bool:
+    return status == 429 or status >= 500
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds; HTTP-date values are ignored.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    Get how long to wait before retrying after an error.
+    
+    Returns:
+        The delay in seconds, or None if the error should not be retried
+    """
+    retry_after = None
+    if isinstance(error, ProviderHTTPError):
+        if not _is_retryable_status(error.status):
+            return None
+        retry_after = error.retry_after
+    elif isinstance(error, APIStatusError):
+        if not _is_retryable_status(error.status_code):
+            return None
+        retry_after = error.response.headers.get("retry-after")
+    elif not isinstance(error, APIConnectionError):
+        return None
+    
+    delay = _parse_retry_after(retry_after)
+    if delay is None:
+        delay = min(MAX_RETRY_DELAY, 2 ** attempt) + random.random() * 0.5
+    return min(delay, MAX_RETRY_DELAY)
+
+async def _with_retries(fn: Callable[[], Awaitable[Any]], *, retries: int = MAX_RETRIES) -> Any:
+    """
+    Call fn, retrying on 429/5xx and connection errors with exponential backoff and jitter.
+    
+    Args:
+        fn: Zero-argument coroutine function to call
+        retries: Maximum number of retries after the first attempt
+    
+    Returns:
+        The result of fn
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await fn()
+        except Exception as e:
+            delay = _retry_delay(e, attempt)
+            if delay is None or attempt == retries:
+                raise
+            logger.warning(f"Transient error from image provider ({str(e)}). Retrying in {delay:.2f} seconds ({attempt + 1}/{retries})...")
+            await asyncio.sleep(delay)
+
+# Sizes supported by DALL-E 3, keyed by (width, height)
+_DALLE_SIZES: Dict[Tuple[int, int], str] = {
+    (1024, 1024): "1024x1024",
+    (1024, 1792): "1024x1792",
+    (1792, 1024): "1792x1024",
+}
+_DALLE_DEFAULT_SIZE = "1536x1024"
+
+# Provider handlers. Each one generates a single image and either writes it to
+# output_path or returns the URL to download it from once the provider slot is released.
+ImageHandler = Callable[[str, int, int, str], Awaitable[Optional[str]]]
+
+async def _openai_gpt_image(prompt: str, width: int, height: int, output_path: str) -> Optional[str]:
+    """
+    Generate an image with OpenAI GPT-Image-1.
+    """
+    if not OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+    
+    # Use the shared OpenAI client
+    client = _get_openai()
+    
+    # Generate image with GPT-Image-1
+    response = await client.images.generate(
+        model="gpt-image-1",
+        prompt=prompt,
+        size="1536x1024",
+        n=1,
+    )
+    
+    # Decode and save the image
+    image_base64 = response.data[0].b64_json
+    image_bytes = binascii.a2b_base64(image_base64)
+    
+    async with aiofiles.open(output_path, 'wb') as f:
+        await f.write(image_bytes)
+    
+    logger.info(f"Successfully generated image with GPT-Image-1 and saved to {output_path}")
+
+async def _openai_dalle(prompt: str, width: int, height: int, output_path: str) -> Optional[str]:
+    """
+    Generate an image with OpenAI DALL-E 3.
+    
+    Returns:
+        URL of the generated image, downloaded by the caller
+    """
+    if not OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+    
+    # Use the shared OpenAI client
+    client = _get_openai()
+    
+    # Determine size format based on width and height
+    size = _DALLE_SIZES.get((width, height), _DALLE_DEFAULT_SIZE)
+    
+    response = await client.images.generate(
+        model="dall-e-3",
+        prompt=prompt,
+        size=size,
+        quality="standard",
+        n=1,
+    )
+    
+    # The caller downloads the image after releasing the provider slot
+    return response.data[0].url
+
+async def _google_gemini(prompt: str, width: int, height: int, output_path: str) -> Optional[str]:
+    """
+    Generate an image with the Gemini API.
+    """
+    if not GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY environment variable is not set")
+    
+    logger.info(f"Generating image with Gemini API: prompt={prompt[:50]}...")
+    
+    # Call the Gemini API directly
+    api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp:generateContent?key={GEMINI_API_KEY}"
+    
+    # Prepare the request payload
+    payload = {
+        "contents": [{
+            "parts": [
+                {"text": prompt}
             ]
+        }],
+        "generationConfig": {"responseModalities": ["Text", "Image"]}
+    }
+    
+    # Use aiohttp for asynchronous API call
+    session = await get_session()
+    async with session.post(
+        api_url,
+        headers={"Content-Type": "application/json"},
+        data=orjson.dumps(payload)
+    ) as response:
+        if response.status != 200:
+            raise ProviderHTTPError(
+                f"Gemini API error: {response.status} - {await response.text()}",
+                response.status,
+                response.headers.get("Retry-After")
+            )
         
-        # Add the current timestamp
-        provider_rate_limits[provider]["timestamps"].append(current_time)
+        # Parse the response to extract the image data
+        response_data = await response.json(loads=orjson.loads)
+    
+    # Extract the image data from the response
+    image_binary = None
+    
+    if "candidates" in response_data and response_data["candidates"]:
+        for part in response_data["candidates"][0]["content"]["parts"]:
+            if part.get("text") is not None:
+                # Lazy formatting: Gemini text preambles can be long
+                logger.info("Text response from Gemini: %s", part["text"])
+            elif part.get("inlineData") is not None:
+                # Get the base64 encoded image data
+                image_data = part["inlineData"]["data"]
+                image_binary = binascii.a2b_base64(image_data)
+                break
+    
+    if not image_binary:
+        raise ValueError("No image data found in Gemini API response")
+    
+    # Save the image
+    async with aiofiles.open(output_path, 'wb') as f:
+        await f.write(image_binary)
+    logger.info(f"Successfully generated image with Gemini API and saved to {output_path}")
+
+async def _minimax(prompt: str, width: int, height: int, output_path: str) -> Optional[str]:
+    """
+    Generate an image with the Minimax API.
+    
+    Returns:
+        URL of the generated image, downloaded by the caller
+    """
+    if not MINIMAX_API_KEY:
+        raise ValueError("MINIMAX_API_KEY environment variable is not set")
+    
+    # Determine aspect ratio based on width and height
+    if width > height:
+        aspect_ratio = "16:9"
+    elif width < height:
+        aspect_ratio = "9:16"
+    else:
+        aspect_ratio = "1:1"
+    
+    # API endpoint
+    url = "https://api.minimaxi.chat/v1/image_generation"
+    
+    # Prepare the request payload
+    logger.info(f"Generating image with Minimax API: prompt={prompt[:50]}...")
+    logger.info(f"Aspect ratio: {aspect_ratio}")
+    logger.info(f"Width: {width}")
+    logger.info(f"Height: {height}")
+    payload = orjson.dumps({
+        "model": "image-01",
+        "prompt": prompt,
+        "aspect_ratio": aspect_ratio,
+        "response_format": "url",
+        "width": width,
+        "height": height,
+        "n": 1,
+        "prompt_optimizer": True
+    })
+    
+    headers = {
+        'Authorization': f'Bearer {MINIMAX_API_KEY}',
+        'Content-Type': 'application/json'
+    }
+    
+    # Use aiohttp for asynchronous API call
+    session = await get_session()
+    async with session.post(url, headers=headers, data=payload) as response:
+        if response.status != 200:
+            raise ProviderHTTPError(
+                f"Minimax API error: {response.status} - {await response.text()}",
+                response.status,
+                response.headers.get("Retry-After")
+            )
+        
+        # Parse the response to extract the image URL
+        response_data = await response.json(loads=orjson.loads)
+    
+    # Extract the image URL from the response
+    if ('data' in response_data and 
+        'image_urls' in response_data['data'] and 
+        len(response_data['data']['image_urls']) > 0):
+        
+        # Get the first image URL from the array
+        image_url = response_data['data']['image_urls'][0]
+        
+        if not image_url:
+            raise ValueError("No image URL found in Minimax API response")
+    else:
+        raise ValueError("Invalid response format from Minimax API")
+    
+    # The caller downloads the image after releasing the provider slot
+    logger.info("Successfully generated image with Minimax API")
+    return image_url
+
+# Dispatch table keyed by (provider, model); "*" matches any model for that provider.
+# OpenAI models other than gpt-image-1 use DALL-E 3, as before.
+HANDLERS: Dict[Tuple[str, str], ImageHandler] = {
+    ("openai", "gpt-image-1"): _openai_gpt_image,
+    ("openai", "dall-e-3"): _openai_dalle,
+    ("openai", "*"): _openai_dalle,
+    ("google", "*"): _google_gemini,
+    ("minimax", "*"): _minimax,
+}
+
+def _get_handler(provider: str, model: str) -> ImageHandler:
+    """
+    Look up the handler for a provider and model.
+    """
+    handler = HANDLERS.get((provider, model)) or HANDLERS.get((provider, "*"))
+    if handler is None:
+        raise ValueError(f"Unsupported provider: {provider}")
+    return handler
 
 async def generate_ai_image(
     prompt: str,
@@ -90,7 +576,8 @@ async def generate_ai_image(
     output_dir: str = "images",
     output_filename: Optional[str] = None,
     aspect_ratio: str = "1:1",
-    model: str = "gpt-image-1"  # Default model for OpenAI
+    model: str = "gpt-image-1",  # Default model for OpenAI
+    use_cache: bool = True
 ) -> str:
     """
     Generate an AI image using the specified provider.
@@ -104,15 +591,14 @@ async def generate_ai_image(
         output_filename: Optional filename for the image
         aspect_ratio: Aspect ratio for the image (used by Minimax)
         model: Model to use for image generation (for OpenAI: "dall-e-3" or "gpt-image-1")
+        use_cache: Reuse cached and in-flight results for identical requests;
+            pass False to always call the provider (e.g. when regenerating)
     
     Returns:
         Path to the generated image
     """
     logger.info(f"Generating image with {provider} provider: prompt={prompt[:50]}...")
     
-    # Apply rate limiting based on provider
-    await check_rate_limit(provider)
-    
     # Create output filename if not provided
     if not output_filename:
         output_filename = f"ai-image-{int(time.time())}.png"
@@ -121,191 +607,81 @@ async def generate_ai_image(
     os.makedirs(output_dir, exist_ok=True)
     output_path = os.path.join(output_dir, output_filename)
     
+    # Return a cached image for identical requests without calling the provider
+    cache_path = _cache_path(output_dir, _cache_key(provider, model, prompt, width, height))
+    if use_cache and await asyncio.to_thread(_load_from_cache, cache_path, output_path):
+        logger.info(f"Using cached image for prompt={prompt[:50]}... -> {output_path}")
+        return output_path
+    
+    # Coalesce with an identical request that is already in flight
+    inflight = _inflight.get(cache_path) if use_cache else None
+    if inflight is not None:
+        logger.info(f"Waiting for in-flight generation of prompt={prompt[:50]}...")
+        try:
+            source_path = await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            # The shield keeps our own cancellation from reaching the shared future,
+            # so a cancelled future means the leader was cancelled: generate it here
+            if not inflight.cancelled():
+                raise
+            logger.info(f"In-flight generation was cancelled, retrying prompt={prompt[:50]}...")
+            return await generate_ai_image(
+                prompt, provider, width, height, output_dir, output_filename,
+                aspect_ratio, model, use_cache
+            )
+        if source_path != output_path:
+            await asyncio.to_thread(_materialize, source_path, output_path)
+        return output_path
+    
+    # No await between the lookup above and this registration, so no lock is needed.
+    # Uncached requests get a private future so identical cached ones don't wait on them.
+    inflight = asyncio.get_running_loop().create_future()
+    if use_cache:
+        _inflight[cache_path] = inflight
+    
     try:
-        if provider == "openai":
-            if not OPENAI_API_KEY:
-                raise ValueError("OPENAI_API_KEY environment variable is not set")
-            
-            # Initialize OpenAI client
-            client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+        handler = _get_handler(provider, model)
+        
+        # Remove any previous file so a hardlinked cache entry is never overwritten in place
+        if os.path.lexists(output_path):
+            os.remove(output_path)
+        
+        async def attempt():
+            # Apply rate limiting based on provider
+            await check_rate_limit(provider)
             
-            if model == "gpt-image-1":
-                # Generate image with GPT-Image-1
-                response = await client.images.generate(
-                    model="gpt-image-1",
-                    prompt=prompt,
-                    size="1536x1024",
-                    n=1,
-                )
-                
-                # Decode and save the image
-                image_base64 = response.data[0].b64_json
-                image_bytes = base64.b64decode(image_base64)
-                
-                with open(output_path, 'wb') as f:
-                    f.write(image_bytes)
-                
-                logger.info(f"Successfully generated image with GPT-Image-1 and saved to {output_path}")
-            else:
-                # Use DALL-E 3 (default)
-                # Determine size format based on width and height
-                size = "1536x1024"  # default
-                if width == 1024 and height == 1024:
-                    size = "1024x1024"
-                elif width == 1024 and height == 1792:
-                    size = "1024x1792"
-                elif width == 1792 and height == 1024:
-                    size = "1792x1024"
-                
-                response = await client.images.generate(
-                    model="dall-e-3",
-                    prompt=prompt,
-                    size=size,
-                    quality="standard",
-                    n=1,
-                )
-                
-                image_url = response.data[0].url
+            # Generate the image with the provider's handler, bounded per provider
+            async with _provider_semaphores[provider]:
+                image_url = await handler(prompt, width, height, output_path)
                 
-                # Download the image asynchronously
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(image_url) as response:
-                        if response.status == 200:
-                            image_content = await response.read()
-                            with open(output_path, 'wb') as f:
-                                f.write(image_content)
-                        else:
-                            raise Exception(f"Failed to download image: {response.status}")
-                
-        elif provider == "google":
-            if not GEMINI_API_KEY:
-                raise ValueError("GEMINI_API_KEY environment variable is not set")
-            
-            logger.info(f"Generating image with Gemini API: prompt={prompt[:50]}...")
-            
-            # Using requests to call Gemini API directly
-            api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp:generateContent?key={GEMINI_API_KEY}"
-            
-            # Prepare the request payload
-            payload = {
-                "contents": [{
-                    "parts": [
-                        {"text": prompt}
-                    ]
-                }],
-                "generationConfig": {"responseModalities": ["Text", "Image"]}
-            }
-            
-            # Use aiohttp for asynchronous API call
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    api_url,
-                    headers={"Content-Type": "application/json"},
-                    json=payload
-                ) as response:
-                    if response.status != 200:
-                        raise Exception(f"Gemini API error: {response.status} - {await response.text()}")
-                    
-                    # Parse the response to extract the image data
-                    response_data = await response.json()
-                    
-                    # Extract the image data from the response
-                    image_binary = None
-                    
-                    if "candidates" in response_data and response_data["candidates"]:
-                        for part in response_data["candidates"][0]["content"]["parts"]:
-                            if part.get("text") is not None:
-                                logger.info(f"Text response from Gemini: {part['text']}")
-                            elif part.get("inlineData") is not None:
-                                # Get the base64 encoded image data
-                                image_data = part["inlineData"]["data"]
-                                image_binary = base64.b64decode(image_data)
-                                break
-                    
-                    if not image_binary:
-                        raise ValueError("No image data found in Gemini API response")
-                    
-                    # Save the image
-                    with open(output_path, 'wb') as f:
-                        f.write(image_binary)
-                    logger.info(f"Successfully generated image with Gemini API and saved to {output_path}")
-            
-        elif provider == "minimax":
-            if not MINIMAX_API_KEY:
-                raise ValueError("MINIMAX_API_KEY environment variable is not set")
-            
-            # Determine aspect ratio based on width and height
-            if width > height:
-                aspect_ratio = "16:9"
-            elif width < height:
-                aspect_ratio = "9:16"
-            else:
-                aspect_ratio = "1:1"
-            
-            # API endpoint
-            url = "https://api.minimaxi.chat/v1/image_generation"
-            
-            # Prepare the request payload
-            logger.info(f"Generating image with Minimax API: prompt={prompt[:50]}...")
-            logger.info(f"Aspect ratio: {aspect_ratio}")
-            logger.info(f"Width: {width}")
-            logger.info(f"Height: {height}")
-            payload = json.dumps({
-                "model": "image-01",
-                "prompt": prompt,
-                "aspect_ratio": aspect_ratio,
-                "response_format": "url",
-                "width": width,
-                "height": height,
-                "n": 1,
-                "prompt_optimizer": True
-            })
-            
-            headers = {
-                'Authorization': f'Bearer {MINIMAX_API_KEY}',
-                'Content-Type': 'application/json'
-            }
-            
-            # Use aiohttp for asynchronous API call
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, data=payload) as response:
-                    if response.status != 200:
-                        raise Exception(f"Minimax API error: {response.status} - {await response.text()}")
-                    
-                    # Parse the response to extract the image URL
-                    response_data = await response.json()
-                    
-                    # Extract the image URL from the response
-                    if ('data' in response_data and 
-                        'image_urls' in response_data['data'] and 
-                        len(response_data['data']['image_urls']) > 0):
-                        
-                        # Get the first image URL from the array
-                        image_url = response_data['data']['image_urls'][0]
-                        
-                        if not image_url:
-                            raise ValueError("No image URL found in Minimax API response")
-                        
-                        # Download the image
-                        async with session.get(image_url) as img_response:
-                            if img_response.status == 200:
-                                image_content = await img_response.read()
-                                with open(output_path, 'wb') as f:
-                                    f.write(image_content)
-                                logger.info(f"Successfully generated image with Minimax API and saved to {output_path}")
-                            else:
-                                raise Exception(f"Failed to download Minimax image: {img_response.status}")
-                    else:
-                        raise ValueError("Invalid response format from Minimax API")
-            
-        else:
-            raise ValueError(f"Unsupported provider: {provider}")
-            
+            # URL-returning providers are downloaded outside the provider slot
+            if image_url:
+                await _download_image(image_url, output_path, label=f"{provider} image")
+        
+        # Retry transient provider errors; each attempt takes its own rate limit slot
+        await _with_retries(attempt)
+        
+        # Save the result for future identical requests
+        try:
+            await asyncio.to_thread(_store_in_cache, output_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Failed to cache generated image: {str(e)}")
+        
+        inflight.set_result(output_path)
         return output_path
         
+    except asyncio.CancelledError:
+        inflight.cancel()
+        raise
     except Exception as e:
         logger.error(f"Error generating AI image: {str(e)}")
+        inflight.set_exception(e)
+        # Mark the exception as retrieved in case no other caller is waiting
+        inflight.exception()
         raise
+    finally:
+        if _inflight.get(cache_path) is inflight:
+            del _inflight[cache_path]
 
 async def generate_ai_images_batch(
     prompts: List[str],
@@ -317,7 +693,8 @@ async def generate_ai_images_batch(
 ) -> List[str]:
     """
     Generate multiple AI images concurrently using the specified provider.
-    This function handles batch processing with proper rate limiting.
+    All prompts are submitted together and throttled by the provider's
+    sliding-window rate limiter in check_rate_limit.
     
     Args:
         prompts: List of text prompts for image generation
@@ -328,135 +705,69 @@ async def generate_ai_images_batch(
         model: Model to use for image generation (for OpenAI)
     
     Returns:
-        List of paths to the generated images
+        List of paths to the generated images, with None for empty or failed prompts
     """
     logger.info(f"Batch generating {len(prompts)} images with {provider} provider")
     
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
-    # Group prompts by provider for efficient processing
-    if provider == "minimax":
-        # For Minimax, we can process all prompts concurrently
-        # since it has no rate limits
-        tasks = []
-        for i, prompt in enumerate(prompts):
-            output_filename = f"ai-image-batch-{i}-{int(time.time())}.png"
-            task = generate_ai_image(
-                prompt=prompt,
-                provider=provider,
-                width=width,
-                height=height,
-                output_dir=output_dir,
-                output_filename=output_filename
-            )
-            tasks.append(task)
-        
-        # Execute all tasks concurrently
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Process results and handle exceptions
-        paths = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Error generating image for prompt {i}: {str(result)}")
-                paths.append(None)
-            else:
-                paths.append(result)
-        
-        return paths
+    if provider not in provider_rate_limits:
+        raise ValueError(f"Unsupported provider: {provider}")
     
-    elif provider == "openai":
-        # For OpenAI, we need to respect the rate limits
-        # We'll process in small batches of 5 (the rate limit) every minute
-        batch_size = provider_rate_limits["openai"]["calls"]
-        results = []
-        
-        # Process prompts in batches
-        for i in range(0, len(prompts), batch_size):
-            batch_prompts = prompts[i:i+batch_size]
-            logger.info(f"Processing OpenAI batch {i//batch_size + 1} with {len(batch_prompts)} prompts")
-            
-            # Create tasks for this batch
-            batch_tasks = []
-            for j, prompt in enumerate(batch_prompts):
-                output_filename = f"ai-image-batch-{i+j}-{int(time.time())}.png"
-                task = generate_ai_image(
-                    prompt=prompt,
-                    provider=provider,
-                    width=width,
-                    height=height,
-                    output_dir=output_dir,
-                    output_filename=output_filename,
-                    model=model
-                )
-                batch_tasks.append(task)
-            
-            # Execute this batch concurrently
-            batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-            results.extend(batch_results)
-            
-            # If we have more batches to process, wait to respect rate limits
-            if i + batch_size < len(prompts):
-                wait_time = provider_rate_limits["openai"]["period"]
-                logger.info(f"Waiting {wait_time} seconds before processing next OpenAI batch")
-                await asyncio.sleep(wait_time)
-        
-        # Process results and handle exceptions
-        paths = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Error generating image for prompt {i}: {str(result)}")
-                paths.append(None)
-            else:
-                paths.append(result)
-        
-        return paths
+    # Skip empty prompts and generate each distinct prompt only once
+    batch_time = int(time.time())
+    first_index: Dict[str, int] = {}
+    for i, prompt in enumerate(prompts):
+        if not prompt or not prompt.strip():
+            logger.warning(f"Skipping empty prompt at index {i}")
+            continue
+        first_index.setdefault(prompt, i)
+    unique_prompts = list(first_index)
     
-    elif provider == "google":
-        # For Google, use a similar approach as OpenAI
-        batch_size = provider_rate_limits["google"]["calls"]
-        results = []
-        
-        # Process prompts in batches
-        for i in range(0, len(prompts), batch_size):
-            batch_prompts = prompts[i:i+batch_size]
-            logger.info(f"Processing Google batch {i//batch_size + 1} with {len(batch_prompts)} prompts")
-            
-            # Create tasks for this batch
-            batch_tasks = []
-            for j, prompt in enumerate(batch_prompts):
-                output_filename = f"ai-image-batch-{i+j}-{int(time.time())}.png"
-                task = generate_ai_image(
-                    prompt=prompt,
-                    provider=provider,
-                    width=width,
-                    height=height,
-                    output_dir=output_dir,
-                    output_filename=output_filename
-                )
-                batch_tasks.append(task)
-            
-            # Execute this batch concurrently
-            batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-            results.extend(batch_results)
-            
-            # If we have more batches to process, wait to respect rate limits
-            if i + batch_size < len(prompts):
-                wait_time = provider_rate_limits["google"]["period"]
-                logger.info(f"Waiting {wait_time} seconds before processing next Google batch")
-                await asyncio.sleep(wait_time)
-        
-        # Process results and handle exceptions
-        paths = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Error generating image for prompt {i}: {str(result)}")
-                paths.append(None)
-            else:
-                paths.append(result)
-        
-        return paths
+    if len(unique_prompts) < len(prompts):
+        logger.info(f"Generating {len(unique_prompts)} unique images for {len(prompts)} prompts")
     
-    else:
-        raise ValueError(f"Unsupported provider: {provider}") 
\ No newline at end of file
+    # Submit all prompts at once; check_rate_limit throttles them per provider
+    tasks = []
+    for prompt in unique_prompts:
+        output_filename = f"ai-image-batch-{first_index[prompt]}-{batch_time}.png"
+        task = generate_ai_image(
+            prompt=prompt,
+            provider=provider,
+            width=width,
+            height=height,
+            output_dir=output_dir,
+            output_filename=output_filename,
+            model=model
+        )
+        tasks.append(task)
+    
+    # Execute all tasks concurrently
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    # Process results and handle exceptions
+    unique_paths: Dict[str, Optional[str]] = {}
+    for prompt, result in zip(unique_prompts, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error generating image for prompt {first_index[prompt]}: {str(result)}")
+            unique_paths[prompt] = None
+        else:
+            unique_paths[prompt] = result
+    
+    # Fan results out to every original index, hardlinking repeats to their own filenames
+    paths = []
+    for i, prompt in enumerate(prompts):
+        source_path = unique_paths.get(prompt)
+        if source_path is None or first_index[prompt] == i:
+            paths.append(source_path)
+            continue
+        output_path = os.path.join(output_dir, f"ai-image-batch-{i}-{batch_time}.png")
+        try:
+            await asyncio.to_thread(_materialize, source_path, output_path)
+            paths.append(output_path)
+        except OSError as e:
+            logger.error(f"Error copying image for prompt {i}: {str(e)}")
+            paths.append(None)
+    
+    return paths
@@ -0,0 +1,160 @@
+import json
+import asyncio
+import logging
+from typing import Optional, Dict, Set
+
+import asyncpg
+
+from utils.db_pool import get_pool, is_transaction_pooler, SUPABASE_DB_URL, TRANSACTION_POOLER_PORT
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel the progress writers in SupabaseDB notify on
+JOB_PROGRESS_CHANNEL = "job_progress"
+
+# Events are dropped for subscribers that fall this far behind
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Seconds between attempts to (re)establish the LISTEN connection
+LISTENER_RETRY_DELAY = 5.0
+
+# One dedicated LISTEN connection per process
+_listener_conn: Optional[asyncpg.Connection] = None
+_reconnect_task: Optional[asyncio.Task] = None
+_subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+def _on_notify(conn: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+    try:
+        event = json.loads(payload)
+    except ValueError:
+        logger.warning(f"Ignoring malformed {channel} payload: {payload}")
+        return
+
+    # Fan the event out to everyone watching this job
+    for queue in _subscribers.get(str(event.get("job_id")), ()):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning(f"Dropping progress event for slow subscriber on job {event.get('job_id')}")
+
+async def _release_listener(conn: asyncpg.Connection) -> None:
+    try:
+        pool = await get_pool()
+        await pool.release(conn)
+    except Exception as e:
+        logger.warning(f"Error releasing job progress listener connection: {str(e)}")
+
+def _on_listener_terminated(conn: asyncpg.Connection) -> None:
+    global _listener_conn
+    if conn is not _listener_conn:
+        return
+
+    # Subscribers fall back to polling until the listener is back
+    logger.warning("Job progress listener connection lost, reconnecting")
+    _listener_conn = None
+    asyncio.get_running_loop().create_task(_release_listener(conn))
+    _schedule_reconnect()
+
+def _schedule_reconnect() -> None:
+    global _reconnect_task
+    if _reconnect_task is None or _reconnect_task.done():
+        _reconnect_task = asyncio.get_running_loop().create_task(_reconnect())
+
+async def _connect_listener() -> None:
+    global _listener_conn
+    pool = await get_pool()
+    conn = await pool.acquire()
+    try:
+        await conn.add_listener(JOB_PROGRESS_CHANNEL, _on_notify)
+        conn.add_termination_listener(_on_listener_terminated)
+    except Exception:
+        await pool.release(conn)
+        raise
+    _listener_conn = conn
+    logger.info(f"Listening for {JOB_PROGRESS_CHANNEL} notifications")
+
+async def _reconnect() -> None:
+    while _listener_conn is None:
+        try:
+            await _connect_listener()
+        except Exception as e:
+            logger.error(f"Error starting job progress listener, retrying in {LISTENER_RETRY_DELAY}s: {str(e)}")
+            await asyncio.sleep(LISTENER_RETRY_DELAY)
+
+async def start_listener() -> None:
+    """
+    Acquire a pooled connection and LISTEN for job progress events.
+    Called on application startup.
+
+    LISTEN needs a session-mode connection, so nothing is started on the
+    transaction pooler or without SUPABASE_DB_URL; subscribers then rely
+    on their polling fallback.
+    If the connection can't be made or is lost later, it is retried in
+    the background.
+    """
+    if _listener_conn is not None:
+        return
+
+    if not SUPABASE_DB_URL:
+        logger.warning("SUPABASE_DB_URL is not set; progress streams will poll instead")
+        return
+
+    if is_transaction_pooler(SUPABASE_DB_URL):
+        logger.warning(
+            f"SUPABASE_DB_URL uses the transaction pooler (port {TRANSACTION_POOLER_PORT}), "
+            f"which can't LISTEN; progress streams will poll instead"
+        )
+        return
+
+    try:
+        await _connect_listener()
+    except Exception as e:
+        logger.error(f"Error starting job progress listener, retrying in background: {str(e)}")
+        _schedule_reconnect()
+
+async def stop_listener() -> None:
+    """
+    Stop listening and return the connection to the pool.
+    Called on application shutdown.
+    """
+    global _listener_conn, _reconnect_task
+    if _reconnect_task is not None:
+        _reconnect_task.cancel()
+        _reconnect_task = None
+
+    conn, _listener_conn = _listener_conn, None
+    if conn is None:
+        return
+
+    try:
+        conn.remove_termination_listener(_on_listener_terminated)
+        await conn.remove_listener(JOB_PROGRESS_CHANNEL, _on_notify)
+    except Exception as e:
+        logger.error(f"Error stopping job progress listener: {str(e)}")
+    await _release_listener(conn)
+
+def subscribe(job_id: str) -> asyncio.Queue:
+    """
+    Subscribe to progress events for a job.
+
+    Args:
+        job_id: The job ID
+
+    Returns:
+        Queue receiving event dicts with job_id, processed,
+        video_segments_completed and status
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    _subscribers.setdefault(str(job_id), set()).add(queue)
+    return queue
+
+def unsubscribe(job_id: str, queue: asyncio.Queue) -> None:
+    """
+    Remove a queue returned by subscribe.
+    """
+    queues = _subscribers.get(str(job_id))
+    if queues is None:
+        return
+    queues.discard(queue)
+    if not queues:
+        del _subscribers[str(job_id)]
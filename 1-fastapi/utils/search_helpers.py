@@ -1,13 +1,19 @@
 import os
-import requests
 import logging
-from typing import Dict, Any, List, Optional, Set
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable, AsyncIterator
 import time
 import random
+import hashlib
 import tempfile
 import shutil
+import asyncio
 from urllib.parse import urlparse
 from pathlib import Path
+import aiohttp
+import aiofiles
+import orjson
+from collections import OrderedDict
+from dataclasses import dataclass
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,134 +24,550 @@ PEXELS_API_KEY = os.getenv("PEXELS_API_KEY")
 PIXABAY_API_KEY = os.getenv("PIXABAY_API_KEY")
 SERPAPI_KEY = os.getenv("SERPAPI_KEY")
 
+# Request headers for the Pexels API
+PEXELS_HEADERS = {"Authorization": PEXELS_API_KEY}
+
 # Rate limiting settings
-API_DELAY_MS = 200  # 0.2 seconds delay between API requests
 MAX_RETRIES = 3     # Maximum number of retries for API requests
 BASE_RETRY_DELAY = 2  # Base delay for exponential backoff (seconds)
+MAX_RETRY_DELAY = 60  # Upper bound on any single backoff (seconds)
+
+# HTTP timeouts: fail fast on connect, bound the whole request
+API_TIMEOUT = aiohttp.ClientTimeout(total=15, sock_connect=3.05)
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=10, sock_connect=3.05)
+
+# Image downloads read 64 KiB network chunks and write to disk in 1 MiB batches
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+DOWNLOAD_WRITE_SIZE = 1 << 20
+
+# ETag and local path of recent image downloads, keyed by URL, for conditional GETs
+DOWNLOAD_CACHE_MAX_ENTRIES = 1024
+_download_cache: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+
+# Maximum concurrent in-flight requests per provider host
+_HOST_SEMAPHORES: Dict[str, asyncio.Semaphore] = {
+    "api.pexels.com": asyncio.Semaphore(4),
+    "pixabay.com": asyncio.Semaphore(4),
+    "serpapi.com": asyncio.Semaphore(2),
+}
+_DEFAULT_SEMAPHORE = asyncio.Semaphore(8)
+
+# Characters stripped from Pixabay queries
+_QUERY_STRIP = str.maketrans("", "", "'\"")
+
+# Pixabay video renditions, best quality first
+_PIXABAY_VIDEO_TIERS = ("large", "medium", "small", "tiny")
+
+# Raw search responses, cached for SEARCH_CACHE_TTL seconds keyed by (provider, query, per_page)
+SEARCH_CACHE_TTL = 600
+SEARCH_CACHE_MAX_ENTRIES = 512
+
+# On-disk copy of raw search responses that survives restarts; expiry in seconds per provider
+SEARCH_DISK_CACHE_DIR = os.getenv("SEARCH_CACHE_DIR", os.path.join(".cache", "search_helpers"))
+SEARCH_DISK_CACHE_DEFAULT_TTL = 86400
+SEARCH_DISK_CACHE_TTLS: Dict[str, int] = {
+    "serpapi_images": 21600,
+}
+SEARCH_DISK_CACHE_MAX_BYTES = int(os.getenv("SEARCH_DISK_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+_search_cache: "OrderedDict[Tuple[str, str, int], Tuple[float, Any]]" = OrderedDict()
+
+# Track used URLs to avoid duplicates, bounded so long-running workers don't grow without limit
+USED_URLS_MAX_ENTRIES = 10000
+_used_urls: "OrderedDict[str, None]" = OrderedDict()
+_used_urls_lock = asyncio.Lock()
+
+# Shared HTTP session, created lazily on first use
+_session: Optional[aiohttp.ClientSession] = None
+_session_lock = asyncio.Lock()
+
+async def _get_session() -> aiohttp.ClientSession:
+    """Get the shared aiohttp session, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        async with _session_lock:
+            if _session is None or _session.closed:
+                connector = aiohttp.TCPConnector(limit=64, limit_per_host=8, keepalive_timeout=30)
+                _session = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=API_TIMEOUT,
+                    headers={"Accept-Encoding": "gzip, deflate"}
+                )
+    return _session
+
+async def close_session():
+    """Close the shared HTTP session. Called on application shutdown."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    """Get the concurrency limit for the host serving url."""
+    return _HOST_SEMAPHORES.get(urlparse(url).netloc, _DEFAULT_SEMAPHORE)
 
-# Track used URLs to avoid duplicates
-_used_urls: Set[str] = set()
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds; HTTP-date values are ignored."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+def _error_retry_after(error: Exception) -> Optional[float]:
+    """Get the Retry-After value from an HTTP error response, if any."""
+    if isinstance(error, aiohttp.ClientResponseError) and error.headers:
+        return _parse_retry_after(error.headers.get("Retry-After"))
+    return None
+
+def _backoff_delay(retry_count: int, retry_after: Optional[float] = None) -> float:
+    """
+    Get the delay before the next retry.
+    
+    Uses the server's Retry-After when given, otherwise exponential backoff with jitter.
+    Both are capped at MAX_RETRY_DELAY.
+    """
+    if retry_after is not None:
+        return min(retry_after, MAX_RETRY_DELAY)
+    return min(MAX_RETRY_DELAY, BASE_RETRY_DELAY * (2 ** retry_count)) + random.uniform(0, 0.5)
 
 async def _make_api_request_with_retry(url, headers=None, params=None, max_retries=MAX_RETRIES):
     """Make an API request with exponential backoff retry logic."""
+    session = await _get_session()
     retry_count = 0
     while retry_count <= max_retries:
         try:
-            response = requests.get(url, headers=headers, params=params)
-            logger.info(f"API response: {response.status_code}")
-            logger.info(f"API response: {response.json()}")
-            
-            # If rate limited, back off and retry
-            if response.status_code == 429:  # Too Many Requests
-                retry_count += 1
-                if retry_count > max_retries:
-                    logger.error(f"Maximum retries reached for {url}")
-                    response.raise_for_status()
+            # Limit concurrent requests per provider host
+            async with _host_semaphore(url):
+                async with session.get(url, headers=headers, params=params) as response:
+                    logger.info(f"API response: {response.status}")
                     
-                # Calculate backoff delay with jitter
-                delay = BASE_RETRY_DELAY * (2 ** retry_count) + random.uniform(0, 1)
-                logger.warning(f"Rate limited. Backing off for {delay:.2f} seconds before retry {retry_count}/{max_retries}")
-                time.sleep(delay)
-                continue
-                
-            # For other errors, raise exception
-            response.raise_for_status()
+                    if response.status != 429:
+                        # For other errors, raise exception
+                        response.raise_for_status()
+                        
+                        # Successful response
+                        data = orjson.loads(await response.read())
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("API response: %s", data)
+                        return data
+                    
+                    # Rate limited (429 Too Many Requests)
+                    retry_count += 1
+                    if retry_count > max_retries:
+                        logger.error(f"Maximum retries reached for {url}")
+                        response.raise_for_status()
+                    retry_after = _parse_retry_after(response.headers.get("Retry-After"))
             
-            # Successful response
-            return response.json()
+            # Back off outside the semaphore so other requests can proceed; prefer the server's Retry-After
+            delay = _backoff_delay(retry_count, retry_after)
+            logger.warning(f"Rate limited. Backing off for {delay:.2f} seconds before retry {retry_count}/{max_retries}")
+            await asyncio.sleep(delay)
             
-        except requests.exceptions.RequestException as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             retry_count += 1
             if retry_count > max_retries:
                 logger.error(f"Maximum retries reached for {url}: {str(e)}")
                 raise
                 
-            # Calculate backoff delay with jitter
-            delay = BASE_RETRY_DELAY * (2 ** retry_count) + random.uniform(0, 1)
+            # Calculate backoff delay with jitter, honouring Retry-After on error responses
+            delay = _backoff_delay(retry_count, _error_retry_after(e))
             logger.warning(f"Request error: {str(e)}. Backing off for {delay:.2f} seconds before retry {retry_count}/{max_retries}")
-            time.sleep(delay)
+            await asyncio.sleep(delay)
             
     # If we get here, all retries failed
     raise Exception(f"API request to {url} failed after {max_retries} retries")
 
-async def search_pexels_videos(query: str, per_page: int = 10) -> Dict[str, Any]:
+def _sanitize_query(query: str) -> str:
+    """Remove quote characters from a search query in a single pass."""
+    return query.translate(_QUERY_STRIP)
+
+async def _mark_url(url: str) -> bool:
     """
-    Search Pexels API for videos matching the query.
+    Record a URL as used.
+    
+    Returns:
+        False if the URL was already used, True otherwise
+    """
+    async with _used_urls_lock:
+        if url in _used_urls:
+            _used_urls.move_to_end(url)
+            return False
+        _used_urls[url] = None
+        if len(_used_urls) > USED_URLS_MAX_ENTRIES:
+            _used_urls.popitem(last=False)
+        return True
+
+def _disk_cache_path(key: Tuple[str, str, int]) -> str:
+    """Get the on-disk cache file for a normalized search key."""
+    digest = hashlib.sha256(orjson.dumps(list(key))).hexdigest()
+    return os.path.join(SEARCH_DISK_CACHE_DIR, f"{digest}.json")
+
+def _read_disk_cache(path: str) -> Optional[Tuple[float, Any]]:
+    """
+    Read a cached search response from disk.
+    
+    Returns:
+        (age in seconds, payload), or None if the file is missing or unreadable
+    """
+    try:
+        age = time.time() - os.path.getmtime(path)
+        with open(path, 'rb') as f:
+            return age, orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+def _write_disk_cache(path: str, data: Any) -> None:
+    """Write a search response to disk atomically and evict old entries."""
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(data))
+    os.replace(tmp_path, path)
+    
+    _evict_disk_cache(cache_dir)
+
+def _evict_disk_cache(cache_dir: str) -> None:
+    """
+    Remove the oldest search responses until the cache fits SEARCH_DISK_CACHE_MAX_BYTES.
+    """
+    entries = []
+    total_size = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+    
+    if total_size <= SEARCH_DISK_CACHE_MAX_BYTES:
+        return
+    
+    # Oldest first; mtime is the write time the TTL check uses, so hits don't refresh it
+    entries.sort()
+    for _, size, path in entries:
+        if total_size <= SEARCH_DISK_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            total_size -= size
+        except OSError:
+            pass
+
+async def _cached_api_request(key: Tuple[str, str, int], url, headers=None, params=None):
+    """
+    Return the raw API response for a search, served from the TTL cache when fresh.
+    
+    Lookups go to the in-memory cache first, then the on-disk cache, which survives
+    restarts. If the API request fails, a stale on-disk entry is returned instead.
+    Only the raw payload is cached; callers still run URL dedup and formatting on it,
+    so a cache hit behaves the same as a repeated request.
+    """
+    provider, query, per_page = key
+    key = (provider, query.lower().strip(), per_page)
+    
+    now = time.monotonic()
+    entry = _search_cache.get(key)
+    if entry is not None and now - entry[0] < SEARCH_CACHE_TTL:
+        _search_cache.move_to_end(key)
+        logger.info(f"Search cache hit for {provider}: {query}")
+        return entry[1]
+    
+    # Fall back to the on-disk cache
+    disk_path = _disk_cache_path(key)
+    disk_entry = await asyncio.to_thread(_read_disk_cache, disk_path)
+    disk_ttl = SEARCH_DISK_CACHE_TTLS.get(provider, SEARCH_DISK_CACHE_DEFAULT_TTL)
+    if disk_entry is not None and disk_entry[0] < disk_ttl:
+        logger.info(f"Search disk cache hit for {provider}: {query}")
+        data = disk_entry[1]
+    else:
+        try:
+            data = await _make_api_request_with_retry(url, headers=headers, params=params)
+        except Exception as e:
+            if disk_entry is None:
+                raise
+            logger.warning(f"Search request for {provider} failed ({str(e)}); using stale cached response")
+            return disk_entry[1]
+        
+        try:
+            await asyncio.to_thread(_write_disk_cache, disk_path, data)
+        except OSError as e:
+            logger.warning(f"Failed to write search disk cache: {str(e)}")
+    
+    # Store and evict the least recently used entries
+    _search_cache[key] = (time.monotonic(), data)
+    _search_cache.move_to_end(key)
+    while len(_search_cache) > SEARCH_CACHE_MAX_ENTRIES:
+        _search_cache.popitem(last=False)
+    
+    return data
+
+def _format_pexels_video(video: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Format a Pexels video result, or return None if it has no video files."""
+    # Get the best quality video file in a single pass
+    best_video = max(
+        video.get("video_files", []),
+        key=lambda x: x.get("width", 0) * x.get("height", 0),
+        default=None
+    )
+    if best_video is None:
+        return None
+    
+    # Get the thumbnail from video_pictures if available
+    thumbnail = video.get("image", "")  # Default from the video image
+    if "video_pictures" in video and video["video_pictures"]:
+        # Get the first picture from video_pictures
+        first_picture = video["video_pictures"][0]
+        if first_picture and "picture" in first_picture:
+            thumbnail = first_picture["picture"]
+    
+    return {
+        "id": video.get("id"),
+        "width": best_video.get("width"),
+        "height": best_video.get("height"),
+        "duration": video.get("duration"),
+        "image": video.get("image"),
+        "thumbnail": thumbnail,  # Add explicit thumbnail field
+        "downloadUrl": best_video.get("link", ""),
+        "user": video.get("user", {}).get("name"),
+        "video_pictures": video.get("video_pictures", [])  # Include video_pictures
+    }
+
+def _format_pexels_image(photo: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Format a Pexels photo result."""
+    download_url = photo.get("src", {}).get("original", "")
+    return {
+        "id": photo.get("id"),
+        "url": download_url,
+        "width": photo.get("width"),
+        "height": photo.get("height"),
+        "thumbnail": photo.get("src", {}).get("medium"),
+        "source": "pexels",
+        "source_url": photo.get("url"),
+        "photographer": photo.get("photographer"),
+        "downloadUrl": download_url
+    }
+
+def _format_pixabay_video(hit: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Format a Pixabay video hit, or return None if no rendition has a URL."""
+    video_files = hit.get("videos", {})
+    
+    # Choose the best available quality (large, medium, small, tiny)
+    for tier in _PIXABAY_VIDEO_TIERS:
+        video_file = video_files.get(tier)
+        if video_file and video_file.get("url"):
+            thumbnail = video_file.get("thumbnail")
+            return {
+                "id": hit.get("id"),
+                "width": video_file.get("width", 0),
+                "height": video_file.get("height", 0),
+                "duration": hit.get("duration"),
+                "image": thumbnail,  # Use the video thumbnail
+                "thumbnail": thumbnail,
+                "downloadUrl": video_file["url"],
+                "user": hit.get("user"),
+                "tags": hit.get("tags"),
+                "pageURL": hit.get("pageURL"),
+                "source": "pixabay"
+            }
+    return None
+
+def _format_pixabay_image(hit: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Format a Pixabay image hit, or return None if it has no large image URL."""
+    # Make sure we have all the required fields
+    image_url = hit.get("largeImageURL")
+    if not image_url:
+        logger.warning(f"Missing largeImageURL for hit ID: {hit.get('id')}")
+        return None
+    
+    return {
+        "id": hit.get("id"),
+        "url": image_url,
+        "width": hit.get("imageWidth"),
+        "height": hit.get("imageHeight"),
+        "thumbnail": hit.get("previewURL"),
+        "source": "pixabay",
+        "source_url": hit.get("pageURL"),
+        "photographer": hit.get("user"),
+        "downloadUrl": image_url,
+        "tags": hit.get("tags"),
+        "likes": hit.get("likes"),
+        "downloads": hit.get("downloads"),
+        "views": hit.get("views")
+    }
+
+def _format_serpapi_image(image: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Format a SerpAPI Google Images result."""
+    image_url = image.get("original")
+    return {
+        "url": image_url,
+        "thumbnail": image.get("thumbnail"),
+        "width": image.get("original_width"),
+        "height": image.get("original_height"),
+        "source": image.get("source"),
+        "downloadUrl": image_url
+    }
+
+async def _unique_records(items: List[Dict[str, Any]], format_item: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Lazily format raw API items, skipping unusable items and URLs that were already used.
+    
+    URLs are only marked as used when a record is actually pulled from the generator.
+    """
+    for item in items:
+        record = format_item(item)
+        if record is None:
+            continue
+        
+        # Skip if this URL has been used before
+        if not await _mark_url(record["downloadUrl"]):
+            logger.info(f"Skipping duplicate URL: {record['downloadUrl']}")
+            continue
+        
+        yield record
+
+async def _take(records: AsyncIterator[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """Collect up to limit records, like itertools.islice for async generators."""
+    results = []
+    if limit <= 0:
+        return results
+    async for record in records:
+        results.append(record)
+        if len(results) == limit:
+            break
+    await records.aclose()
+    return results
+
+@dataclass(frozen=True)
+class ProviderConfig:
+    """Declarative description of a stock media search endpoint, consumed by _search."""
+    # Cache key prefix and human-readable name for logs
+    name: str
+    label: str
+    url: str
+    # Environment variable holding the API key, and its loaded value
+    env_key: str
+    api_key: Optional[str]
+    build_params: Callable[[str, int], Dict[str, Any]]
+    extract_items: Callable[[Dict[str, Any]], List[Dict[str, Any]]]
+    format_item: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+    # Shape the public return value from (records, raw response), or from an error
+    build_result: Callable[[List[Dict[str, Any]], Dict[str, Any]], Any]
+    build_error: Callable[[Exception], Any]
+    headers: Optional[Dict[str, str]] = None
+
+PEXELS_VIDEOS = ProviderConfig(
+    name="pexels_videos",
+    label="Pexels videos",
+    url="https://api.pexels.com/videos/search",
+    env_key="PEXELS_API_KEY",
+    api_key=PEXELS_API_KEY,
+    headers=PEXELS_HEADERS,
+    build_params=lambda query, per_page: {"query": query, "per_page": per_page, "orientation": "landscape"},
+    extract_items=lambda data: data.get("videos", []),
+    format_item=_format_pexels_video,
+    build_result=lambda videos, data: {"videos": videos, "provider": "pexels", "raw_response": data},  # Include raw response
+    build_error=lambda e: {"videos": [], "provider": "pexels", "error": str(e)},
+)
+
+PEXELS_IMAGES = ProviderConfig(
+    name="pexels_images",
+    label="Pexels images",
+    url="https://api.pexels.com/v1/search",
+    env_key="PEXELS_API_KEY",
+    api_key=PEXELS_API_KEY,
+    headers=PEXELS_HEADERS,
+    build_params=lambda query, per_page: {"query": query, "per_page": per_page, "orientation": "landscape"},
+    extract_items=lambda data: data.get("photos", []),
+    format_item=_format_pexels_image,
+    build_result=lambda images, data: images,
+    build_error=lambda e: [],
+)
+
+PIXABAY_VIDEOS = ProviderConfig(
+    name="pixabay_videos",
+    label="Pixabay videos",
+    url="https://pixabay.com/api/videos/",
+    env_key="PIXABAY_API_KEY",
+    api_key=PIXABAY_API_KEY,
+    build_params=lambda query, per_page: {
+        "key": PIXABAY_API_KEY,
+        "q": _sanitize_query(query),
+        "per_page": per_page,
+        "orientation": "landscape"
+    },
+    extract_items=lambda data: data.get("hits", []),
+    format_item=_format_pixabay_video,
+    build_result=lambda videos, data: {"videos": videos, "provider": "pixabay", "total": data.get("total", 0), "totalHits": data.get("totalHits", 0)},
+    build_error=lambda e: {"videos": [], "provider": "pixabay", "error": str(e)},
+)
+
+PIXABAY_IMAGES = ProviderConfig(
+    name="pixabay_images",
+    label="Pixabay images",
+    url="https://pixabay.com/api/",
+    env_key="PIXABAY_API_KEY",
+    api_key=PIXABAY_API_KEY,
+    build_params=lambda query, per_page: {
+        "key": PIXABAY_API_KEY,
+        "q": _sanitize_query(query),
+        "per_page": per_page,
+        "image_type": "photo",
+    },
+    extract_items=lambda data: data.get("hits", []),
+    format_item=_format_pixabay_image,
+    build_result=lambda images, data: images,
+    build_error=lambda e: [],
+)
+
+async def _search(config: ProviderConfig, query: str, per_page: int) -> Any:
+    """
+    Run a search against a configured provider.
+    
+    Handles the API key check, caching, retries, URL dedup and error wrapping
+    for every provider in one place.
     
     Args:
+        config: Provider to search
         query: Search query
         per_page: Number of results to return
         
     Returns:
-        Dictionary with search results
+        The provider's result shape from config.build_result, or config.build_error on failure
     """
-    if not PEXELS_API_KEY:
-        raise ValueError("PEXELS_API_KEY environment variable is not set")
-        
-    url = "https://api.pexels.com/videos/search"
-    headers = {"Authorization": PEXELS_API_KEY}
-    params = {"query": query, "per_page": per_page, "orientation": "landscape"}
+    if not config.api_key:
+        raise ValueError(f"{config.env_key} environment variable is not set")
+    
+    params = config.build_params(query, per_page)
     
     try:
-        data = await _make_api_request_with_retry(url, headers=headers, params=params)
+        logger.info(f"Searching {config.label} with query: {query}")
         
-        # Log the raw response for debugging
-        logger.info(f"API response: {data}")
+        data = await _cached_api_request((config.name, query, per_page), config.url, headers=config.headers, params=params)
         
-        # Format the response to match the expected structure
-        videos = []
-        for video in data.get("videos", []):
-            # Get the best quality video file
-            video_files = sorted(
-                video.get("video_files", []),
-                key=lambda x: x.get("width", 0) * x.get("height", 0),
-                reverse=True
-            )
-            
-            if video_files:
-                best_video = video_files[0]
-                download_url = best_video.get("link", "")
-                
-                # Skip if this URL has been used before
-                if download_url in _used_urls:
-                    logger.info(f"Skipping duplicate video URL: {download_url}")
-                    continue
-                
-                # Get the thumbnail from video_pictures if available
-                thumbnail = video.get("image", "")  # Default from the video image
-                if "video_pictures" in video and video["video_pictures"]:
-                    # Get the first picture from video_pictures
-                    first_picture = video["video_pictures"][0]
-                    if first_picture and "picture" in first_picture:
-                        thumbnail = first_picture["picture"]
-                
-                # Mark URL as used
-                _used_urls.add(download_url)
-                
-                videos.append({
-                    "id": video.get("id"),
-                    "width": best_video.get("width"),
-                    "height": best_video.get("height"),
-                    "duration": video.get("duration"),
-                    "image": video.get("image"),
-                    "thumbnail": thumbnail,  # Add explicit thumbnail field
-                    "downloadUrl": download_url,
-                    "user": video.get("user", {}).get("name"),
-                    "video_pictures": video.get("video_pictures", [])  # Include video_pictures
-                })
-                
-                # Break if we've collected enough results
-                if len(videos) >= per_page:
-                    break
-                
-        # Add delay to avoid rate limiting
-        time.sleep(API_DELAY_MS / 1000)
+        # Format the response, skipping unusable items and already used URLs
+        records = await _take(_unique_records(config.extract_items(data), config.format_item), per_page)
+        logger.info(f"{config.label} search completed with {len(records)} results")
         
-        return {"videos": videos, "provider": "pexels", "raw_response": data}  # Include raw response
+        return config.build_result(records, data)
         
     except Exception as e:
-        logger.error(f"Error searching Pexels videos: {str(e)}")
-        return {"videos": [], "provider": "pexels", "error": str(e)}
+        logger.error(f"Error searching {config.label}: {str(e)}")
+        return config.build_error(e)
+
+async def search_pexels_videos(query: str, per_page: int = 10) -> Dict[str, Any]:
+    """
+    Search Pexels API for videos matching the query.
+    
+    Args:
+        query: Search query
+        per_page: Number of results to return
+        
+    Returns:
+        Dictionary with search results
+    """
+    return await _search(PEXELS_VIDEOS, query, per_page)
 
 async def search_pexels_images(query: str, per_page: int = 10) -> List[Dict[str, Any]]:
     """
@@ -158,54 +580,7 @@ async def search_pexels_images(query: str, per_page: int = 10) -> List[Dict[str,
     Returns:
         List of image results
     """
-    if not PEXELS_API_KEY:
-        raise ValueError("PEXELS_API_KEY environment variable is not set")
-        
-    url = "https://api.pexels.com/v1/search"
-    headers = {"Authorization": PEXELS_API_KEY}
-    params = {"query": query, "per_page": per_page, "orientation": "landscape"}
-    
-    try:
-        data = await _make_api_request_with_retry(url, headers=headers, params=params)
-        
-        # Format the response
-        images = []
-        print(data)
-        for photo in data.get("photos", []):
-            download_url = photo.get("src", {}).get("original", "")
-            
-            # Skip if this URL has been used before
-            if download_url in _used_urls:
-                logger.info(f"Skipping duplicate image URL: {download_url}")
-                continue
-            
-            # Mark URL as used
-            _used_urls.add(download_url)
-            
-            images.append({
-                "id": photo.get("id"),
-                "url": download_url,
-                "width": photo.get("width"),
-                "height": photo.get("height"),
-                "thumbnail": photo.get("src", {}).get("medium"),
-                "source": "pexels",
-                "source_url": photo.get("url"),
-                "photographer": photo.get("photographer"),
-                "downloadUrl": download_url
-            })
-            
-            # Break if we've collected enough results
-            if len(images) >= per_page:
-                break
-                
-        # Add delay to avoid rate limiting
-        time.sleep(API_DELAY_MS / 1000)
-        
-        return images
-        
-    except Exception as e:
-        logger.error(f"Error searching Pexels images: {str(e)}")
-        return []
+    return await _search(PEXELS_IMAGES, query, per_page)
         
 async def search_pixabay_videos(query: str, per_page: int = 10) -> Dict[str, Any]:
     """
@@ -218,96 +593,7 @@ async def search_pixabay_videos(query: str, per_page: int = 10) -> Dict[str, Any
     Returns:
         Dictionary with search results
     """
-    pixabay_api_key = os.getenv("PIXABAY_API_KEY")
-        
-    url = "https://pixabay.com/api/videos/"
-    params = {
-        "key": pixabay_api_key,
-        "q": query.replace("'", "").replace('"', ''),
-        "per_page": per_page,
-        "orientation": "landscape"
-    }
-    
-    try:
-        logger.info(f"Searching Pixabay videos with query: {query}")
-        logger.info(f"Request URL: {url}")
-        logger.info(f"Request params: {params}")
-        
-        data = await _make_api_request_with_retry(url, params=params)
-        
-        # Log total hits and response structure
-        logger.info(f"Pixabay videos search completed. Total hits: {data.get('totalHits', 0)}")
-        
-        # Format the response to match the expected structure
-        videos = []
-        for hit in data.get("hits", []):
-            # Get the video URLs from the response
-            video_files = hit.get("videos", {})
-            
-            # Choose the best available quality (large, medium, small, tiny)
-            video_url = None
-            thumbnail = None
-            width = 0
-            height = 0
-            
-            # Check for tiny version first, then move up to higher resolutions
-            if video_files.get("tiny"):
-                video_url = video_files["tiny"].get("url")
-                thumbnail = video_files["tiny"].get("thumbnail")
-                width = video_files["tiny"].get("width", 0)
-                height = video_files["tiny"].get("height", 0)
-            elif video_files.get("small"):
-                video_url = video_files["small"].get("url")
-                thumbnail = video_files["small"].get("thumbnail")
-                width = video_files["small"].get("width", 0)
-                height = video_files["small"].get("height", 0)
-            elif video_files.get("medium"):
-                video_url = video_files["medium"].get("url")
-                thumbnail = video_files["medium"].get("thumbnail")
-                width = video_files["medium"].get("width", 0)
-                height = video_files["medium"].get("height", 0)
-            elif video_files.get("large"):
-                video_url = video_files["large"].get("url")
-                thumbnail = video_files["large"].get("thumbnail")
-                width = video_files["large"].get("width", 0)
-                height = video_files["large"].get("height", 0)
-            
-            if video_url:
-                # Skip if this URL has been used before
-                if video_url in _used_urls:
-                    logger.info(f"Skipping duplicate video URL: {video_url}")
-                    continue
-                
-                # Mark URL as used
-                _used_urls.add(video_url)
-                
-                videos.append({
-                    "id": hit.get("id"),
-                    "width": width,
-                    "height": height,
-                    "duration": hit.get("duration"),
-                    "image": thumbnail,  # Use the video thumbnail
-                    "thumbnail": thumbnail,
-                    "downloadUrl": video_url,
-                    "user": hit.get("user"),
-                    "tags": hit.get("tags"),
-                    "pageURL": hit.get("pageURL"),
-                    "source": "pixabay"
-                })
-                logger.info(f"Added video with ID: {hit.get('id')}")
-                
-                # Break if we've collected enough results
-                if len(videos) >= per_page:
-                    break
-                
-        # Add delay to avoid rate limiting
-        time.sleep(API_DELAY_MS / 1000)
-        
-        return {"videos": videos, "provider": "pixabay", "total": data.get("total", 0), "totalHits": data.get("totalHits", 0)}
-        
-    except Exception as e:
-        logger.error(f"Error searching Pixabay videos: {str(e)}")
-        return {"videos": [], "provider": "pixabay", "error": str(e)}
+    return await _search(PIXABAY_VIDEOS, query, per_page)
 
 async def search_pixabay_images(query: str, per_page: int = 10) -> List[Dict[str, Any]]:
     """
@@ -320,76 +606,34 @@ async def search_pixabay_images(query: str, per_page: int = 10) -> List[Dict[str
     Returns:
         List of image results
     """
-    if not PIXABAY_API_KEY:
-        raise ValueError("PIXABAY_API_KEY environment variable is not set")
+    return await _search(PIXABAY_IMAGES, query, per_page)
         
-    url = "https://pixabay.com/api/"
-    params = {
-        "key": PIXABAY_API_KEY,
-        "q": query.replace("'", "").replace('"', ''),
-        "per_page": per_page,
-        "image_type": "photo",
-    }
+async def _no_results() -> List[Dict[str, Any]]:
+    return []
+
+async def _search_stock_images(query: str, num_results: int) -> List[Dict[str, Any]]:
+    """
+    Search Pexels and Pixabay concurrently, splitting num_results between them.
     
-    try:
-        logger.info(f"Searching Pixabay images with query: {query}")
-        logger.info(f"Request URL: {url}")
-        logger.info(f"Request params: {params}")
-        
-        data = await _make_api_request_with_retry(url, params=params)
-        
-        # Log total hits and response structure
-        logger.info(f"Pixabay images search completed. Total hits: {data.get('totalHits', 0)}")
-        
-        # Format the response
-        images = []
-        for hit in data.get("hits", []):
-            # Make sure we have all the required fields
-            image_url = hit.get("largeImageURL")
-            if not image_url:
-                logger.warning(f"Missing largeImageURL for hit ID: {hit.get('id')}")
-                continue
-                
-            # Skip if this URL has been used before
-            if image_url in _used_urls:
-                logger.info(f"Skipping duplicate image URL: {image_url}")
-                continue
-            
-            # Mark URL as used
-            _used_urls.add(image_url)
-            
-            image_data = {
-                "id": hit.get("id"),
-                "url": image_url,
-                "width": hit.get("imageWidth"),
-                "height": hit.get("imageHeight"),
-                "thumbnail": hit.get("previewURL"),
-                "source": "pixabay",
-                "source_url": hit.get("pageURL"),
-                "photographer": hit.get("user"),
-                "downloadUrl": image_url,
-                "tags": hit.get("tags"),
-                "likes": hit.get("likes"),
-                "downloads": hit.get("downloads"),
-                "views": hit.get("views")
-            }
-            
-            images.append(image_data)
-            logger.info(f"Added image with ID: {hit.get('id')}")
-            
-            # Break if we've collected enough results
-            if len(images) >= per_page:
-                break
-                
-        # Add delay to avoid rate limiting
-        time.sleep(API_DELAY_MS / 1000)
-        
-        return images
-        
-    except Exception as e:
-        logger.error(f"Error searching Pixabay images: {str(e)}", exc_info=True)
-        return []
+    Args:
+        query: Search query
+        num_results: Total number of results to return
         
+    Returns:
+        Pexels results followed by Pixabay results
+    """
+    pexels_task = search_pexels_images(query, num_results // 2) if PEXELS_API_KEY else _no_results()
+    pixabay_task = search_pixabay_images(query, num_results // 2) if PIXABAY_API_KEY else _no_results()
+    results = await asyncio.gather(pexels_task, pixabay_task, return_exceptions=True)
+    
+    images = []
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error(f"Error in fallback image search: {str(result)}")
+            continue
+        images.extend(result)
+    return images
+
 async def search_images(query: str, num_results: int = 3, provider: str = None) -> List[Dict[str, Any]]:
     """
     Search for images using SerpAPI or direct image providers.
@@ -412,9 +656,7 @@ async def search_images(query: str, num_results: int = 3, provider: str = None)
     if not SERPAPI_KEY:
         logger.warning("SERPAPI_KEY environment variable is not set, using fallback image search")
         # Try to get images from both Pexels and Pixabay
-        pexels_images = await search_pexels_images(query, num_results // 2) if PEXELS_API_KEY else []
-        pixabay_images = await search_pixabay_images(query, num_results // 2) if PIXABAY_API_KEY else []
-        return pexels_images + pixabay_images
+        return await _search_stock_images(query, num_results)
         
     url = "https://serpapi.com/search.json"
     params = {
@@ -426,49 +668,74 @@ async def search_images(query: str, num_results: int = 3, provider: str = None)
     }
     
     try:
-        data = await _make_api_request_with_retry(url, params=params)
+        data = await _cached_api_request(("serpapi_images", query, 0), url, params=params)
         
-        images = []
-        for image in data.get("images_results", []):
-            image_url = image.get("original")
-            
-            # Skip if this URL has been used before
-            if image_url in _used_urls:
-                logger.info(f"Skipping duplicate image URL: {image_url}")
-                continue
-            
-            # Mark URL as used
-            _used_urls.add(image_url)
-            
-            images.append({
-                "url": image_url,
-                "thumbnail": image.get("thumbnail"),
-                "width": image.get("original_width"),
-                "height": image.get("original_height"),
-                "source": image.get("source"),
-                "downloadUrl": image_url
-            })
-            
-            # Break if we've collected enough results
-            if len(images) >= num_results:
-                break
-            
-        # Add delay to avoid rate limiting
-        time.sleep(API_DELAY_MS / 1000)
+        images = await _take(_unique_records(data.get("images_results", []), _format_serpapi_image), num_results)
         
         return images
         
     except Exception as e:
         logger.error(f"Error searching images with SerpAPI: {str(e)}")
         # Fall back to Pexels and Pixabay
-        pexels_images = await search_pexels_images(query, num_results // 2) if PEXELS_API_KEY else []
-        pixabay_images = await search_pixabay_images(query, num_results // 2) if PIXABAY_API_KEY else []
-        return pexels_images + pixabay_images
+        return await _search_stock_images(query, num_results)
+
+async def _search_batch(search_fn: Callable[..., Awaitable[Any]], queries: List[str], *args, **kwargs) -> List[Any]:
+    """
+    Run one search per query concurrently.
+    
+    Effective fan-out is bounded by the per-host semaphores in _HOST_SEMAPHORES
+    (e.g. 4 concurrent requests to Pexels). URL dedup is shared across the batch,
+    so a URL appears in at most one query's results; which one depends on completion order.
+    
+    Returns:
+        Results in the same order as queries, with exceptions returned in place
+    """
+    return await asyncio.gather(*(search_fn(query, *args, **kwargs) for query in queries), return_exceptions=True)
+
+async def search_pexels_videos_batch(queries: List[str], per_page: int = 10) -> List[Any]:
+    """
+    Search Pexels videos for several queries concurrently.
+    
+    Args:
+        queries: Search queries
+        per_page: Number of results to return per query
+        
+    Returns:
+        One search_pexels_videos result (or exception) per query
+    """
+    return await _search_batch(search_pexels_videos, queries, per_page)
+
+async def search_pixabay_videos_batch(queries: List[str], per_page: int = 10) -> List[Any]:
+    """
+    Search Pixabay videos for several queries concurrently.
+    
+    Args:
+        queries: Search queries
+        per_page: Number of results to return per query
+        
+    Returns:
+        One search_pixabay_videos result (or exception) per query
+    """
+    return await _search_batch(search_pixabay_videos, queries, per_page)
+
+async def search_images_batch(queries: List[str], num_results: int = 3, provider: str = None) -> List[Any]:
+    """
+    Search images for several queries concurrently.
+    
+    Args:
+        queries: Search queries
+        num_results: Number of results to return per query
+        provider: Optional provider to use (pexels, pixabay)
+        
+    Returns:
+        One search_images result (or exception) per query
+    """
+    return await _search_batch(search_images, queries, num_results, provider)
 
 async def clear_url_cache():
     """Clear the URL cache to allow reusing URLs in a new search session."""
-    global _used_urls
-    _used_urls.clear()
+    async with _used_urls_lock:
+        _used_urls.clear()
     logger.info("URL cache cleared")
 
 async def download_image(image_url: str, output_dir: str = None) -> str:
@@ -496,29 +763,59 @@ async def download_image(image_url: str, output_dir: str = None) -> str:
         # Create full path
         image_path = os.path.join(temp_dir, filename)
         
+        # Revalidate a previous download of the same URL with its ETag
+        request_headers = None
+        cached_etag, cached_path = _download_cache.get(image_url, (None, None))
+        if cached_etag and cached_path and os.path.exists(cached_path):
+            request_headers = {"If-None-Match": cached_etag}
+        
         # Download with retries
+        session = await _get_session()
         retry_count = 0
         while retry_count <= MAX_RETRIES:
             try:
-                response = requests.get(image_url, stream=True, timeout=10)
-                response.raise_for_status()
-                
-                # Save the image
-                with open(image_path, 'wb') as out_file:
-                    shutil.copyfileobj(response.raw, out_file)
+                async with session.get(image_url, headers=request_headers, timeout=DOWNLOAD_TIMEOUT) as response:
+                    if response.status == 304 and request_headers:
+                        logger.info(f"Image unchanged, reusing {cached_path}")
+                        _download_cache.move_to_end(image_url)
+                        if os.path.dirname(cached_path) == os.path.normpath(temp_dir):
+                            return cached_path
+                        await asyncio.to_thread(shutil.copy, cached_path, image_path)
+                        return image_path
+                    
+                    response.raise_for_status()
+                    
+                    # Stream the image to disk, batching network chunks into larger writes
+                    async with aiofiles.open(image_path, 'wb') as out_file:
+                        buffer = bytearray()
+                        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                            buffer += chunk
+                            if len(buffer) >= DOWNLOAD_WRITE_SIZE:
+                                await out_file.write(bytes(buffer))
+                                buffer.clear()
+                        if buffer:
+                            await out_file.write(bytes(buffer))
+                    
+                    # Remember the ETag so a repeat download can be revalidated
+                    etag = response.headers.get("ETag")
+                    if etag:
+                        _download_cache[image_url] = (etag, image_path)
+                        _download_cache.move_to_end(image_url)
+                        while len(_download_cache) > DOWNLOAD_CACHE_MAX_ENTRIES:
+                            _download_cache.popitem(last=False)
                     
                 return image_path
                 
-            except requests.exceptions.RequestException as e:
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 retry_count += 1
                 if retry_count > MAX_RETRIES:
                     logger.error(f"Failed to download image {image_url} after {MAX_RETRIES} retries: {str(e)}")
                     raise
                     
-                # Calculate backoff delay with jitter
-                delay = BASE_RETRY_DELAY * (2 ** retry_count) + random.uniform(0, 1)
+                # Calculate backoff delay with jitter, honouring Retry-After on error responses
+                delay = _backoff_delay(retry_count, _error_retry_after(e))
                 logger.warning(f"Download error: {str(e)}. Backing off for {delay:.2f} seconds before retry {retry_count}/{MAX_RETRIES}")
-                time.sleep(delay)
+                await asyncio.sleep(delay)
                 
     except Exception as e:
         logger.error(f"Error downloading image from {image_url}: {str(e)}")
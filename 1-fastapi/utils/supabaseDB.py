@@ -2,8 +2,17 @@ import os
 import uuid
 import logging
 import json
-from typing import Optional, Dict, Any, List, Union, Literal
-from supabase import create_client, Client
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Set, Union, Literal, Callable
+from supabase import create_client, Client, ClientOptions
+from utils.db_pool import get_pool, records_to_list
+from utils.supabase_storage import supabase_storage, ACCEPT_ENCODING
+from utils.job_events import JOB_PROGRESS_CHANNEL
+from utils.cache import (
+    cache_get, cache_set, cache_delete, job_cache_keys, job_key,
+    processed_count_key, video_segments_completed_key, JOB_CACHE_TTL, COUNTER_CACHE_TTL
+)
 
 from dotenv import load_dotenv
 
@@ -15,12 +24,168 @@ logger = logging.getLogger(__name__)
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
 
+# Buffered created_content inserts are flushed at this size or after this many seconds
+CONTENT_BATCH_SIZE = 50
+CONTENT_BATCH_INTERVAL = 0.5
+
+# Threads available to the blocking supabase-py client
+SUPABASE_THREAD_WORKERS = 32
+_executor = ThreadPoolExecutor(max_workers=SUPABASE_THREAD_WORKERS, thread_name_prefix="supabase")
+
+# Wraps a jobs UPDATE so the same statement publishes the job's new progress
+_NOTIFY_PROGRESS_SQL = (
+    "WITH updated AS ({update} RETURNING id, segment_count, processed_segment_count, video_segments_completed, status) "
+    "SELECT processed_segment_count, video_segments_completed, "
+    f"pg_notify('{JOB_PROGRESS_CHANNEL}', json_build_object("
+    "'job_id', id, 'total', segment_count, 'processed', processed_segment_count, "
+    "'video_segments_completed', video_segments_completed, 'status', status)::text) "
+    "FROM updated"
+)
+
+# Columns settable through _update_job_column, and whether writing them notifies progress listeners
+_JOB_UPDATE_COLUMNS = {
+    "status": True,
+    "error": False,
+    "segment_count": True,
+    "processed_segment_count": True,
+    "total_duration": False,
+    "video_url": False,
+    "video_segments_completed": True,
+    "concatenated_video_status": False
+}
+
+# Maximum number of ids fetched by one loader query
+LOADER_MAX_BATCH_SIZE = 100
+
+def _first(response: Any) -> Optional[Dict[str, Any]]:
+    """
+    First row of a supabase-py response, or None if it returned no rows.
+    """
+    data = response.data
+    return data[0] if data else None
+
+class _RowLoader:
+    """
+    Coalesces lookups by id fired in the same event-loop tick into one
+    SELECT ... WHERE id = ANY($1) query.
+    """
+    def __init__(self, table: str, max_batch_size: int = LOADER_MAX_BATCH_SIZE):
+        self.table = table
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        # Strong references to running flushes; the loop only keeps weak ones
+        self._tasks: Set[asyncio.Task] = set()
+        
+    async def load(self, row_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a row by id.
+        
+        Args:
+            row_id: The row id
+            
+        Returns:
+            Row data or None if not found
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        # Schedule a flush for the first lookup of this tick
+        if not self._pending:
+            loop.call_soon(self._start_flush)
+        self._pending.setdefault(str(row_id), []).append(future)
+        
+        return await future
+        
+    def _start_flush(self) -> None:
+        task = asyncio.get_running_loop().create_task(self._flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        
+    async def _flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        ids = list(pending)
+        
+        for start in range(0, len(ids), self.max_batch_size):
+            chunk = ids[start:start + self.max_batch_size]
+            try:
+                pool = await get_pool()
+                rows = await pool.fetch(f"SELECT * FROM {self.table} WHERE id = ANY($1)", chunk)
+                by_id = {row["id"]: row for row in records_to_list(rows)}
+                for row_id in chunk:
+                    for future in pending[row_id]:
+                        if not future.done():
+                            future.set_result(by_id.get(row_id))
+            except Exception as e:
+                for row_id in chunk:
+                    for future in pending[row_id]:
+                        if not future.done():
+                            future.set_exception(e)
+
 class SupabaseDB:
     def __init__(self):
         if not SUPABASE_URL or not SUPABASE_KEY:
             raise ValueError("Supabase credentials not found in environment variables")
         
-        self.client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.client: Client = create_client(
+            SUPABASE_URL,
+            SUPABASE_KEY,
+            options=ClientOptions(headers={"Accept-Encoding": ACCEPT_ENCODING})
+        )
+        self._job_loader = _RowLoader("jobs")
+        self._content_loader = _RowLoader("created_content")
+        
+    async def _run(self, fn: Callable[[], Any]) -> Any:
+        """
+        Run a blocking supabase-py call on the Supabase thread pool.
+        
+        Args:
+            fn: Zero-argument callable issuing the request
+            
+        Returns:
+            The callable's result
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, fn)
+        
+    async def _update_job_with_notify(self, update_sql: str, *args: Any) -> Optional[Dict[str, Any]]:
+        """
+        Run a jobs UPDATE and notify JOB_PROGRESS_CHANNEL listeners in the same round-trip.
+        
+        Args:
+            update_sql: UPDATE jobs ... WHERE ... statement without a RETURNING clause
+            *args: Query parameters
+            
+        Returns:
+            The job's new processed_segment_count and video_segments_completed,
+            or None if no row matched
+        """
+        pool = await get_pool()
+        row = await pool.fetchrow(_NOTIFY_PROGRESS_SQL.format(update=update_sql), *args)
+        return dict(row) if row is not None else None
+        
+    async def _update_job_column(self, job_id: str, column: str, value: Any) -> None:
+        """
+        Set a single whitelisted jobs column and invalidate the cached job.
+        
+        Each column always produces the same SQL text, so on session-mode
+        connections asyncpg reuses its prepared statement.
+        
+        Args:
+            job_id: The job ID
+            column: Column name, must be a key of _JOB_UPDATE_COLUMNS
+            value: The new value
+        """
+        if column not in _JOB_UPDATE_COLUMNS:
+            raise ValueError(f"Column {column} can't be updated on jobs")
+            
+        update_sql = f"UPDATE jobs SET {column} = $1 WHERE id = $2"
+        if _JOB_UPDATE_COLUMNS[column]:
+            await self._update_job_with_notify(update_sql, value, job_id)
+        else:
+            pool = await get_pool()
+            await pool.execute(update_sql, value, job_id)
+            
+        await cache_delete(*job_cache_keys(job_id))
         
     async def add_img_data(self, public_url: str, job_id: str, prompt: str, provider: str) -> str:
         """
@@ -40,12 +205,12 @@ class SupabaseDB:
             logger.info(f"Uploading image data to Supabase db: {public_url}")
             
             # Upload using the SDK
-            result = self.client.table("images").insert({
+            result = await self._run(lambda: self.client.table("images").insert({
                 "supabase_storage_path": public_url,
                 "job_id": job_id,
                 "prompt": prompt,
                 "provider": provider
-            }).execute()
+            }).execute())
 
             
             logger.info(f"File uploaded successfully: {public_url}")
@@ -65,20 +230,8 @@ class SupabaseDB:
         Returns:
             True if deleted successfully
         """
-        try:
-            # Ensure path is properly formatted
-            path = path.lstrip("/")
-            
-            # Delete the file
-            logger.info(f"Deleting file from Supabase: {path}")
-            
-            self.client.table(self.bucket_name).remove([path])
-            logger.info("File deleted successfully")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error deleting file: {str(e)}")
-            return False
+        # Files live in storage, not in a table
+        return await supabase_storage.delete_file(path)
     
     async def get_img_data(self, job_id: str) -> List[Dict[str, Any]]:
         """
@@ -97,8 +250,9 @@ class SupabaseDB:
             # List records
             logger.info(f"Listing records in Supabase db: {job_id}")
             
-            files = self.client.table("images").select("*").eq("job_id", job_id).execute()
-            return files
+            pool = await get_pool()
+            rows = await pool.fetch("SELECT * FROM images WHERE job_id = $1", job_id)
+            return records_to_list(rows)
             
         except Exception as e:
             logger.error(f"Error listing files: {str(e)}")
@@ -135,15 +289,10 @@ class SupabaseDB:
             if total_duration is not None:
                 job_data["total_duration"] = total_duration
             
-            response = self.client.table("jobs").insert(job_data).execute()
-            
-            # Extract the actual data from the response
-            if hasattr(response, 'data') and response.data:
-                # Return the first result if available
-                return response.data[0] if response.data else {}
+            response = await self._run(lambda: self.client.table("jobs").insert(job_data).execute())
             
-            # Fallback to return full response if data attribute not available
-            return response
+            # Return the first inserted row
+            return _first(response) or {}
         
         except Exception as e:
             logger.error(f"Error creating job: {str(e)}")
@@ -163,13 +312,15 @@ class SupabaseDB:
             # Get job by ID
             logger.info(f"Getting job from Supabase db: {job_id}")
             
-            response = self.client.table("jobs").select("*").eq("id", job_id).execute()
+            # Serve from cache when possible
+            cached = await cache_get(job_key(job_id))
+            if cached is not None:
+                return cached
             
-            # Extract data from response
-            if hasattr(response, 'data') and response.data:
-                return response.data[0] if response.data else None
-            
-            return None
+            job = await self._job_loader.load(job_id)
+            if job is not None:
+                await cache_set(job_key(job_id), job, JOB_CACHE_TTL)
+            return job
             
         except Exception as e:
             logger.error(f"Error getting job: {str(e)}")
@@ -189,9 +340,7 @@ class SupabaseDB:
         try:
             logger.info(f"Updating job status to {status} for job: {job_id}")
             
-            response = self.client.table("jobs").update({
-                "status": status
-            }).eq("id", job_id).execute()
+            await self._update_job_column(job_id, "status", status)
             
             return True
             
@@ -214,9 +363,7 @@ class SupabaseDB:
         try:
             logger.info(f"Updating job error for job: {job_id}")
             
-            response = self.client.table("jobs").update({
-                "error": error
-            }).eq("id", job_id).execute()
+            await self._update_job_column(job_id, "error", error)
             
             return True
             
@@ -232,9 +379,7 @@ class SupabaseDB:
         try:
             logger.info(f"Updating segment count for job: {job_id}")
 
-            response = self.client.table("jobs").update({
-                "segment_count": segment_count
-            }).eq("id", job_id).execute()
+            await self._update_job_column(job_id, "segment_count", segment_count)
             
             return True
         
@@ -274,20 +419,56 @@ class SupabaseDB:
             if duration is not None:
                 record_data["duration"] = duration
             
-            response = self.client.table("created_content").insert(record_data).execute()
-            
-            # Extract the actual data from the response
-            if hasattr(response, 'data') and response.data:
-                # Return the first result if available
-                return response.data[0] if response.data else {}
+            response = await self._run(lambda: self.client.table("created_content").insert(record_data).execute())
             
-            # Fallback to return full response if data attribute not available
-            return response
+            # Return the first inserted row
+            return _first(response) or {}
             
         except Exception as e:
             logger.error(f"Error adding content record: {str(e)}")
             raise
             
+    async def add_content_bulk(self, records: List[Dict[str, Any]]) -> bool:
+        """
+        Insert several created_content records in one round-trip.
+        
+        Args:
+            records: Dicts with supabase_url, job_id, content_type and optional
+                thumbnail/duration keys
+            
+        Returns:
+            True if inserted successfully
+        """
+        if not records:
+            return True
+            
+        try:
+            logger.info(f"Adding {len(records)} content records in bulk")
+            
+            rows = [
+                (r["supabase_url"], r["job_id"], r["content_type"], r.get("thumbnail"), r.get("duration"))
+                for r in records
+            ]
+            
+            pool = await get_pool()
+            await pool.executemany(
+                "INSERT INTO created_content (supabase_url, job_id, content_type, thumbnail, duration) "
+                "VALUES ($1, $2, $3, $4, $5)",
+                rows
+            )
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error adding content records in bulk: {str(e)}")
+            raise
+
+    def content_batcher(self) -> "ContentBatcher":
+        """
+        Create a batcher that coalesces add_content calls into bulk inserts.
+        """
+        return ContentBatcher(self)
+            
     async def get_job_content(self, job_id: str, content_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get content records for a job.
@@ -302,17 +483,17 @@ class SupabaseDB:
         try:
             logger.info(f"Getting content records for job: {job_id}")
             
-            query = self.client.table("created_content").select("*").eq("job_id", job_id)
+            pool = await get_pool()
             
             if content_type:
-                query = query.eq("content_type", content_type)
+                rows = await pool.fetch(
+                    "SELECT * FROM created_content WHERE job_id = $1 AND content_type = $2",
+                    job_id, content_type
+                )
+            else:
+                rows = await pool.fetch("SELECT * FROM created_content WHERE job_id = $1", job_id)
                 
-            response = query.execute()
-            # Extract data from response
-            if hasattr(response, 'data'):
-                return response.data
-            
-            return []
+            return records_to_list(rows)
             
         except Exception as e:
             logger.error(f"Error getting content records: {str(e)}")
@@ -332,9 +513,7 @@ class SupabaseDB:
         try:
             logger.info(f"Updating processed segment count to {processed_count} for job: {job_id}")
             
-            response = self.client.table("jobs").update({
-                "processed_segment_count": processed_count
-            }).eq("id", job_id).execute()
+            await self._update_job_column(job_id, "processed_segment_count", processed_count)
             
             return True
             
@@ -355,11 +534,17 @@ class SupabaseDB:
         try:
             logger.info(f"Getting processed segment count for job: {job_id}")
             
+            cached = await cache_get(processed_count_key(job_id))
+            if cached is not None:
+                return cached
+            
+            count = 0
             job = await self.get_job(job_id)
             if job and "processed_segment_count" in job:
-                return job["processed_segment_count"] or 0
+                count = job["processed_segment_count"] or 0
                 
-            return 0
+            await cache_set(processed_count_key(job_id), count, COUNTER_CACHE_TTL)
+            return count
             
         except Exception as e:
             logger.error(f"Error getting processed segment count: {str(e)}")
@@ -379,14 +564,15 @@ class SupabaseDB:
         try:
             logger.info(f"Incrementing processed segment count for job: {job_id} by {segments_processed}")
             
-            current_count = await self.get_processed_segment_count(job_id)
-            new_count = current_count + segments_processed
+            # Increment in a single statement so concurrent workers don't lose updates
+            row = await self._update_job_with_notify(
+                "UPDATE jobs SET processed_segment_count = COALESCE(processed_segment_count, 0) + $1 WHERE id = $2",
+                segments_processed, job_id
+            )
+            new_count = row["processed_segment_count"] if row else None
+            await cache_delete(*job_cache_keys(job_id))
             
-            result = await self.client.from_("jobs").update({
-                "processed_segment_count": new_count
-            }).eq("id", job_id).execute()
-            
-            if result and hasattr(result, "data") and len(result.data) > 0:
+            if new_count is not None:
                 logger.info(f"Updated processed segment count to {new_count} for job: {job_id}")
                 return True
             else:
@@ -410,13 +596,7 @@ class SupabaseDB:
         try:
             logger.info(f"Getting content record by ID: {content_id}")
             
-            response = self.client.table("created_content").select("*").eq("id", content_id).execute()
-            
-            # Extract data from response
-            if hasattr(response, 'data') and response.data:
-                return response.data[0] if response.data else None
-            
-            return None
+            return await self._content_loader.load(content_id)
             
         except Exception as e:
             logger.error(f"Error getting content record: {str(e)}")
@@ -448,7 +628,13 @@ class SupabaseDB:
             if duration is not None:
                 update_data["duration"] = duration
             
-            response = self.client.table("created_content").update(update_data).eq("id", content_id).execute()
+            # Column names come from the fixed keys above, values are bound as parameters
+            assignments = ", ".join(f"{column} = ${i}" for i, column in enumerate(update_data, start=1))
+            pool = await get_pool()
+            await pool.execute(
+                f"UPDATE created_content SET {assignments} WHERE id = ${len(update_data) + 1}",
+                *update_data.values(), content_id
+            )
             
             return True
             
@@ -470,9 +656,7 @@ class SupabaseDB:
         try:
             logger.info(f"Updating total duration to {total_duration} seconds for job: {job_id}")
             
-            response = self.client.table("jobs").update({
-                "total_duration": total_duration
-            }).eq("id", job_id).execute()
+            await self._update_job_column(job_id, "total_duration", total_duration)
             
             return True
             
@@ -494,9 +678,7 @@ class SupabaseDB:
         try:
             logger.info(f"Updating video URL for job: {job_id}")
             
-            response = self.client.table("jobs").update({
-                "video_url": video_url
-            }).eq("id", job_id).execute()
+            await self._update_job_column(job_id, "video_url", video_url)
             
             return True
             
@@ -518,9 +700,7 @@ class SupabaseDB:
         try:
             logger.info(f"Updating video_segments_completed to {count} for job: {job_id}")
             
-            response = self.client.table("jobs").update({
-                "video_segments_completed": count
-            }).eq("id", job_id).execute()
+            await self._update_job_column(job_id, "video_segments_completed", count)
             
             return True
             
@@ -542,9 +722,7 @@ class SupabaseDB:
         try:
             logger.info(f"Updating concatenated_video_status to {status} for job: {job_id}")
             
-            response = self.client.table("jobs").update({
-                "concatenated_video_status": status
-            }).eq("id", job_id).execute()
+            await self._update_job_column(job_id, "concatenated_video_status", status)
             
             return True
             
@@ -565,11 +743,17 @@ class SupabaseDB:
         try:
             logger.info(f"Getting video segments completed count for job: {job_id}")
             
+            cached = await cache_get(video_segments_completed_key(job_id))
+            if cached is not None:
+                return cached
+            
+            count = 0
             job = await self.get_job(job_id)
             if job and "video_segments_completed" in job:
-                return int(job["video_segments_completed"] or 0)
+                count = int(job["video_segments_completed"] or 0)
                 
-            return 0
+            await cache_set(video_segments_completed_key(job_id), count, COUNTER_CACHE_TTL)
+            return count
             
         except Exception as e:
             logger.error(f"Error getting video segments completed count: {str(e)}")
@@ -589,12 +773,15 @@ class SupabaseDB:
         try:
             logger.info(f"Incrementing video segments completed count for job: {job_id} by {segments_completed}")
             
-            current_count = await self.get_video_segments_completed(job_id)
-            new_count = current_count + segments_completed
-            
-            result = await self.update_video_segments_completed(job_id, new_count)
+            # Increment in a single statement so concurrent workers don't lose updates
+            row = await self._update_job_with_notify(
+                "UPDATE jobs SET video_segments_completed = COALESCE(video_segments_completed, 0) + $1 WHERE id = $2",
+                segments_completed, job_id
+            )
+            new_count = row["video_segments_completed"] if row else None
+            await cache_delete(*job_cache_keys(job_id))
             
-            if result:
+            if new_count is not None:
                 logger.info(f"Updated video segments completed count to {new_count} for job: {job_id}")
                 return True
             else:
@@ -605,6 +792,47 @@ class SupabaseDB:
             logger.error(f"Error incrementing video segments completed count: {str(e)}")
             return False
 
+    async def update_job_progress(self, job_id: str, *, processed_delta: int = 0, video_delta: int = 0,
+                                  status: Optional[int] = None) -> bool:
+        """
+        Advance the job's progress counters (and optionally its status) in one UPDATE.
+        
+        Args:
+            job_id: The job ID
+            processed_delta: Amount to add to processed_segment_count
+            video_delta: Amount to add to video_segments_completed
+            status: Optional new job status
+            
+        Returns:
+            True if updated successfully
+        """
+        try:
+            logger.info(f"Updating progress for job: {job_id} (processed +{processed_delta}, video +{video_delta}, status {status})")
+            
+            sets, args = [], []
+            if processed_delta:
+                args.append(processed_delta)
+                sets.append(f"processed_segment_count = COALESCE(processed_segment_count, 0) + ${len(args)}")
+            if video_delta:
+                args.append(video_delta)
+                sets.append(f"video_segments_completed = COALESCE(video_segments_completed, 0) + ${len(args)}")
+            if status is not None:
+                args.append(status)
+                sets.append(f"status = ${len(args)}")
+                
+            if not sets:
+                return True
+                
+            args.append(job_id)
+            await self._update_job_with_notify(f"UPDATE jobs SET {', '.join(sets)} WHERE id = ${len(args)}", *args)
+            await cache_delete(*job_cache_keys(job_id))
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error updating job progress: {str(e)}")
+            return False
+
     async def update_job_result(self, job_id: str, result_data: Dict[str, Any]) -> bool:
         """
         Update the job result data in Supabase db.
@@ -622,9 +850,10 @@ class SupabaseDB:
             # Serialize result data to JSON string
             result_json = json.dumps(result_data)
             
-            response = self.client.table("jobs").update({
+            response = await self._run(lambda: self.client.table("jobs").update({
                 "result": result_json
-            }).eq("id", job_id).execute()
+            }).eq("id", job_id).execute())
+            await cache_delete(*job_cache_keys(job_id))
             
             return True
             
@@ -669,17 +898,89 @@ class SupabaseDB:
             if json_data:
                 record_data["json_data"] = json_data
             
-            response = self.client.table("content_segments").insert(record_data).execute()
-            
-            # Extract the actual data from the response
-            if hasattr(response, 'data') and response.data:
-                return response.data[0] if response.data else {}
+            response = await self._run(lambda: self.client.table("content_segments").insert(record_data).execute())
             
-            return response
+            # Return the first inserted row
+            return _first(response) or {}
             
         except Exception as e:
             logger.error(f"Error creating content record: {str(e)}")
             raise
 
+class ContentBatcher:
+    """
+    Buffers created_content records and writes them with add_content_bulk.
+    
+    Records are flushed once CONTENT_BATCH_SIZE are pending, or
+    CONTENT_BATCH_INTERVAL seconds after the first one was buffered.
+    A failed flush keeps its records for the next one, and close() raises
+    if they still can't be written, so callers never lose rows silently.
+    Flushes are serialized, so close() also waits for one already in flight.
+    """
+    def __init__(self, db: SupabaseDB, batch_size: int = CONTENT_BATCH_SIZE,
+                 interval: float = CONTENT_BATCH_INTERVAL):
+        self.db = db
+        self.batch_size = batch_size
+        self.interval = interval
+        self._records: List[Dict[str, Any]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        
+    async def add(self, supabase_url: str, job_id: str, content_type: str,
+                  thumbnail: Optional[str] = None, duration: Optional[float] = None) -> None:
+        """
+        Buffer a created_content record. Takes the same arguments as add_content.
+        """
+        self._records.append({
+            "supabase_url": supabase_url,
+            "job_id": job_id,
+            "content_type": content_type,
+            "thumbnail": thumbnail or None,
+            "duration": duration
+        })
+        
+        if len(self._records) >= self.batch_size:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+            
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.interval)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            # Records were kept; the next flush or close() retries them
+            logger.error(f"Error flushing content batch, will retry: {str(e)}")
+            
+    async def flush(self) -> None:
+        """
+        Write all buffered records now.
+        """
+        # Cancel the pending timer; it only ever cancels while still sleeping
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+            
+        # Wait for an in-flight flush so its failed records are seen here
+        async with self._flush_lock:
+            records, self._records = self._records, []
+            try:
+                await self.db.add_content_bulk(records)
+            except Exception:
+                # The bulk insert is atomic, so put the whole batch back in order
+                self._records[:0] = records
+                raise
+                
+    async def close(self) -> None:
+        """
+        Wait for any in-flight flush, then flush the remaining records,
+        including ones from failed timer flushes.
+        
+        Raises:
+            Exception: If the remaining records can't be written
+        """
+        await self.flush()
+
 # Create a singleton instance
 supabase_db = SupabaseDB() 
\ No newline at end of file
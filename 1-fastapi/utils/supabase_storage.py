@@ -1,8 +1,12 @@
 import os
 import uuid
 import logging
-from typing import Optional, Dict, Any, List, Union
-from supabase import create_client, Client
+import asyncio
+from typing import Optional, Dict, Any, List, Union, AsyncIterator
+from pathlib import Path
+from supabase import create_client, Client, ClientOptions
+import httpx
+import aiofiles
 
 from dotenv import load_dotenv
 
@@ -15,52 +19,123 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
 SUPABASE_STORAGE_BUCKET = os.getenv("SUPABASE_STORAGE_BUCKET", "video-assets")
 
+# Ask Supabase for compressed responses (br decoding needs the brotli package)
+ACCEPT_ENCODING = "gzip, br"
+
+# Maximum number of uploads in flight at once
+UPLOAD_CONCURRENCY = 32
+
+# Read size when streaming a file from disk
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Objects requested per page when listing a folder
+LIST_PAGE_SIZE = 1000
+
 class SupabaseStorage:
     def __init__(self):
         if not SUPABASE_URL or not SUPABASE_KEY:
             raise ValueError("Supabase credentials not found in environment variables")
         
-        self.client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.client: Client = create_client(
+            SUPABASE_URL,
+            SUPABASE_KEY,
+            options=ClientOptions(headers={"Accept-Encoding": ACCEPT_ENCODING})
+        )
         self.bucket_name = SUPABASE_STORAGE_BUCKET
         
-    async def upload_file(self, file_content: bytes, file_name: Optional[str] = None, 
-                    folder: str = "", content_type: Optional[str] = None) -> str:
+        # Keep-alive HTTP client for storage uploads, shared across requests
+        self._http = httpx.AsyncClient(
+            base_url=f"{SUPABASE_URL}/storage/v1",
+            headers={
+                "apikey": SUPABASE_KEY,
+                "Authorization": f"Bearer {SUPABASE_KEY}",
+                "Accept-Encoding": ACCEPT_ENCODING
+            },
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30),
+            timeout=httpx.Timeout(120.0, connect=10.0),
+            http2=True
+        )
+        self._upload_semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+        
+    async def create_signed_upload_url(self, path: str) -> str:
+        """
+        Create a signed URL that accepts a single upload to the given path.
+        
+        Args:
+            path: Path to the file within the bucket
+            
+        Returns:
+            The signed upload URL, relative to the storage API
+        """
+        path = path.lstrip("/")
+        response = await self._http.post(f"/object/upload/sign/{self.bucket_name}/{path}")
+        response.raise_for_status()
+        return response.json()["url"]
+        
+    async def _iter_file(self, file_path: Union[str, Path]) -> AsyncIterator[bytes]:
+        async with aiofiles.open(file_path, "rb") as f:
+            while chunk := await f.read(UPLOAD_CHUNK_SIZE):
+                yield chunk
+                
+    async def upload_file(self, file_content: Optional[bytes] = None, file_name: Optional[str] = None, 
+                    folder: str = "", content_type: Optional[str] = None,
+                    file_path: Optional[Union[str, Path]] = None, ext: Optional[str] = None) -> str:
         """
         Upload a file to Supabase Storage.
         
+        Pass either file_content or file_path. A file_path is streamed from disk
+        to a signed upload URL, so large media is never held in memory.
+        
         Args:
             file_content: The binary content of the file
             file_name: Optional filename (will generate a UUID if not provided)
             folder: Optional folder path within the bucket
             content_type: Optional MIME type
+            file_path: Optional local file to stream instead of file_content
+            ext: Optional extension (e.g. ".mp4") for generated filenames;
+                defaults to file_path's extension
             
         Returns:
             The URL of the uploaded file
         """
         try:
+            if file_content is None and file_path is None:
+                raise ValueError("Either file_content or file_path must be provided")
+                
             # Generate a unique filename if not provided
             if not file_name:
-                ext = os.path.splitext(file_name)[1] if file_name else ""
-                file_name = f"{uuid.uuid4()}{ext}"
+                if ext is None:
+                    ext = os.path.splitext(str(file_path))[1] if file_path is not None else ""
+                file_name = f"{uuid.uuid4().hex}{ext}"
                 
             # Create path
             path = f"{folder}/{file_name}" if folder else file_name
             path = path.lstrip("/")
             
-            # Upload options
-            file_options = {}
+            # Upload headers
+            headers = {}
             if content_type:
-                file_options["contentType"] = content_type
+                headers["Content-Type"] = content_type
                 
             # Upload the file
             logger.info(f"Uploading file to Supabase: {path}")
             
-            # Upload using the SDK
-            result = self.client.storage.from_(self.bucket_name).upload(
-                path,
-                file_content,
-                file_options
-            )
+            async with self._upload_semaphore:
+                if file_path is not None:
+                    signed_url = await self.create_signed_upload_url(path)
+                    headers["Content-Length"] = str(os.path.getsize(file_path))
+                    response = await self._http.put(
+                        signed_url,
+                        content=self._iter_file(file_path),
+                        headers=headers
+                    )
+                else:
+                    response = await self._http.post(
+                        f"/object/{self.bucket_name}/{path}",
+                        content=file_content,
+                        headers=headers
+                    )
+            response.raise_for_status()
             
             # Return the public URL
             public_url = self.client.storage.from_(self.bucket_name).get_public_url(path)
@@ -98,6 +173,33 @@ class SupabaseStorage:
             logger.error(f"Error deleting file: {str(e)}")
             return False
     
+    async def delete_files_bulk(self, paths: List[str]) -> bool:
+        """
+        Delete several files from Supabase Storage in one request.
+        
+        Args:
+            paths: Paths to the files within the bucket
+            
+        Returns:
+            True if deleted successfully
+        """
+        if not paths:
+            return True
+            
+        try:
+            # Ensure paths are properly formatted
+            paths = [path.lstrip("/") for path in paths]
+            
+            logger.info(f"Deleting {len(paths)} files from Supabase")
+            
+            await asyncio.to_thread(self.client.storage.from_(self.bucket_name).remove, paths)
+            logger.info("Files deleted successfully")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting files: {str(e)}")
+            return False
+    
     async def list_files(self, folder: str = "") -> List[Dict[str, Any]]:
         """
         List files in a folder.
@@ -115,14 +217,39 @@ class SupabaseStorage:
             # List files
             logger.info(f"Listing files in Supabase folder: {folder}")
             
-            search_options = {"prefix": folder} if folder else None
-            files = self.client.storage.from_(self.bucket_name).list(search_options)
-            return files
+            return [file async for file in self.iter_files(folder)]
             
         except Exception as e:
             logger.error(f"Error listing files: {str(e)}")
             return []
     
+    async def iter_files(self, folder: str = "", page_size: int = LIST_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over the files in a folder, fetching one page at a time.
+        
+        Args:
+            folder: Folder path within the bucket
+            page_size: Number of objects requested per page
+            
+        Yields:
+            File objects
+        """
+        folder = folder.lstrip("/")
+        bucket = self.client.storage.from_(self.bucket_name)
+        offset = 0
+        
+        while True:
+            batch = await asyncio.to_thread(bucket.list, folder, {"limit": page_size, "offset": offset})
+            if not batch:
+                return
+                
+            for file in batch:
+                yield file
+                
+            if len(batch) < page_size:
+                return
+            offset += page_size
+    
     async def get_file_url(self, path: str) -> str:
         """
         Get the public URL for a file.
@@ -170,10 +297,6 @@ class SupabaseStorage:
             if not destination_filename:
                 destination_filename = os.path.basename(local_path)
             
-            # Read the file content
-            with open(local_path, 'rb') as f:
-                file_content = f.read()
-                
             # Determine content type based on file extension
             content_type = None
             ext = os.path.splitext(destination_filename)[1].lower()
@@ -188,7 +311,7 @@ class SupabaseStorage:
             
             # Use the upload_file method to upload
             return await self.upload_file(
-                file_content=file_content,
+                file_path=local_path,
                 file_name=destination_filename,
                 folder="images",
                 content_type=content_type
@@ -198,5 +321,11 @@ class SupabaseStorage:
             logger.error(f"Error uploading image: {str(e)}")
             raise
 
+    async def close(self) -> None:
+        """
+        Close the shared HTTP client. Called on application shutdown.
+        """
+        await self._http.aclose()
+
 # Create a singleton instance
 supabase_storage = SupabaseStorage() 
\ No newline at end of file
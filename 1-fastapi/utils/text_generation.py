@@ -1,8 +1,14 @@
 import os
+import json
 import logging
 import time
+import random
+import asyncio
+from collections import deque
 import openai
-from typing import Dict, Any, Optional
+import httpx
+from openai import AsyncOpenAI
+from typing import Dict, Any, Optional, List
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -12,11 +18,108 @@ logger = logging.getLogger(__name__)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 # Rate limiting settings
-RATE_LIMIT_CALLS = 5       # Number of calls allowed
+RATE_LIMIT_CALLS = int(os.getenv("OPENAI_TEXT_RATE_LIMIT_CALLS", "60"))  # Number of calls allowed
 RATE_LIMIT_PERIOD = 60     # In seconds (1 minute)
 
-# Keep track of API calls for rate limiting
-api_call_timestamps = []
+# Prompts combined into one request by generate_texts, and the completion budget per prompt
+TEXT_BATCH_SIZE = 20
+TEXT_BATCH_TOKENS_PER_PROMPT = 200
+
+SYSTEM_MESSAGE = "You are a helpful assistant."
+
+# Retry settings for 429 responses
+MAX_RETRIES = 5
+MAX_RETRY_DELAY = 30
+
+# Caps concurrent requests; the deque holds start times of recent calls
+_semaphore = asyncio.Semaphore(RATE_LIMIT_CALLS)
+_call_timestamps = deque()
+
+# Shared OpenAI client, created lazily on first use
+_client: Optional[AsyncOpenAI] = None
+
+def _get_client() -> AsyncOpenAI:
+    """
+    Get the shared AsyncOpenAI client, creating it on first use.
+    
+    Returns:
+        The module-wide AsyncOpenAI client
+    """
+    global _client
+    if _client is None:
+        # Retries are handled in generate_text, so disable the SDK's own retry loop
+        _client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60),
+                timeout=httpx.Timeout(60.0)
+            )
+        )
+    return _client
+
+async def close_client() -> None:
+    """
+    Close the shared OpenAI client. Called on application shutdown.
+    """
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+async def _wait_for_rate_limit() -> None:
+    """
+    Sleep until another call fits in the RATE_LIMIT_CALLS / RATE_LIMIT_PERIOD window.
+    """
+    while True:
+        now = time.monotonic()
+        while _call_timestamps and _call_timestamps[0] <= now - RATE_LIMIT_PERIOD:
+            _call_timestamps.popleft()
+            
+        if len(_call_timestamps) < RATE_LIMIT_CALLS:
+            _call_timestamps.append(now)
+            return
+            
+        wait_time = RATE_LIMIT_PERIOD - (now - _call_timestamps[0])
+        logger.info(f"Text generation rate limit reached, waiting {wait_time:.1f}s")
+        await asyncio.sleep(wait_time)
+
+def _retry_delay(error: openai.RateLimitError, attempt: int) -> float:
+    # Honour Retry-After when the API sends it, otherwise back off exponentially with jitter
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_RETRY_DELAY)
+        except ValueError:
+            pass
+    return min(2 ** attempt + random.random(), MAX_RETRY_DELAY)
+
+async def _complete(**params: Any) -> str:
+    """
+    Run one chat completion under the rate limiter, retrying on 429s.
+    
+    Args:
+        **params: Arguments for chat.completions.create
+        
+    Returns:
+        The message content of the first choice
+    """
+    async with _semaphore:
+        await _wait_for_rate_limit()
+        
+        for attempt in range(MAX_RETRIES):
+            try:
+                response = await _get_client().chat.completions.create(**params)
+                return response.choices[0].message.content
+                
+            except openai.RateLimitError as e:
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                delay = _retry_delay(e, attempt)
+                logger.warning(f"Text generation rate limited (attempt {attempt + 1}/{MAX_RETRIES}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
 
 async def generate_text(prompt: str, model: str = "gpt-4o-mini") -> str:
     """
@@ -32,21 +135,66 @@ async def generate_text(prompt: str, model: str = "gpt-4o-mini") -> str:
     if not OPENAI_API_KEY:
         raise ValueError("OPENAI_API_KEY environment variable is not set")
     
-    openai.api_key = OPENAI_API_KEY
-    
     try:
-        response = openai.chat.completions.create(
+        content = await _complete(
             model=model,
             messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "system", "content": SYSTEM_MESSAGE},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=1000,
             temperature=0.7
         )
-        
-        return response.choices[0].message.content.strip()
+        return content.strip()
         
     except Exception as e:
         logger.error(f"Error generating text: {str(e)}")
-        raise 
\ No newline at end of file
+        raise 
+
+async def _generate_text_batch(prompts: List[str], model: str) -> List[str]:
+    content = await _complete(
+        model=model,
+        messages=[
+            {"role": "system", "content": SYSTEM_MESSAGE},
+            {"role": "user", "content": (
+                'Answer each prompt below independently. Return a JSON object of the form '
+                '{"responses": [...]} with exactly one string per prompt, in the same order.\n'
+                + json.dumps(prompts)
+            )}
+        ],
+        response_format={"type": "json_object"},
+        max_tokens=TEXT_BATCH_TOKENS_PER_PROMPT * len(prompts),
+        temperature=0.7
+    )
+    
+    responses = json.loads(content).get("responses")
+    if not isinstance(responses, list) or len(responses) != len(prompts):
+        raise ValueError(f"Expected {len(prompts)} responses, got {len(responses) if isinstance(responses, list) else 'none'}")
+    return [str(response).strip() for response in responses]
+
+async def generate_texts(prompts: List[str], model: str = "gpt-4o-mini") -> List[str]:
+    """
+    Generate text for several prompts, packing up to TEXT_BATCH_SIZE prompts into each request.
+    
+    A batch whose reply can't be parsed is retried prompt by prompt with generate_text.
+    
+    Args:
+        prompts: Text prompts for generation
+        model: OpenAI model name
+        
+    Returns:
+        Generated text for each prompt, in order
+    """
+    if not OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+    
+    async def run_batch(batch: List[str]) -> List[str]:
+        try:
+            return await _generate_text_batch(batch, model)
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Batched text generation failed, falling back to single prompts: {str(e)}")
+            return list(await asyncio.gather(*(generate_text(prompt, model) for prompt in batch)))
+    
+    batches = [prompts[i:i + TEXT_BATCH_SIZE] for i in range(0, len(prompts), TEXT_BATCH_SIZE)]
+    results = await asyncio.gather(*(run_batch(batch) for batch in batches))
+    return [text for batch_results in results for text in batch_results]
@@ -1,16 +1,22 @@
 import os
 import logging
 import subprocess
-import json
 import tempfile
 import shutil
 from pathlib import Path
 from typing import Dict, Any, List, Tuple, Optional
 import time
 import asyncio
-import requests
+import httpx
+import aiofiles
 import math
+import hashlib
 import uuid
+from dataclasses import dataclass
+from collections import OrderedDict
+from functools import lru_cache
+from contextlib import suppress
+import av
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,6 +36,477 @@ PIX_FMT = "yuv420p"  # Crucial for compatibility
 AUDIO_CODEC = "aac"
 AUDIO_BITRATE = "128k"
 
+# Hardware H.264 encoders in order of preference; libx264 is the fallback.
+# Set VIDEO_ENCODER to force one (e.g. "libx264" to disable hardware encoding).
+HW_ENCODERS = ["h264_nvenc", "h264_qsv", "h264_videotoolbox", "h264_amf"]
+VIDEO_ENCODER = os.getenv("VIDEO_ENCODER")
+VIDEOTOOLBOX_QUALITY = "55"  # -q:v 1-100, roughly CRF 28
+
+# Concurrent ffmpeg processes, and the encoder threads each one gets, so that
+# parallel jobs share the cores instead of each spawning a pool sized to all of them
+FFMPEG_POOL_SIZE = max(1, int(os.getenv("FFMPEG_POOL_SIZE", "4")))
+THREADS_PER_FFMPEG = max(1, (os.cpu_count() or 4) // FFMPEG_POOL_SIZE)
+_ffmpeg_semaphore = asyncio.Semaphore(FFMPEG_POOL_SIZE)
+
+# Encoded one-second still-image GOPs, keyed by image content and target size
+GOP_CACHE_DIR = Path(tempfile.gettempdir()) / "gopcache"
+GOP_CACHE_MAX_BYTES = int(os.getenv("GOP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Images encoded per ffmpeg process by batch conversions; bounds the command length
+IMAGE_BATCH_SIZE = 16
+
+# Rasterized SVGs, keyed by SVG content and target size
+SVG_CACHE_DIR = Path(tempfile.gettempdir()) / "svgcache"
+SVG_CACHE_MAX_BYTES = int(os.getenv("SVG_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+
+# Downloads stream in large chunks; small reads dominate transfer time
+DOWNLOAD_CHUNK_SIZE = 128 * 1024
+
+# Shared HTTP client for source downloads, created lazily on first use so
+# repeated downloads from the same origin reuse TLS sessions and HTTP/2 streams
+_client: Optional[httpx.AsyncClient] = None
+
+# Probe results keyed by (abspath, mtime_ns, size), so a rewritten file is probed again
+PROBE_CACHE_MAX_ENTRIES = 1024
+_probe_cache: "OrderedDict[Tuple[str, int, int], ProbeInfo]" = OrderedDict()
+# Probes in flight, so concurrent callers for the same file share one probe
+_probe_inflight: "Dict[Tuple[str, int, int], asyncio.Task]" = {}
+
+# Video filters built once; callers only append their per-call suffix
+_SCALE_PAD = (
+    f"scale={TARGET_WIDTH}:{TARGET_HEIGHT}:force_original_aspect_ratio=decrease,"
+    f"pad={TARGET_WIDTH}:{TARGET_HEIGHT}:(ow-iw)/2:(oh-ih)/2"
+)
+_SCALE_PAD_FPS = f"{_SCALE_PAD},fps={TARGET_FPS}"
+
+# Per-input normalization shared by every clip of a fused concatenation
+_CLIP_VIDEO_FILTER = f"{_SCALE_PAD_FPS},setsar=1,format={PIX_FMT}"
+_CLIP_AUDIO_FORMAT = f"aformat=sample_rates={TARGET_AUDIO_RATE}:channel_layouts=stereo"
+
+@dataclass
+class ProbeInfo:
+    """Container metadata read in one pass."""
+    width: Optional[int]
+    height: Optional[int]
+    duration: float
+    has_video: bool
+    has_audio: bool
+    # Stream parameters that must match for a stream-copy concat
+    video_codec: Optional[str] = None
+    pix_fmt: Optional[str] = None
+    frame_rate: Optional[str] = None
+    audio_codec: Optional[str] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    
+    def stream_signature(self) -> Tuple:
+        return (
+            self.width, self.height, self.video_codec, self.pix_fmt, self.frame_rate,
+            self.has_audio, self.audio_codec, self.sample_rate, self.channels
+        )
+
+@dataclass
+class ClipSource:
+    """A raw source and the duration it should occupy in the final video."""
+    path: str
+    target_duration: float
+    is_image: bool = False
+
+@lru_cache(maxsize=None)
+def detect_video_encoder() -> str:
+    """
+    Pick the H.264 encoder used for every encode, probing ffmpeg once.
+    
+    An encoder listed by `ffmpeg -encoders` may still lack a device or
+    driver, so each candidate is confirmed with a tiny test encode.
+    
+    Returns:
+        The ffmpeg encoder name
+    """
+    if VIDEO_ENCODER:
+        logger.info(f"Using configured video encoder: {VIDEO_ENCODER}")
+        return VIDEO_ENCODER
+        
+    try:
+        listing = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"Could not list ffmpeg encoders ({str(e)}), using libx264")
+        return "libx264"
+        
+    for encoder in HW_ENCODERS:
+        if encoder not in listing:
+            continue
+        try:
+            test = subprocess.run(
+                [
+                    "ffmpeg", "-hide_banner", "-v", "error",
+                    "-f", "lavfi", "-i", "color=black:s=256x256:d=0.1",
+                    "-c:v", encoder, "-pix_fmt", PIX_FMT, "-f", "null", "-"
+                ],
+                capture_output=True, timeout=15
+            )
+        except (OSError, subprocess.SubprocessError):
+            continue
+        if test.returncode == 0:
+            logger.info(f"Using hardware video encoder: {encoder}")
+            return encoder
+            
+    logger.info("No hardware video encoder available, using libx264")
+    return "libx264"
+
+def _video_encoder_args(preset: str, crf: str, tune: Optional[str] = None) -> List[str]:
+    """
+    Encoder arguments for the detected encoder at roughly equivalent quality.
+    
+    Args:
+        preset: libx264 preset
+        crf: libx264 CRF, reused as the constant-quality target where supported
+        tune: libx264 tune, ignored by hardware encoders
+        
+    Returns:
+        ffmpeg output arguments for -threads and -c:v
+    """
+    encoder = detect_video_encoder()
+    threads = ["-threads", str(THREADS_PER_FFMPEG)]
+    if encoder == "h264_nvenc":
+        return threads + ["-c:v", encoder, "-preset", "p4", "-rc:v", "vbr", "-cq", crf, "-b:v", "0"]
+    if encoder == "h264_qsv":
+        return threads + ["-c:v", encoder, "-preset", preset, "-global_quality", crf]
+    if encoder == "h264_videotoolbox":
+        return threads + ["-c:v", encoder, "-q:v", VIDEOTOOLBOX_QUALITY]
+    if encoder == "h264_amf":
+        return threads + ["-c:v", encoder, "-quality", "balanced", "-rc", "cqp", "-qp_i", crf, "-qp_p", crf]
+        
+    args = threads + ["-c:v", encoder]
+    if tune and encoder == "libx264":
+        args.extend(["-tune", tune])
+    return args + ["-preset", preset, "-crf", crf]
+
+async def _run_ffmpeg(cmd: List[str]) -> Tuple[int, bytes, bytes]:
+    """
+    Run an ffmpeg command, waiting for a free slot in the process pool.
+    
+    Args:
+        cmd: The full command line
+        
+    Returns:
+        Return code, stdout and stderr
+    """
+    async with _ffmpeg_semaphore:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        
+        stdout, stderr = await process.communicate()
+        return process.returncode, stdout, stderr
+
+def _av_extract_frame(input_path: str, output_path: str) -> None:
+    with av.open(input_path) as source:
+        # A bare StopIteration can't cross asyncio.to_thread, so raise a real error
+        frame = next(source.decode(video=0), None)
+        if frame is None:
+            raise ValueError(f"No decodable video frame in {input_path}")
+        with av.open(output_path, "w", format="image2") as output:
+            stream = output.add_stream("png")
+            stream.width = frame.width
+            stream.height = frame.height
+            stream.pix_fmt = "rgb24"
+            for packet in stream.encode(frame.reformat(format="rgb24")):
+                output.mux(packet)
+            for packet in stream.encode():
+                output.mux(packet)
+
+async def _extract_first_frame(input_path: str, output_path: str) -> Tuple[int, bytes, bytes]:
+    """
+    Save the first video frame as a PNG.
+    
+    Decoding one frame doesn't need a filter graph, so it runs in-process with
+    PyAV (already loaded for probing) instead of paying for an ffmpeg spawn.
+    Falls back to the ffmpeg CLI for inputs PyAV can't decode.
+    
+    Args:
+        input_path: Path to the video file
+        output_path: Path to save the frame
+        
+    Returns:
+        Return code, stdout and stderr, as from _run_ffmpeg
+    """
+    try:
+        async with _ffmpeg_semaphore:
+            await asyncio.to_thread(_av_extract_frame, input_path, output_path)
+        return 0, b"", b""
+    except (av.error.FFmpegError, ValueError) as e:
+        logger.warning(f"PyAV could not extract a frame from {input_path} ({str(e)}), falling back to ffmpeg")
+        
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i", input_path,
+        "-vframes", "1",
+        output_path
+    ]
+    return await _run_ffmpeg(cmd)
+
+def _write_concat_list(paths: List[str]) -> str:
+    """
+    Write a concat demuxer list file for paths and return its path.
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        for path in paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+        return f.name
+
+def _av_concat_copy(input_paths: List[str], output_path: str, duration: Optional[float], faststart: bool) -> None:
+    options = {"movflags": "+faststart"} if faststart else {}
+    with av.open(output_path, "w", options=options) as output:
+        out_streams: Dict[str, Any] = {}
+        last_dts: Dict[str, float] = {}
+        # Seconds written so far; each input's timestamps are shifted past them
+        offset = 0.0
+        for path in input_paths:
+            with av.open(path) as source:
+                streams = [*source.streams.video[:1], *source.streams.audio[:1]]
+                if not out_streams:
+                    out_streams = {stream.type: output.add_stream_from_template(stream) for stream in streams}
+                start = source.start_time / av.time_base if source.start_time else 0.0
+                end = offset
+                
+                for packet in source.demux(streams):
+                    out_stream = out_streams.get(packet.stream.type)
+                    # Skip demuxer flush packets and streams the first input doesn't have
+                    if packet.pts is None or packet.dts is None or out_stream is None:
+                        continue
+                    time_base = packet.time_base
+                    shift = round((offset - start) / time_base)
+                    if duration is not None and (packet.pts + shift) * time_base >= duration:
+                        continue
+                    # Drop packets that overlap the previous input, such as AAC priming
+                    dts = float((packet.dts + shift) * time_base)
+                    if dts <= last_dts.get(packet.stream.type, float("-inf")):
+                        continue
+                    last_dts[packet.stream.type] = dts
+                    packet.pts += shift
+                    packet.dts += shift
+                    end = max(end, float((packet.pts + packet.duration) * time_base))
+                    packet.stream = out_stream
+                    output.mux(packet)
+                    
+            offset = end
+            if duration is not None and offset >= duration:
+                break
+
+async def _concat_copy(
+    input_paths: List[str],
+    output_path: str,
+    duration: Optional[float] = None,
+    faststart: bool = False
+) -> Tuple[int, bytes, bytes]:
+    """
+    Join files with matching streams back to back without re-encoding.
+    
+    Like _extract_first_frame, a stream copy needs no filter graph, so it is
+    remuxed in-process with PyAV instead of paying for an ffmpeg spawn, and
+    falls back to the concat demuxer of the ffmpeg CLI if PyAV fails.
+    
+    Args:
+        input_paths: Files to join, in order
+        output_path: Path to save the joined file
+        duration: Optional length in seconds to stop at
+        faststart: Move the index to the front for progressive playback
+        
+    Returns:
+        Return code, stdout and stderr, as from _run_ffmpeg
+    """
+    try:
+        async with _ffmpeg_semaphore:
+            await asyncio.to_thread(_av_concat_copy, input_paths, output_path, duration, faststart)
+        return 0, b"", b""
+    except (av.error.FFmpegError, ValueError) as e:
+        logger.warning(f"PyAV could not stream-copy into {output_path} ({str(e)}), falling back to ffmpeg")
+        
+    list_file = _write_concat_list(input_paths)
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-f", "concat",
+        "-safe", "0",
+        "-i", list_file,
+        *(["-t", str(duration)] if duration is not None else []),
+        "-c", "copy",
+        *(["-movflags", "+faststart"] if faststart else []),
+        output_path
+    ]
+    
+    logger.info(f"Concatenating with stream copy: {' '.join(cmd)}")
+    
+    try:
+        return await _run_ffmpeg(cmd)
+    finally:
+        os.unlink(list_file)
+
+async def _ffprobe(path: str) -> ProbeInfo:
+    """
+    Probe a media file with the ffprobe CLI. Fallback for containers PyAV can't open.
+    
+    Args:
+        path: Path to the media file
+        
+    Returns:
+        ProbeInfo for the file
+    """
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration:stream=codec_type,codec_name,width,height,pix_fmt,r_frame_rate,sample_rate,channels",
+        "-of", "default",
+        path
+    ]
+    
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    
+    stdout, stderr = await process.communicate()
+    
+    if process.returncode != 0:
+        error_msg = stderr.decode().strip() if stderr else "Unknown error"
+        raise ValueError(f"ffprobe failed: {error_msg}")
+        
+    # Plain key=value lines grouped by [STREAM]/[FORMAT] headers
+    streams: List[Dict[str, str]] = []
+    media_format: Dict[str, str] = {}
+    section: Dict[str, str] = {}
+    for line in stdout.decode().splitlines():
+        if line == "[STREAM]":
+            section = {}
+            streams.append(section)
+        elif line == "[FORMAT]":
+            section = media_format
+        elif "=" in line:
+            key, value = line.split("=", 1)
+            if value != "N/A":
+                section[key] = value
+                
+    video = next((stream for stream in streams if stream.get("codec_type") == "video"), None)
+    audio = next((stream for stream in streams if stream.get("codec_type") == "audio"), None)
+    
+    def as_int(stream: Optional[Dict[str, str]], key: str) -> Optional[int]:
+        return int(stream[key]) if stream and stream.get(key) else None
+        
+    return ProbeInfo(
+        width=as_int(video, "width"),
+        height=as_int(video, "height"),
+        duration=float(media_format.get("duration") or 0),
+        has_video=video is not None,
+        has_audio=audio is not None,
+        video_codec=video.get("codec_name") if video else None,
+        pix_fmt=video.get("pix_fmt") if video else None,
+        frame_rate=video.get("r_frame_rate") if video else None,
+        audio_codec=audio.get("codec_name") if audio else None,
+        sample_rate=as_int(audio, "sample_rate"),
+        channels=as_int(audio, "channels")
+    )
+
+def _av_probe(path: str) -> ProbeInfo:
+    with av.open(path, metadata_errors="ignore") as container:
+        video = container.streams.video[0] if container.streams.video else None
+        audio = container.streams.audio[0] if container.streams.audio else None
+        frame_rate = video.average_rate if video else None
+        return ProbeInfo(
+            width=video.codec_context.width if video else None,
+            height=video.codec_context.height if video else None,
+            duration=container.duration / av.time_base if container.duration else 0.0,
+            has_video=video is not None,
+            has_audio=audio is not None,
+            video_codec=video.codec_context.name if video else None,
+            pix_fmt=video.codec_context.pix_fmt if video else None,
+            frame_rate=f"{frame_rate.numerator}/{frame_rate.denominator}" if frame_rate else None,
+            audio_codec=audio.codec_context.name if audio else None,
+            sample_rate=audio.codec_context.sample_rate if audio else None,
+            channels=audio.codec_context.channels if audio else None
+        )
+
+async def _probe(path: str) -> ProbeInfo:
+    """
+    Read dimensions, duration and stream layout of a media file in-process with PyAV.
+    
+    The container is opened on a worker thread so the event loop keeps running.
+    
+    Args:
+        path: Path to the media file
+        
+    Returns:
+        ProbeInfo for the file
+    """
+    try:
+        return await asyncio.to_thread(_av_probe, path)
+    except av.error.FFmpegError as e:
+        logger.warning(f"PyAV could not open {path} ({str(e)}), falling back to ffprobe")
+        return await _ffprobe(path)
+
+async def _cached_probe(path: str) -> ProbeInfo:
+    """
+    Probe a media file, reusing the previous result while the file is unchanged.
+    
+    Args:
+        path: Path to the media file
+        
+    Returns:
+        ProbeInfo for the file
+    """
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    
+    info = _probe_cache.get(key)
+    if info is not None:
+        _probe_cache.move_to_end(key)
+        return info
+        
+    task = _probe_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_probe(path))
+        _probe_inflight[key] = task
+        task.add_done_callback(lambda _: _probe_inflight.pop(key, None))
+        
+    info = await asyncio.shield(task)
+    _probe_cache[key] = info
+    if len(_probe_cache) > PROBE_CACHE_MAX_ENTRIES:
+        _probe_cache.popitem(last=False)
+    return info
+
+def _get_client() -> httpx.AsyncClient:
+    """
+    Get the shared download client, creating it on first use.
+    
+    Returns:
+        The module-wide httpx client
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(120.0, connect=10.0),
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+            follow_redirects=True
+        )
+    return _client
+
+async def close_client() -> None:
+    """
+    Close the shared download client. Called on application shutdown.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 async def download_content(url: str, output_path: str, is_video: bool = False) -> None:
     """
     Download content (image or video) from a URL.
@@ -47,13 +524,12 @@ async def download_content(url: str, output_path: str, is_video: bool = False) -
         if not url.startswith(('http://', 'https://')):
             raise ValueError(f"Invalid URL: {url}")
             
-        # Download the content
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        # Stream the content to disk without blocking the event loop
+        async with _get_client().stream("GET", url) as response:
+            response.raise_for_status()
+            async with aiofiles.open(output_path, 'wb') as f:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
                 
         # Verify file integrity
         if is_video:
@@ -67,38 +543,24 @@ async def download_content(url: str, output_path: str, is_video: bool = False) -
 
 async def verify_video_file(video_path: str) -> None:
     """
-    Verify that a video file is valid using ffprobe.
+    Verify that a video file is valid.
     
     Args:
         video_path: Path to the video file
     """
-    cmd = [
-        "ffprobe",
-        "-v", "error",
-        "-select_streams", "v:0",
-        "-show_entries", "stream=width,height,duration",
-        "-of", "json",
-        video_path
-    ]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        info = json.loads(result.stdout)
-        
-        # Check if we have valid video info
-        if not info.get("streams"):
-            raise ValueError("Invalid video file: No video streams found")
-            
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Failed to verify video file: {str(e)}")
-        raise ValueError(f"Invalid video file: {str(e)}")
+        info = await _cached_probe(video_path)
     except Exception as e:
         logger.error(f"Error verifying video file: {str(e)}")
-        raise
+        raise ValueError(f"Invalid video file: {str(e)}")
+        
+    # Check if we have valid video info
+    if not info.has_video:
+        raise ValueError("Invalid video file: No video streams found")
 
 async def verify_image_file(image_path: str) -> None:
     """
-    Verify that an image file is valid using ffprobe.
+    Verify that an image file is valid.
     
     Args:
         image_path: Path to the image file
@@ -119,39 +581,39 @@ async def verify_image_file(image_path: str) -> None:
             logger.error(f"Failed to convert SVG to PNG: {str(e)}")
             raise
     
-    # Verify image with ffprobe
-    cmd = [
-        "ffprobe",
-        "-v", "error",
-        "-select_streams", "v:0",
-        "-show_entries", "stream=width,height",
-        "-of", "json",
-        image_path
-    ]
-    
+    # Verify image
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        info = json.loads(result.stdout)
-        
-        # Check if we have valid image info
-        if not info.get("streams"):
-            raise ValueError("Invalid image file: No image data found")
-            
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Failed to verify image file: {str(e)}")
-        raise ValueError(f"Invalid image file: {str(e)}")
+        info = await _cached_probe(image_path)
     except Exception as e:
         logger.error(f"Error verifying image file: {str(e)}")
-        raise
+        raise ValueError(f"Invalid image file: {str(e)}")
+        
+    # Check if we have valid image info
+    if not info.has_video:
+        raise ValueError("Invalid image file: No image data found")
 
 async def convert_svg_to_png(svg_path: str, output_path: str) -> None:
     """
     Convert SVG to PNG using ffmpeg.
     
+    Repeated SVGs (e.g. template assets) are rasterized once and copied
+    from the cache afterwards.
+    
     Args:
         svg_path: Path to SVG file
         output_path: Path to save the PNG file
     """
+    sha = await asyncio.to_thread(_file_sha1, svg_path)
+    cached_png = SVG_CACHE_DIR / f"{sha}_{TARGET_WIDTH}x{TARGET_HEIGHT}.png"
+    if _touch_cached(cached_png):
+        try:
+            await asyncio.to_thread(shutil.copyfile, cached_png, output_path)
+            logger.info(f"Reused cached PNG for SVG: {svg_path} -> {output_path}")
+            return
+        except FileNotFoundError:
+            # Evicted between the touch and the copy
+            pass
+        
     cmd = [
         "ffmpeg",
         "-y",
@@ -162,143 +624,287 @@ async def convert_svg_to_png(svg_path: str, output_path: str) -> None:
     
     logger.info(f"Converting SVG to PNG: {' '.join(cmd)}")
     
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
-    )
-    
-    stdout, stderr = await process.communicate()
+    returncode, stdout, stderr = await _run_ffmpeg(cmd)
     
-    if process.returncode != 0:
+    if returncode != 0:
         error_msg = stderr.decode() if stderr else "Unknown error"
         logger.error(f"Failed to convert SVG to PNG: {error_msg}")
         raise ValueError(f"SVG to PNG conversion failed: {error_msg}")
         
+    # Publish to the cache atomically so readers never see a partial file
+    try:
+        SVG_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        temp_png = SVG_CACHE_DIR / f"{cached_png.stem}_{uuid.uuid4().hex}.png"
+        await asyncio.to_thread(shutil.copyfile, output_path, temp_png)
+        os.replace(temp_png, cached_png)
+        await asyncio.to_thread(_evict_cache, SVG_CACHE_DIR, SVG_CACHE_MAX_BYTES)
+    except OSError as e:
+        logger.warning(f"Could not cache PNG for {svg_path}: {str(e)}")
+        
     logger.info(f"Successfully converted SVG to PNG: {svg_path} -> {output_path}")
 
-async def image_to_video(image_path: str, output_path: str, duration: float) -> None:
+def _evict_cache(cache_dir: Path, max_bytes: int) -> None:
     """
-    Convert an image to a video with the specified duration.
+    Remove least recently used cache entries until cache_dir fits max_bytes.
+    """
+    entries = []
+    total_size = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+                
+    if total_size <= max_bytes:
+        return
+        
+    # Oldest first; cache hits refresh mtime
+    entries.sort()
+    for _, size, path in entries:
+        if total_size <= max_bytes:
+            break
+        with suppress(OSError):
+            os.remove(path)
+            total_size -= size
+
+def _touch_cached(path: Path) -> bool:
+    """
+    Refresh a cache entry's mtime for LRU eviction.
+    
+    Returns:
+        True if the entry exists
+    """
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+def _file_sha1(path: str) -> str:
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def _gop_cache_path(sha: str) -> Path:
+    return GOP_CACHE_DIR / f"{sha}_{TARGET_WIDTH}x{TARGET_HEIGHT}_{detect_video_encoder()}.mp4"
+
+def _still_gop_output_args(temp_path: Path) -> List[str]:
+    """
+    ffmpeg output arguments for a one-second still-image GOP.
+    """
+    # One keyframe followed by identical frames, so repeats can be stream-copied
+    return [
+        "-t", "1",
+        # Constant frame rate guarantees exactly one second of frames
+        "-fps_mode", "cfr",
+        "-r", str(TARGET_FPS),
+        *_video_encoder_args(NORMALIZATION_PRESET, NORMALIZATION_CRF, tune="stillimage"),  # Optimize encoding for static images
+        "-g", str(TARGET_FPS),
+        "-pix_fmt", PIX_FMT,
+        str(temp_path)
+    ]
+
+async def _still_gop(image_path: str) -> str:
+    """
+    Get a one-second, single-GOP encode of a still image, encoding it on first use.
     
     Args:
         image_path: Path to the image file
-        output_path: Path to save the video file
-        duration: Duration of the video in seconds
+        
+    Returns:
+        Path to the cached GOP video
     """
-    # Ensure minimum duration to avoid issues with ffmpeg
-    min_duration = 1.0  # 1 second minimum duration
-    if duration < min_duration:
-        logger.warning(f"Requested duration {duration}s is too short. Using minimum duration of {min_duration}s")
-        duration = min_duration
+    sha = await asyncio.to_thread(_file_sha1, image_path)
+    gop_path = _gop_cache_path(sha)
+    if _touch_cached(gop_path):
+        return str(gop_path)
+        
+    GOP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    temp_path = GOP_CACHE_DIR / f"{gop_path.stem}_{uuid.uuid4().hex}.mp4"
     
-    # Use a filter to duplicate the image frame for the desired duration
-    # -framerate 30 defines how many frames per second are created
-    # -loop 1 tells ffmpeg to loop the input image
-    # -t {duration} tells ffmpeg to stop after the specified duration
     cmd = [
         "ffmpeg",
         "-y",
         "-loop", "1",
         "-framerate", str(TARGET_FPS),
         "-i", image_path,
-        "-vf", f"scale={TARGET_WIDTH}:{TARGET_HEIGHT}:force_original_aspect_ratio=decrease,pad={TARGET_WIDTH}:{TARGET_HEIGHT}:(ow-iw)/2:(oh-ih)/2",
-        "-t", str(duration),
-        "-c:v", "libx264",
-        "-tune", "stillimage",  # Optimize encoding for static images
-        "-preset", NORMALIZATION_PRESET,
-        "-crf", NORMALIZATION_CRF,
-        "-pix_fmt", PIX_FMT,
-        output_path
+        "-vf", _SCALE_PAD,
+        *_still_gop_output_args(temp_path)
     ]
     
-    logger.info(f"Converting image to video (duration: {duration}s): {' '.join(cmd)}")
+    logger.info(f"Encoding still image GOP: {' '.join(cmd)}")
+    
+    returncode, stdout, stderr = await _run_ffmpeg(cmd)
+    
+    if returncode != 0:
+        temp_path.unlink(missing_ok=True)
+        error_msg = stderr.decode() if stderr else "Unknown error"
+        raise ValueError(f"Still image encode failed: {error_msg}")
+        
+    # Publish atomically so concurrent conversions never see a partial file
+    os.replace(temp_path, gop_path)
+    await asyncio.to_thread(_evict_cache, GOP_CACHE_DIR, GOP_CACHE_MAX_BYTES)
+    return str(gop_path)
+
+async def _encode_still_gops(image_paths: List[str]) -> None:
+    """
+    Encode the uncached GOPs of several still images, IMAGE_BATCH_SIZE per ffmpeg process.
+    
+    Each process has one output per image, so a batch pays for a single startup
+    and encoder init. A failed batch is only logged; _still_gop then encodes
+    those images one by one, so a bad image doesn't take the others down.
+    
+    Args:
+        image_paths: Paths to the image files
+    """
+    shas = await asyncio.gather(*(asyncio.to_thread(_file_sha1, path) for path in image_paths))
+    
+    # Encode each missing GOP once, even if the image repeats
+    missing: Dict[Path, str] = {}
+    for image_path, sha in zip(image_paths, shas):
+        gop_path = _gop_cache_path(sha)
+        if not _touch_cached(gop_path):
+            missing.setdefault(gop_path, image_path)
+            
+    batches = list(missing.items())
+    for start in range(0, len(batches), IMAGE_BATCH_SIZE):
+        batch = batches[start:start + IMAGE_BATCH_SIZE]
+        GOP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        temp_paths = [GOP_CACHE_DIR / f"{gop_path.stem}_{uuid.uuid4().hex}.mp4" for gop_path, _ in batch]
+        
+        cmd = ["ffmpeg", "-y"]
+        for _, image_path in batch:
+            cmd.extend(["-loop", "1", "-framerate", str(TARGET_FPS), "-i", image_path])
+        cmd.extend([
+            "-filter_complex",
+            ";".join(f"[{k}:v]{_SCALE_PAD}[v{k}]" for k in range(len(batch)))
+        ])
+        for k, temp_path in enumerate(temp_paths):
+            cmd.extend(["-map", f"[v{k}]", *_still_gop_output_args(temp_path)])
+            
+        logger.info(f"Encoding {len(batch)} still image GOPs: {' '.join(cmd)}")
+        
+        returncode, stdout, stderr = await _run_ffmpeg(cmd)
+        
+        if returncode != 0:
+            for temp_path in temp_paths:
+                temp_path.unlink(missing_ok=True)
+            error_msg = stderr.decode() if stderr else "Unknown error"
+            logger.warning(f"Batched still image encode failed, encoding {len(batch)} images one by one: {error_msg}")
+            continue
+            
+        # Publish atomically so concurrent conversions never see a partial file
+        for (gop_path, _), temp_path in zip(batch, temp_paths):
+            os.replace(temp_path, gop_path)
+            
+    if missing:
+        await asyncio.to_thread(_evict_cache, GOP_CACHE_DIR, GOP_CACHE_MAX_BYTES)
+
+async def image_to_video(image_path: str, output_path: str, duration: float) -> None:
+    """
+    Convert an image to a video with the specified duration.
+    
+    Args:
+        image_path: Path to the image file
+        output_path: Path to save the video file
+        duration: Duration of the video in seconds
+    """
+    # Ensure minimum duration to avoid issues with ffmpeg
+    min_duration = 1.0  # 1 second minimum duration
+    if duration < min_duration:
+        logger.warning(f"Requested duration {duration}s is too short. Using minimum duration of {min_duration}s")
+        duration = min_duration
     
     try:
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
+        # Every frame is identical, so encode one second once and repeat it,
+        # stream-copying and trimming to the duration
+        gop_path = await _still_gop(image_path)
         
-        stdout, stderr = await process.communicate()
+        logger.info(f"Converting image to video (duration: {duration}s): {image_path}")
         
-        if process.returncode != 0:
+        returncode, stdout, stderr = await _concat_copy([gop_path] * math.ceil(duration), output_path, duration)
+            
+        if returncode != 0:
             error_msg = stderr.decode() if stderr else "Unknown error"
             logger.error(f"Failed to convert image to video: {error_msg}")
             raise ValueError(f"Image to video conversion failed: {error_msg}")
         
-        # Verify the created video has the correct duration
-        actual_duration = await get_video_duration(output_path)
-        logger.info(f"Successfully converted image to video: {image_path} -> {output_path} (duration: {actual_duration}s)")
+        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            raise ValueError(f"Image to video conversion failed: no output written to {output_path}")
+            
+        logger.info(f"Successfully converted image to video: {image_path} -> {output_path}")
         
-        # If duration is significantly off, log warning but don't fail
-        if abs(actual_duration - duration) > 0.5:  # If off by more than half a second
-            logger.warning(f"Video duration mismatch. Expected: {duration}s, Got: {actual_duration}s")
+        # Re-probing the output costs a probe per clip, so only check the duration when debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            actual_duration = await get_video_duration(output_path)
             
-            # If the video is too short (less than 80% of target), try again with a different approach
-            if actual_duration < (duration * 0.8) and actual_duration < 2.0:
-                logger.warning(f"Video is too short, attempting alternative conversion method")
-                
-                # Create a temporary directory for intermediate files
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    # Create multiple copies of the image and concatenate them
-                    concat_file = os.path.join(temp_dir, "concat.txt")
-                    duplicate_image = os.path.join(temp_dir, "duplicate.jpg")
-                    
-                    # Copy the original image
-                    shutil.copy2(image_path, duplicate_image)
-                    
-                    # Create a concat file with multiple references to the same image
-                    with open(concat_file, 'w') as f:
-                        repeat_count = math.ceil(duration)
-                        for _ in range(repeat_count):
-                            f.write(f"file '{duplicate_image}'\n")
-                            f.write(f"duration {1.0}\n")
-                    
-                    # Add one last entry without duration
-                    with open(concat_file, 'a') as f:
-                        f.write(f"file '{duplicate_image}'\n")
-                    
-                    # Use concat demuxer to create the video
-                    alt_cmd = [
-                        "ffmpeg",
-                        "-y",
-                        "-f", "concat",
-                        "-safe", "0",
-                        "-i", concat_file,
-                        "-vf", f"scale={TARGET_WIDTH}:{TARGET_HEIGHT}:force_original_aspect_ratio=decrease,pad={TARGET_WIDTH}:{TARGET_HEIGHT}:(ow-iw)/2:(oh-ih)/2",
-                        "-t", str(duration),
-                        "-c:v", "libx264",
-                        "-preset", NORMALIZATION_PRESET,
-                        "-crf", NORMALIZATION_CRF,
-                        "-pix_fmt", PIX_FMT,
-                        output_path
-                    ]
-                    
-                    logger.info(f"Trying alternative method: {' '.join(alt_cmd)}")
-                    
-                    alt_process = await asyncio.create_subprocess_exec(
-                        *alt_cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE
-                    )
-                    
-                    alt_stdout, alt_stderr = await alt_process.communicate()
-                    
-                    if alt_process.returncode != 0:
-                        alt_error_msg = alt_stderr.decode() if alt_stderr else "Unknown error"
-                        logger.error(f"Alternative method failed: {alt_error_msg}")
-                        # We'll just continue with the original video since we at least have something
-                    else:
-                        # Verify the new video
-                        new_duration = await get_video_duration(output_path)
-                        logger.info(f"Alternative method created video with duration: {new_duration}s (target: {duration}s)")
+            # If duration is significantly off, log warning but don't fail
+            if abs(actual_duration - duration) > 0.5:  # If off by more than half a second
+                logger.warning(f"Video duration mismatch. Expected: {duration}s, Got: {actual_duration}s")
     
     except Exception as e:
         logger.error(f"Error in image_to_video: {str(e)}")
         raise
 
+async def batch_images_to_videos(items: List[Tuple[str, str, float]]) -> List[Optional[str]]:
+    """
+    Convert several images to videos, encoding their stills in as few ffmpeg runs as possible.
+    
+    Args:
+        items: (image_path, output_path, duration) tuples
+        
+    Returns:
+        Output paths in the same order, with None for failed conversions
+    """
+    if not items:
+        return []
+        
+    # Encode every uncached still in batched runs; each clip is then an in-process stream copy
+    await _encode_still_gops([image_path for image_path, _, _ in items])
+    
+    async def convert(image_path: str, output_path: str, duration: float) -> Optional[str]:
+        try:
+            await image_to_video(image_path, output_path, duration)
+            return output_path
+        except Exception as e:
+            logger.error(f"Error converting image {image_path}, skipping it: {str(e)}")
+            return None
+            
+    return await asyncio.gather(*(convert(*item) for item in items))
+
+# Smallest speed factor passed to _atempo_chain
+MIN_ATEMPO_FACTOR = 0.001
+
+@lru_cache(maxsize=256)
+def _atempo_chain(factor: float) -> str:
+    """
+    Build an atempo filter chain for any positive speed factor.
+    
+    A single atempo only accepts 0.5-2.0, so larger or smaller factors are
+    split into a product of in-range stages.
+    
+    Args:
+        factor: Speed factor, rounded by the caller so the cache stays small
+        
+    Returns:
+        Comma-joined atempo filters
+    """
+    if factor <= 0:
+        raise ValueError(f"Invalid atempo factor: {factor}")
+        
+    stages = []
+    while factor > 2.0:
+        stages.append("atempo=2.0")
+        factor /= 2.0
+    while factor < 0.5:
+        stages.append("atempo=0.5")
+        factor /= 0.5
+    stages.append(f"atempo={factor}")
+    return ",".join(stages)
+
 async def standardize_video(input_path: str, output_path: str, target_duration: float, mode: str = "speed") -> None:
     """
     Standardize a video to the target dimensions, framerate, and duration.
@@ -312,18 +918,14 @@ async def standardize_video(input_path: str, output_path: str, target_duration:
             - "cut": Cut the video to target duration
             - "loop": Loop the video to reach target duration
     """
-    # First get the original video duration
-    duration = await get_video_duration(input_path)
-    
-    # Prepare the filter complex for standardizing video
-    filter_complex = [
-        f"scale={TARGET_WIDTH}:{TARGET_HEIGHT}:force_original_aspect_ratio=decrease",
-        f"pad={TARGET_WIDTH}:{TARGET_HEIGHT}:(ow-iw)/2:(oh-ih)/2",
-        f"fps={TARGET_FPS}"
-    ]
+    # Get the original duration and audio layout in parallel
+    duration, has_audio = await asyncio.gather(
+        get_video_duration(input_path),
+        check_video_has_audio(input_path)
+    )
     
-    # Check if the video has audio
-    has_audio = await check_video_has_audio(input_path)
+    # Standard scale/pad/fps filter; speed mode appends setpts
+    video_filter = _SCALE_PAD_FPS
     audio_args = []
     
     # Handle different modes for duration adjustment
@@ -350,33 +952,14 @@ async def standardize_video(input_path: str, output_path: str, target_duration:
             logger.warning(f"Video is extremely short ({duration}s). Converting to image first and then to video.")
             
             # Extract a frame from the video first
-            temp_frame = os.path.join(os.path.dirname(input_path), f"temp_frame_{uuid.uuid4()}.jpg")
-            frame_cmd = [
-                "ffmpeg",
-                "-y",
-                "-i", input_path,
-                "-vframes", "1",
-                "-q:v", "2",
-                temp_frame
-            ]
+            temp_frame = os.path.join(os.path.dirname(input_path), f"temp_frame_{uuid.uuid4()}.png")
             
             try:
-                frame_process = await asyncio.create_subprocess_exec(
-                    *frame_cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
+                frame_returncode, stdout, stderr = await _extract_first_frame(input_path, temp_frame)
                 
-                stdout, stderr = await frame_process.communicate()
-                
-                if frame_process.returncode == 0 and os.path.exists(temp_frame):
+                if frame_returncode == 0 and os.path.exists(temp_frame):
                     # Now convert the frame to a video
                     await image_to_video(temp_frame, output_path, target_duration)
-                    
-                    # Clean up the temporary frame
-                    if os.path.exists(temp_frame):
-                        os.unlink(temp_frame)
-                        
                     return
                 else:
                     logger.warning(f"Failed to extract frame from short video: {stderr.decode() if stderr else 'Unknown error'}")
@@ -386,7 +969,7 @@ async def standardize_video(input_path: str, output_path: str, target_duration:
                 # Fall back to normal looping
             finally:
                 # Clean up the temporary frame if it exists
-                if os.path.exists(temp_frame):
+                with suppress(FileNotFoundError):
                     os.unlink(temp_frame)
                 
         # Calculate how many times to loop
@@ -407,10 +990,8 @@ async def standardize_video(input_path: str, output_path: str, target_duration:
             "-safe", "0",
             "-i", loop_file,
             "-t", f"{target_duration}",
-            "-vf", ",".join(filter_complex),
-            "-c:v", "libx264",
-            "-preset", NORMALIZATION_PRESET,
-            "-crf", NORMALIZATION_CRF,
+            "-vf", video_filter,
+            *_video_encoder_args(NORMALIZATION_PRESET, NORMALIZATION_CRF),
             "-pix_fmt", PIX_FMT,
         ]
         
@@ -431,30 +1012,19 @@ async def standardize_video(input_path: str, output_path: str, target_duration:
         logger.info(f"Looping video: {' '.join(cmd)}")
         
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            returncode, stdout, stderr = await _run_ffmpeg(cmd)
             
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
+            if returncode != 0:
                 error_msg = stderr.decode() if stderr else "Unknown error"
                 logger.error(f"Failed to loop video: {error_msg}")
                 raise ValueError(f"Video looping failed: {error_msg}")
                 
             logger.info(f"Successfully looped video: {input_path} -> {output_path}")
-            
-            # Clean up the temporary file
-            os.unlink(loop_file)
-            
             return
-        except Exception as e:
-            # Clean up the temporary file in case of an error
-            if os.path.exists(loop_file):
+        finally:
+            # Clean up the temporary file
+            with suppress(FileNotFoundError):
                 os.unlink(loop_file)
-            raise e
     
     else:
         # Use speed adjustment (default mode)
@@ -462,8 +1032,8 @@ async def standardize_video(input_path: str, output_path: str, target_duration:
         speed_factor = duration / target_duration
         logger.info(f"Adjusting video speed by factor {speed_factor} to reach target duration")
         
-        # Add speed adjustment to filter complex
-        filter_complex.append(f"setpts={1/speed_factor}*PTS")
+        # Add speed adjustment to the video filter
+        video_filter = f"{_SCALE_PAD_FPS},setpts={1/speed_factor}*PTS"
         
         # Audio args for speed mode
         if has_audio:
@@ -472,20 +1042,10 @@ async def standardize_video(input_path: str, output_path: str, target_duration:
                 "-b:a", AUDIO_BITRATE,
                 "-ar", str(TARGET_AUDIO_RATE),
                 "-ac", str(TARGET_AUDIO_CHANNELS),
-                "-af", f"atempo={min(2.0, speed_factor)}"  # atempo has limits, usually between 0.5 and 2.0
+                # Clamp before rounding so tiny factors can't round down to 0
+                "-af", _atempo_chain(round(max(speed_factor, MIN_ATEMPO_FACTOR), 3))
             ]
             
-            # If speed factor is outside the range 0.5-2.0, apply multiple filters
-            if speed_factor > 2.0:
-                tempo_chain = []
-                remaining_factor = speed_factor
-                while remaining_factor > 1.0:
-                    tempo_factor = min(2.0, remaining_factor)
-                    tempo_chain.append(f"atempo={tempo_factor}")
-                    remaining_factor /= tempo_factor
-                audio_args[-1] = "-af"
-                audio_args.append(",".join(tempo_chain))
-                
         else:
             audio_args = ["-an"]
     
@@ -502,10 +1062,8 @@ async def standardize_video(input_path: str, output_path: str, target_duration:
     
     # Add the rest of the arguments
     cmd.extend([
-        "-vf", ",".join(filter_complex),
-        "-c:v", "libx264",
-        "-preset", NORMALIZATION_PRESET,
-        "-crf", NORMALIZATION_CRF,
+        "-vf", video_filter,
+        *_video_encoder_args(NORMALIZATION_PRESET, NORMALIZATION_CRF),
         "-pix_fmt", PIX_FMT,
     ])
     
@@ -517,15 +1075,9 @@ async def standardize_video(input_path: str, output_path: str, target_duration:
     
     logger.info(f"Standardizing video: {' '.join(cmd)}")
     
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
-    )
-    
-    stdout, stderr = await process.communicate()
+    returncode, stdout, stderr = await _run_ffmpeg(cmd)
     
-    if process.returncode != 0:
+    if returncode != 0:
         error_msg = stderr.decode() if stderr else "Unknown error"
         logger.error(f"Failed to standardize video: {error_msg}")
         raise ValueError(f"Video standardization failed: {error_msg}")
@@ -542,19 +1094,8 @@ async def get_video_duration(video_path: str) -> float:
     Returns:
         Duration in seconds
     """
-    cmd = [
-        "ffprobe",
-        "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "json",
-        video_path
-    ]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        info = json.loads(result.stdout)
-        duration = float(info.get("format", {}).get("duration", 0))
-        return duration
+        return (await _cached_probe(video_path)).duration
     except Exception as e:
         logger.error(f"Error getting video duration: {str(e)}")
         raise ValueError(f"Failed to get video duration: {str(e)}")
@@ -569,20 +1110,8 @@ async def check_video_has_audio(video_path: str) -> bool:
     Returns:
         True if the video has audio, False otherwise
     """
-    cmd = [
-        "ffprobe",
-        "-v", "error",
-        "-select_streams", "a:0",
-        "-show_entries", "stream=codec_type",
-        "-of", "json",
-        video_path
-    ]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        info = json.loads(result.stdout)
-        streams = info.get("streams", [])
-        return len(streams) > 0
+        return (await _cached_probe(video_path)).has_audio
     except Exception:
         # If there's an error, assume no audio
         return False
@@ -600,40 +1129,56 @@ async def concatenate_videos(video_list: List[str], output_path: str) -> None:
     
     # Verify all files exist and are valid videos before attempting concatenation
     valid_videos = []
+    signatures = set()
     total_duration = 0
     
+    existing = []
     for i, video_path in enumerate(video_list):
         if not os.path.exists(video_path):
             logger.warning(f"Video {i} does not exist: {video_path}")
             continue
+        existing.append((i, video_path))
+        
+    # Probe the clips concurrently, at most one per CPU core
+    probe_semaphore = asyncio.Semaphore(os.cpu_count() or 4)
+    
+    async def probe_video(video_path: str) -> ProbeInfo:
+        async with probe_semaphore:
+            return await _cached_probe(video_path)
             
-        try:
-            # Check if the video is valid
-            duration = await get_video_duration(video_path)
-            if duration <= 0:
-                logger.warning(f"Video {i} has invalid duration ({duration}s): {video_path}")
-                continue
-                
-            logger.info(f"Video {i}: {video_path} - Duration: {duration:.2f}s")
-            valid_videos.append(video_path)
-            total_duration += duration
+    probes = await asyncio.gather(
+        *(probe_video(video_path) for _, video_path in existing),
+        return_exceptions=True
+    )
+    
+    for (i, video_path), info in zip(existing, probes):
+        if isinstance(info, Exception):
+            logger.warning(f"Error verifying video {i}: {str(info)}")
+            continue
             
-        except Exception as e:
-            logger.warning(f"Error verifying video {i}: {str(e)}")
+        duration = info.duration
+        if duration <= 0:
+            logger.warning(f"Video {i} has invalid duration ({duration}s): {video_path}")
             continue
+            
+        logger.info(f"Video {i}: {video_path} - Duration: {duration:.2f}s")
+        valid_videos.append(video_path)
+        signatures.add(info.stream_signature())
+        total_duration += duration
     
     if not valid_videos:
         raise ValueError("No valid videos to concatenate after verification")
     
     logger.info(f"Concatenating {len(valid_videos)} valid videos with total duration: {total_duration:.2f}s")
         
-    # Create a temporary file list
-    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
-        for video_path in valid_videos:
-            f.write(f"file '{os.path.abspath(video_path)}'\n")
-        list_file = f.name
+    # Clips that already share codec and stream parameters (e.g. all outputs
+    # of standardize_video) can be joined without re-encoding
+    if len(signatures) == 1:
+        logger.info("All videos share stream parameters, concatenating with stream copy")
+        returncode, stdout, stderr = await _concat_copy(valid_videos, output_path, faststart=True)
+    else:
+        list_file = _write_concat_list(valid_videos)
         
-    try:
         # Build the command to concatenate videos
         cmd = [
             "ffmpeg",
@@ -641,9 +1186,7 @@ async def concatenate_videos(video_list: List[str], output_path: str) -> None:
             "-f", "concat",
             "-safe", "0",
             "-i", list_file,
-            "-c:v", "libx264",
-            "-preset", CONCATENATION_PRESET,
-            "-crf", CONCATENATION_CRF,
+            *_video_encoder_args(CONCATENATION_PRESET, CONCATENATION_CRF),
             "-pix_fmt", PIX_FMT,
             "-c:a", AUDIO_CODEC,
             "-b:a", AUDIO_BITRATE,
@@ -654,29 +1197,185 @@ async def concatenate_videos(video_list: List[str], output_path: str) -> None:
         
         logger.info(f"Concatenating videos: {' '.join(cmd)}")
         
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        
-        stdout, stderr = await process.communicate()
-        
-        if process.returncode != 0:
-            error_msg = stderr.decode() if stderr else "Unknown error"
-            logger.error(f"Failed to concatenate videos: {error_msg}")
-            raise ValueError(f"Video concatenation failed: {error_msg}")
+        try:
+            returncode, stdout, stderr = await _run_ffmpeg(cmd)
+        finally:
+            # Clean up the temporary file
+            with suppress(FileNotFoundError):
+                os.unlink(list_file)
+                
+    if returncode != 0:
+        error_msg = stderr.decode() if stderr else "Unknown error"
+        logger.error(f"Failed to concatenate videos: {error_msg}")
+        raise ValueError(f"Video concatenation failed: {error_msg}")
         
-        # Verify the output file exists and has the expected duration    
-        if os.path.exists(output_path):
+    # Verify the output file exists; the duration is only re-probed when debugging
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        logger.info(f"Successfully concatenated videos to: {output_path}")
+        if logger.isEnabledFor(logging.DEBUG):
             final_duration = await get_video_duration(output_path)
-            logger.info(f"Successfully concatenated videos to: {output_path}")
-            logger.info(f"Final video duration: {final_duration:.2f}s (expected approx: {total_duration:.2f}s)")
+            logger.debug(f"Final video duration: {final_duration:.2f}s (expected approx: {total_duration:.2f}s)")
+    else:
+        logger.error(f"Output file does not exist after concatenation: {output_path}")
+        raise ValueError("Concatenation failed: output file does not exist")
+
+async def concatenate_clips(clips: List[ClipSource], output_path: str) -> None:
+    """
+    Normalize and concatenate raw sources in a single ffmpeg encode.
+    
+    Each clip is scaled, padded and resampled to the target format inside one
+    filtergraph, so there are no intermediate standardized files and every
+    pixel is encoded once. Videos longer than their target are cut, shorter
+    ones are looped, and images are held for their target duration.
+    
+    If the fused command fails (e.g. one clip probes fine but doesn't decode),
+    each clip is normalized on its own and the ones that fail are skipped,
+    as the per-clip pipeline always did.
+    
+    Args:
+        clips: Sources in playback order
+        output_path: Path to save the concatenated video
+    """
+    if not clips:
+        raise ValueError("No videos to concatenate")
+        
+    # Probe the video sources concurrently, at most one per CPU core
+    probe_semaphore = asyncio.Semaphore(os.cpu_count() or 4)
+    
+    async def probe_clip(clip: ClipSource) -> Optional[ProbeInfo]:
+        if clip.is_image:
+            return None
+        async with probe_semaphore:
+            return await _cached_probe(clip.path)
+            
+    probes = await asyncio.gather(*(probe_clip(clip) for clip in clips), return_exceptions=True)
+    
+    input_args = []
+    filter_parts = []
+    concat_inputs = []
+    usable = []
+    total_duration = 0
+    
+    for i, (clip, info) in enumerate(zip(clips, probes)):
+        if isinstance(info, Exception):
+            logger.warning(f"Error verifying clip {i}: {str(info)}")
+            continue
+            
+        if clip.is_image:
+            # Ensure minimum duration to avoid issues with ffmpeg
+            duration = max(clip.target_duration, 1.0)
+            input_args.extend(["-loop", "1", "-framerate", str(TARGET_FPS), "-t", str(duration), "-i", clip.path])
+            has_audio = False
+        else:
+            if not info.has_video or info.duration <= 0:
+                logger.warning(f"Clip {i} has no usable video ({info.duration}s): {clip.path}")
+                continue
+                
+            duration = clip.target_duration
+            if info.duration < duration:
+                # Too short, loop the input until the trim below
+                logger.info(f"Looping clip {i} from {info.duration}s to {duration}s")
+                input_args.extend(["-stream_loop", "-1"])
+            elif info.duration > duration:
+                logger.info(f"Cutting clip {i} from {info.duration}s to {duration}s")
+            input_args.extend(["-i", clip.path])
+            has_audio = info.has_audio
+            
+        # Inputs are numbered by position in the command, not in the clip list
+        index = len(concat_inputs)
+        filter_parts.append(f"[{index}:v]{_CLIP_VIDEO_FILTER},trim=duration={duration},setpts=PTS-STARTPTS[v{index}]")
+        if has_audio:
+            filter_parts.append(f"[{index}:a]{_CLIP_AUDIO_FORMAT},atrim=duration={duration},asetpts=PTS-STARTPTS[a{index}]")
         else:
-            logger.error(f"Output file does not exist after concatenation: {output_path}")
-            raise ValueError("Concatenation failed: output file does not exist")
+            # Silent clips still need an audio stream for concat
+            filter_parts.append(f"anullsrc=channel_layout=stereo:sample_rate={TARGET_AUDIO_RATE},atrim=duration={duration}[a{index}]")
+        concat_inputs.append(f"[v{index}][a{index}]")
+        usable.append((i, clip, info, duration))
+        total_duration += duration
         
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(list_file):
-            os.unlink(list_file) 
\ No newline at end of file
+    if not concat_inputs:
+        raise ValueError("No valid videos to concatenate after verification")
+        
+    filter_parts.append(f"{''.join(concat_inputs)}concat=n={len(concat_inputs)}:v=1:a=1[v][a]")
+    
+    cmd = [
+        "ffmpeg",
+        "-y",
+        *input_args,
+        "-filter_complex", ";".join(filter_parts),
+        "-map", "[v]",
+        "-map", "[a]",
+        *_video_encoder_args(CONCATENATION_PRESET, CONCATENATION_CRF),
+        "-pix_fmt", PIX_FMT,
+        "-c:a", AUDIO_CODEC,
+        "-b:a", AUDIO_BITRATE,
+        "-ar", str(TARGET_AUDIO_RATE),
+        "-ac", str(TARGET_AUDIO_CHANNELS),
+        output_path
+    ]
+    
+    logger.info(f"Concatenating {len(concat_inputs)} clips with total duration: {total_duration:.2f}s")
+    logger.info(f"Concatenating clips: {' '.join(cmd)}")
+    
+    returncode, stdout, stderr = await _run_ffmpeg(cmd)
+    
+    if returncode != 0:
+        error_msg = stderr.decode() if stderr else "Unknown error"
+        logger.warning(f"Fused concatenation failed, normalizing clips individually: {error_msg}")
+        await _concatenate_clips_individually(usable, output_path)
+        return
+        
+    if not os.path.exists(output_path):
+        logger.error(f"Output file does not exist after concatenation: {output_path}")
+        raise ValueError("Concatenation failed: output file does not exist")
+        
+    logger.info(f"Successfully concatenated clips to: {output_path}")
+
+async def _concatenate_clips_individually(
+    usable: List[Tuple[int, ClipSource, Optional[ProbeInfo], float]],
+    output_path: str
+) -> None:
+    """
+    Fallback for concatenate_clips: normalize the clips outside the fused
+    graph (videos one per ffmpeg run, images through batch_images_to_videos),
+    skip the ones that fail, and concatenate the rest.
+    
+    Args:
+        usable: (index, clip, probe, duration) for every clip that passed probing
+        output_path: Path to save the concatenated video
+    """
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as temp_dir:
+        async def standardize(i: int, clip: ClipSource, info: ProbeInfo, duration: float) -> Optional[str]:
+            normalized_path = os.path.join(temp_dir, f"normalized_{i}.mp4")
+            try:
+                if info.duration > duration:
+                    await standardize_video(clip.path, normalized_path, duration, mode="cut")
+                elif info.duration < duration:
+                    await standardize_video(clip.path, normalized_path, duration, mode="loop")
+                else:
+                    await standardize_video(clip.path, normalized_path, duration)
+                return normalized_path
+            except Exception as e:
+                logger.error(f"Error processing clip {i}, skipping it: {str(e)}")
+                return None
+                
+        # Images share batched still encodes; each video is standardized on its own
+        images = [entry for entry in usable if entry[1].is_image]
+        videos = [entry for entry in usable if not entry[1].is_image]
+        image_outputs, video_outputs = await asyncio.gather(
+            batch_images_to_videos([
+                (clip.path, os.path.join(temp_dir, f"normalized_{i}.mp4"), duration)
+                for i, clip, _, duration in images
+            ]),
+            asyncio.gather(*(standardize(*entry) for entry in videos))
+        )
+        
+        # Back in clip order
+        outputs = dict(zip((i for i, *_ in images), image_outputs))
+        outputs.update(zip((i for i, *_ in videos), video_outputs))
+        normalized = [outputs[i] for i, *_ in usable]
+        normalized_files = [path for path in normalized if path is not None]
+        if not normalized_files:
+            raise ValueError("No valid videos to concatenate after normalization")
+            
+        await concatenate_videos(normalized_files, output_path)